@@ -0,0 +1,40 @@
+"""add_recommendation_search_cursors
+
+Revision ID: 9b3e5d1c7a24
+Revises: 4a757ff897d2
+Create Date: 2026-10-18 11:20:41.512367
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e5d1c7a24'
+down_revision: Union[str, Sequence[str], None] = '4a757ff897d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('recommendation_search_cursors',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('params_hash', sa.String(length=40), nullable=False),
+    sa.Column('last_searched_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'params_hash', name='uq_user_search_cursor')
+    )
+    op.create_index(op.f('ix_recommendation_search_cursors_id'), 'recommendation_search_cursors', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_recommendation_search_cursors_id'), table_name='recommendation_search_cursors')
+    op.drop_table('recommendation_search_cursors')
@@ -0,0 +1,77 @@
+"""compress_vacancy_raw_data
+
+Converts vacancies.raw_data and job_recommendations_archive.raw_data from JSON
+to compressed binary (see app.models.types.CompressedJSON). Rows are rewritten
+in batches with the codec configured at migration time.
+
+Revision ID: a7c4e1f9d386
+Revises: f3b8d2e6a175
+Create Date: 2026-10-18 14:12:09.530817
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.types import compress_payload, decompress_payload
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c4e1f9d386'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d2e6a175'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('vacancies', 'job_recommendations_archive')
+BATCH_SIZE = 500
+
+
+def _convert(table: str, new_type: sa.types.TypeEngine, convert) -> None:
+    """Rewrite raw_data of ``table`` into a new column of ``new_type`` through ``convert``"""
+    bind = op.get_bind()
+    op.add_column(table, sa.Column('raw_data_converted', new_type, nullable=True))
+
+    source = sa.table(table, sa.column('id', sa.Integer()), sa.column('raw_data', sa.LargeBinary()))
+    target = sa.table(table, sa.column('id', sa.Integer()), sa.column('raw_data_converted', new_type))
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(source.c.id, source.c.raw_data)
+            .where(source.c.id > last_id)
+            .where(source.c.raw_data.isnot(None))
+            .order_by(source.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        bind.execute(
+            target.update().where(target.c.id == sa.bindparam('row_id')),
+            [{'row_id': row_id, 'raw_data_converted': convert(value)} for row_id, value in rows]
+        )
+        last_id = rows[-1][0]
+
+    op.drop_column(table, 'raw_data')
+    op.alter_column(table, 'raw_data_converted', new_column_name='raw_data')
+
+
+def _compress_json_text(value) -> bytes:
+    """Compress a raw_data value read back as UTF-8 JSON text"""
+    return compress_payload(json.loads(bytes(value)))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        # Read the JSON column as its text form; psycopg2 would otherwise hand back parsed values
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN raw_data TYPE bytea USING convert_to(raw_data::text, 'UTF8')")
+        _convert(table, sa.LargeBinary(), _compress_json_text)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        _convert(table, sa.JSON(), lambda value: decompress_payload(bytes(value)))
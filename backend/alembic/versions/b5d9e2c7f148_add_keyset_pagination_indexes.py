@@ -0,0 +1,32 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: b5d9e2c7f148
+Revises: a7c4e1f9d386
+Create Date: 2026-10-18 15:02:37.284611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d9e2c7f148'
+down_revision: Union[str, Sequence[str], None] = 'a7c4e1f9d386'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_job_recommendations_user_active_score', table_name='job_recommendations')
+    op.create_index('ix_job_recommendations_user_active_score', 'job_recommendations', ['user_id', 'is_active', 'relevance_score', 'id'], unique=False)
+    op.create_index('ix_saved_jobs_user_created', 'saved_jobs', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_saved_jobs_user_created', table_name='saved_jobs')
+    op.drop_index('ix_job_recommendations_user_active_score', table_name='job_recommendations')
+    op.create_index('ix_job_recommendations_user_active_score', 'job_recommendations', ['user_id', 'is_active', 'relevance_score'], unique=False)
@@ -0,0 +1,30 @@
+"""add_chat_history_summary
+
+Revision ID: c8e2f4a6b913
+Revises: b5d9e2c7f148
+Create Date: 2026-10-18 15:47:21.903514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e2f4a6b913'
+down_revision: Union[str, Sequence[str], None] = 'b5d9e2c7f148'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_histories', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('chat_histories', sa.Column('summary_until_message_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chat_histories', 'summary_until_message_id')
+    op.drop_column('chat_histories', 'summary')
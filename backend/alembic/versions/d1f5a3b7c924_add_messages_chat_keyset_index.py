@@ -0,0 +1,28 @@
+"""add_messages_chat_keyset_index
+
+Revision ID: d1f5a3b7c924
+Revises: c8e2f4a6b913
+Create Date: 2026-10-18 19:26:41.508337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1f5a3b7c924'
+down_revision: Union[str, Sequence[str], None] = 'c8e2f4a6b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_messages_chat_history_id_id', 'messages', ['chat_history_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_chat_history_id_id', table_name='messages')
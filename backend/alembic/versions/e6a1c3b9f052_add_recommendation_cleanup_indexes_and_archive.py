@@ -0,0 +1,59 @@
+"""add_recommendation_cleanup_indexes_and_archive
+
+Revision ID: e6a1c3b9f052
+Revises: d2f7a8c4e913
+Create Date: 2026-10-18 12:48:03.641920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a1c3b9f052'
+down_revision: Union[str, Sequence[str], None] = 'd2f7a8c4e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_job_recommendations_created_at', 'job_recommendations', ['created_at'], unique=False)
+    op.create_index('ix_job_recommendations_user_active_score', 'job_recommendations', ['user_id', 'is_active', 'relevance_score'], unique=False)
+
+    op.create_table('job_recommendations_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('hh_vacancy_id', sa.String(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('company_name', sa.String(), nullable=True),
+    sa.Column('salary_from', sa.Integer(), nullable=True),
+    sa.Column('salary_to', sa.Integer(), nullable=True),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('area_name', sa.String(), nullable=True),
+    sa.Column('employment_type', sa.String(), nullable=True),
+    sa.Column('experience_required', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('key_skills', sa.JSON(), nullable=True),
+    sa.Column('relevance_score', sa.Float(), nullable=True),
+    sa.Column('skills_match_score', sa.Float(), nullable=True),
+    sa.Column('location_match_score', sa.Float(), nullable=True),
+    sa.Column('salary_match_score', sa.Float(), nullable=True),
+    sa.Column('raw_data', sa.JSON(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_job_recommendations_archive_user_id'), 'job_recommendations_archive', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_job_recommendations_archive_user_id'), table_name='job_recommendations_archive')
+    op.drop_table('job_recommendations_archive')
+    op.drop_index('ix_job_recommendations_user_active_score', table_name='job_recommendations')
+    op.drop_index('ix_job_recommendations_created_at', table_name='job_recommendations')
@@ -0,0 +1,104 @@
+"""add_shared_vacancies_table
+
+Moves vacancy details out of job_recommendations into one row per HH vacancy.
+Existing recommendations are backfilled from their most recently written copy.
+
+Revision ID: f3b8d2e6a175
+Revises: e6a1c3b9f052
+Create Date: 2026-10-18 13:31:46.118205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d2e6a175'
+down_revision: Union[str, Sequence[str], None] = 'e6a1c3b9f052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VACANCY_COLUMNS = (
+    'title', 'company_name', 'salary_from', 'salary_to', 'currency', 'area_name',
+    'employment_type', 'experience_required', 'description', 'key_skills', 'raw_data',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('vacancies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hh_vacancy_id', sa.String(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('company_name', sa.String(), nullable=True),
+    sa.Column('salary_from', sa.Integer(), nullable=True),
+    sa.Column('salary_to', sa.Integer(), nullable=True),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('area_name', sa.String(), nullable=True),
+    sa.Column('employment_type', sa.String(), nullable=True),
+    sa.Column('experience_required', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('key_skills', sa.JSON(), nullable=True),
+    sa.Column('raw_data', sa.JSON(), nullable=True),
+    sa.Column('is_archived', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('hh_vacancy_id')
+    )
+    op.create_index(op.f('ix_vacancies_id'), 'vacancies', ['id'], unique=False)
+
+    # Backfill: one vacancy per hh_vacancy_id, taken from its latest recommendation
+    columns = ', '.join(VACANCY_COLUMNS)
+    op.execute(f"""
+        INSERT INTO vacancies (hh_vacancy_id, {columns}, is_archived, updated_at)
+        SELECT DISTINCT ON (hh_vacancy_id) hh_vacancy_id, {columns}, false, now()
+        FROM job_recommendations
+        ORDER BY hh_vacancy_id, COALESCE(updated_at, created_at) DESC NULLS LAST, id DESC
+    """)
+
+    op.add_column('job_recommendations', sa.Column('vacancy_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE job_recommendations AS r
+        SET vacancy_id = v.id
+        FROM vacancies AS v
+        WHERE v.hh_vacancy_id = r.hh_vacancy_id
+    """)
+    op.alter_column('job_recommendations', 'vacancy_id', existing_type=sa.Integer(), nullable=False)
+    op.create_foreign_key('job_recommendations_vacancy_id_fkey', 'job_recommendations', 'vacancies', ['vacancy_id'], ['id'])
+    op.create_index(op.f('ix_job_recommendations_vacancy_id'), 'job_recommendations', ['vacancy_id'], unique=False)
+
+    for column in VACANCY_COLUMNS:
+        op.drop_column('job_recommendations', column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('job_recommendations', sa.Column('title', sa.String(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('company_name', sa.String(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('salary_from', sa.Integer(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('salary_to', sa.Integer(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('currency', sa.String(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('area_name', sa.String(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('employment_type', sa.String(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('experience_required', sa.String(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('description', sa.Text(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('key_skills', sa.JSON(), nullable=True))
+    op.add_column('job_recommendations', sa.Column('raw_data', sa.JSON(), nullable=True))
+
+    assignments = ', '.join(f'{column} = v.{column}' for column in VACANCY_COLUMNS)
+    op.execute(f"""
+        UPDATE job_recommendations AS r
+        SET {assignments}
+        FROM vacancies AS v
+        WHERE v.id = r.vacancy_id
+    """)
+    op.alter_column('job_recommendations', 'title', existing_type=sa.String(), nullable=False)
+
+    op.drop_index(op.f('ix_job_recommendations_vacancy_id'), table_name='job_recommendations')
+    op.drop_constraint('job_recommendations_vacancy_id_fkey', 'job_recommendations', type_='foreignkey')
+    op.drop_column('job_recommendations', 'vacancy_id')
+    op.drop_index(op.f('ix_vacancies_id'), table_name='vacancies')
+    op.drop_table('vacancies')
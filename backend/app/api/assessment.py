@@ -20,6 +20,7 @@ from ..schemas.assessment import (
     AssessmentWeakness
 )
 from ..auth.jwt import get_current_user
+from ..services.recommendation_invalidation import enqueue_recommendation_refresh, mark_recommendations_stale
 
 router = APIRouter(prefix="/api/assessment", tags=["assessment"])
 
@@ -434,7 +435,9 @@ async def submit_assessment(
     )
     
     db.add(assessment_result)
+    await mark_recommendations_stale(db, current_user.id, "assessment_result")  # type: ignore
     await db.commit()
+    await enqueue_recommendation_refresh(current_user.id)  # type: ignore
     await db.refresh(assessment_result)
     
     # Generate and store profile summary based on assessment
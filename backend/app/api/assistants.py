@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, func
 from sqlalchemy.orm import selectinload
-from typing import Optional, List
+from typing import Optional, List, AsyncIterator
+from contextlib import aclosing
+import json
 import time
 import uuid
 import logging
+import anyio
 from openai import AsyncAzureOpenAI
 
-from ..database import get_db
+from ..database import get_db, get_session_factory
 from ..models.user import User
 from ..models.assistant import Assistant
 from ..models.chat import ChatHistory, Message, MessageRole
@@ -18,10 +23,13 @@ from ..schemas.assistant import (
 )
 from ..schemas.chat import (
     SendMessageRequest, SendMessageResponse, ChatHistoryResponse,
-    ConversationMessage, SenderInfo
+    ConversationMessage, SenderInfo, ChatHistorySummary, ChatHistoryListResponse,
+    ChatMessagesResponse
 )
-from ..auth.jwt import get_current_user
+from ..auth.jwt import get_current_user, get_debug_user
 from ..config import settings
+from ..services.chat_context import build_context, needs_summary, refresh_chat_summary, summary_prompt
+from ..services.response_cache import get_response_cache, is_cacheable
 
 router = APIRouter(prefix="/api/main/assistants", tags=["assistants"])
 logger = logging.getLogger(__name__)
@@ -70,19 +78,28 @@ async def get_assistants(
         total=len(assistant_items)
     )
 
+@router.get("/debug/response-cache-stats")
+async def debug_response_cache_stats(
+    current_user: User = Depends(get_debug_user)
+):
+    """Счетчики кэша ответов ассистента в этом процессе"""
+    return get_response_cache().stats()
+
 @router.get("/{assistant_id}", response_model=AssistantWithChatHistory)
 async def get_assistant(
     assistant_id: int,
+    include_messages: bool = Query(True, description="Включать сообщения чатов; без них используйте /chats и /chats/{chat_id}/messages"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить ассистента с историей чатов"""
+    chats_loader = selectinload(Assistant.chat_histories)
+    if include_messages:
+        chats_loader = chats_loader.selectinload(ChatHistory.messages)
+    
     result = await db.execute(
         select(Assistant)
-        .options(
-            selectinload(Assistant.chat_histories)
-            .selectinload(ChatHistory.messages)
-        )
+        .options(chats_loader)
         .where(Assistant.id == assistant_id)
         .where(Assistant.user_id == current_user.id)
     )
@@ -98,26 +115,10 @@ async def get_assistant(
     chat_history = []
     for chat in assistant.chat_histories:
         if chat.enable:
-            # Преобразуем сообщения
-            conversation = []
-            for message in chat.messages:
-                conversation.append(ConversationMessage(
-                    id=str(message.id),
-                    sender=SenderInfo(
-                        id=message.sender_id,
-                        name=message.sender_name,
-                        avatarImageUrl=message.avatar_image_url
-                    ),
-                    content=message.content,
-                    timestamp=message.timestamp,
-                    isMyMessage=message.is_my_message,
-                    fresh=message.fresh
-                ))
-            
             chat_history.append(ChatHistoryResponse(
                 id=str(chat.id),
                 title=chat.title,
-                conversation=conversation,
+                conversation=[_conversation_message(message) for message in chat.messages] if include_messages else None,
                 lastConversation=chat.last_conversation or "",
                 createdTime=chat.created_time,
                 updatedTime=chat.updated_time,
@@ -129,10 +130,291 @@ async def get_assistant(
     
     return response
 
+def _conversation_message(message: Message) -> ConversationMessage:
+    return ConversationMessage(
+        id=str(message.id),
+        sender=SenderInfo(
+            id=message.sender_id,
+            name=message.sender_name,
+            avatarImageUrl=message.avatar_image_url
+        ),
+        content=message.content,
+        timestamp=message.timestamp,
+        isMyMessage=message.is_my_message,
+        fresh=message.fresh
+    )
+
+async def _ensure_assistant(db: AsyncSession, assistant_id: int, current_user: User) -> None:
+    result = await db.execute(
+        select(Assistant.id)
+        .where(Assistant.id == assistant_id)
+        .where(Assistant.user_id == current_user.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assistant not found"
+        )
+
+@router.get("/{assistant_id}/chats", response_model=ChatHistoryListResponse)
+async def get_assistant_chats(
+    assistant_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Список чатов ассистента без сообщений: последнее сообщение и количество сообщений"""
+    await _ensure_assistant(db, assistant_id, current_user)
+    
+    # Количество считается по индексу (chat_history_id, id), сами сообщения не загружаются
+    message_count = (
+        select(func.count(Message.id))
+        .where(Message.chat_history_id == ChatHistory.id)
+        .correlate(ChatHistory)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(ChatHistory, message_count)
+        .where(ChatHistory.assistant_id == assistant_id)
+        .where(ChatHistory.user_id == current_user.id)
+        .where(ChatHistory.enable == True)
+        .order_by(desc(ChatHistory.updated_time), desc(ChatHistory.id))
+    )
+    
+    chats = [
+        ChatHistorySummary(
+            id=str(chat.id),
+            title=chat.title,
+            lastConversation=chat.last_conversation or "",
+            messageCount=count,
+            createdTime=chat.created_time,
+            updatedTime=chat.updated_time,
+            enable=chat.enable
+        )
+        for chat, count in result.all()
+    ]
+    return ChatHistoryListResponse(data=chats, total=len(chats))
+
+@router.get("/{assistant_id}/chats/{chat_id}/messages", response_model=ChatMessagesResponse)
+async def get_chat_messages(
+    assistant_id: int,
+    chat_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = Query(None, description="Более старые сообщения, чем это (прокрутка вверх)"),
+    after_id: Optional[int] = Query(None, description="Сообщения новее этого (синхронизация)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Страница сообщений чата по id (keyset). Без параметров - последние сообщения,
+    before_id - предыдущая страница, after_id - все новые сообщения после известного.
+    """
+    if before_id is not None and after_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either before_id or after_id"
+        )
+    
+    chat_result = await db.execute(
+        select(ChatHistory.id)
+        .where(ChatHistory.id == chat_id)
+        .where(ChatHistory.assistant_id == assistant_id)
+        .where(ChatHistory.user_id == current_user.id)
+        .where(ChatHistory.enable == True)
+    )
+    if chat_result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat not found"
+        )
+    
+    query = select(Message).where(Message.chat_history_id == chat_id)
+    if after_id is not None:
+        query = query.where(Message.id > after_id).order_by(Message.id)
+    else:
+        if before_id is not None:
+            query = query.where(Message.id < before_id)
+        query = query.order_by(desc(Message.id))
+    
+    # Лишняя строка показывает, есть ли следующая страница
+    result = await db.execute(query.limit(limit + 1))
+    messages = list(result.scalars().all())
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if after_id is None:
+        messages.reverse()  # В хронологическом порядке
+    
+    return ChatMessagesResponse(
+        data=[_conversation_message(message) for message in messages],
+        hasMore=has_more
+    )
+
+async def _prepare_chat(
+    db: AsyncSession,
+    assistant_id: int,
+    request: SendMessageRequest,
+    current_user: User
+) -> tuple[ChatHistory, list[Message]]:
+    """Находит (или создает) ассистента и чат, добавляет сообщение пользователя и загружает последние сообщения"""
+    
+    # Check if assistant exists and belongs to user
+    result = await db.execute(
+        select(Assistant)
+        .where(Assistant.id == assistant_id)
+        .where(Assistant.user_id == current_user.id)
+    )
+    assistant = result.scalar_one_or_none()
+    
+    # If no assistant found, create a default one for this user
+    if not assistant:
+        logger.info(f"Creating default assistant for user {current_user.id}")
+        assistant = Assistant(
+            user_id=current_user.id,
+            name="AI Помощник по поиску работы",
+            description="Ваш персональный AI-ассистент для поиска работы и карьерного консультирования",
+            model="gpt-4o",
+            system_prompt="Ты - профессиональный консультант по карьере и поиску работы. Помогай пользователям находить подходящие вакансии, составлять резюме и готовиться к собеседованиям. Будь вежливым и профессиональным. Если пользователь прислал изображение, то используй его для анализа и ответа. Помоги пользователю стать увереннее в себе и мягко отвечай на вопросы, морально поддерживай как друга.",
+            temperature="0.5",
+            max_tokens=4096,
+            is_active=True
+        )
+        db.add(assistant)
+        await db.commit()
+        await db.refresh(assistant)
+    
+    # Находим или создаем историю чата
+    participant_id = request.participant
+    chat_history = None
+    
+    if participant_id and participant_id != "":
+        # Проверяем, является ли participant_id числом (существующий чат)
+        try:
+            chat_id = int(participant_id)
+            # Ищем существующий чат по ID
+            chat_result = await db.execute(
+                select(ChatHistory)
+                .where(ChatHistory.id == chat_id)
+                .where(ChatHistory.user_id == current_user.id)
+                .where(ChatHistory.assistant_id == assistant.id)
+            )
+            chat_history = chat_result.scalar_one_or_none()
+        except ValueError:
+            # participant_id не является числом - это новый чат с UUID
+            # Не ищем существующий чат, создадим новый
+            chat_history = None
+    
+    if not chat_history:
+        # Создаем новый чат
+        current_time = int(time.time())
+        chat_history = ChatHistory(
+            assistant_id=assistant.id,
+            user_id=current_user.id,
+            title=request.message[:50] + "..." if len(request.message) > 50 else request.message,
+            last_conversation=request.message,
+            created_time=current_time,
+            updated_time=current_time,
+            enable=True
+        )
+        db.add(chat_history)
+        await db.flush()  # Получаем ID
+    else:
+        # Для списка чатов (/chats): последнее сообщение и время обновления
+        chat_history.last_conversation = request.message
+        chat_history.updated_time = int(time.time())
+    
+    # Загружаем историю сообщений ПЕРЕД вызовом AI API (только то, что еще не вошло в summary чата)
+    messages_result = await db.execute(
+        select(Message)
+        .where(Message.chat_history_id == chat_history.id)
+        .where(Message.id > (chat_history.summary_until_message_id or 0))
+        .order_by(Message.id.desc())
+        .limit(settings.chat_context_max_messages)
+    )
+    recent_messages = messages_result.scalars().all()
+    
+    # Сохраняем сообщение пользователя
+    user_message = Message(
+        chat_history_id=chat_history.id,
+        content=request.message,
+        role=MessageRole.USER,
+        sender_id="user",
+        sender_name=current_user.username,
+        is_my_message=True,
+        fresh=False
+    )
+    db.add(user_message)
+    
+    return chat_history, list(reversed(recent_messages))  # В хронологическом порядке
+
+def _summary_refresh(session_factory, chat_history_id: int, request: SendMessageRequest, recent_messages: list) -> tuple | None:
+    """Аргументы фоновой задачи обновления summary чата, если история перестает помещаться в бюджет"""
+    system_prompt = get_system_prompt(detect_language(request.message))
+    if not needs_summary(system_prompt, recent_messages, [request.message]):
+        return None
+    return (refresh_chat_summary, session_factory, chat_history_id, system_prompt, summarize_conversation)
+
+@router.post("/{assistant_id}/chat/stream")
+async def stream_message_to_assistant(
+    assistant_id: int,
+    request: SendMessageRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Отправить сообщение ассистенту и получать ответ частями (Server-Sent Events)"""
+    
+    logger.info(f"🔥 Streaming chat request received: assistant_id={assistant_id}, user={current_user.username}")
+    
+    chat_history, recent_messages = await _prepare_chat(db, assistant_id, request, current_user)
+    
+    # Сообщение пользователя сохраняем до начала генерации; ответ пишется в отдельной сессии
+    chat_history_id = chat_history.id
+    summary = chat_history.summary
+    session_factory = get_session_factory(db.bind)
+    await db.commit()
+    await db.close()
+    
+    summary_task = _summary_refresh(session_factory, chat_history_id, request, recent_messages)
+    
+    return StreamingResponse(
+        _chat_event_stream(session_factory, chat_history_id, request, recent_messages, summary),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Не буферизовать в nginx
+        },
+        background=BackgroundTask(*summary_task) if summary_task else None
+    )
+
+def _ai_message(chat_history_id: int, content: str) -> Message:
+    """Сообщение ассистента для сохранения в чате"""
+    return Message(
+        chat_history_id=chat_history_id,
+        content=content,
+        role=MessageRole.AI,
+        sender_id="ai",
+        sender_name="BOT",
+        avatar_image_url="/img/thumbs/ai.jpg",
+        is_my_message=False,
+        fresh=True
+    )
+
+async def _save_ai_reply(session_factory, chat_history_id: int, content: str) -> Optional[int]:
+    """Сохраняет ответ ассистента в новой короткой сессии; возвращает id сообщения или None при ошибке"""
+    try:
+        async with session_factory() as db:
+            ai_message = _ai_message(chat_history_id, content)
+            db.add(ai_message)
+            await db.commit()
+            logger.info(f"💾 Successfully saved message to database")
+            return ai_message.id
+    except Exception as e:
+        logger.error(f"❌ Database error: {str(e)}")
+        return None
+
 @router.post("/{assistant_id}/chat", response_model=SendMessageResponse)
 async def send_message_to_assistant(
     assistant_id: int,
     request: SendMessageRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -146,118 +428,32 @@ async def send_message_to_assistant(
         logger.info("📸 No images in request")
     
     try:
-        # Check if assistant exists and belongs to user
-        result = await db.execute(
-            select(Assistant)
-            .where(Assistant.id == assistant_id)
-            .where(Assistant.user_id == current_user.id)
-        )
-        assistant = result.scalar_one_or_none()
-        
-        # If no assistant found, create a default one for this user
-        if not assistant:
-            logger.info(f"Creating default assistant for user {current_user.id}")
-            assistant = Assistant(
-                user_id=current_user.id,
-                name="AI Помощник по поиску работы",
-                description="Ваш персональный AI-ассистент для поиска работы и карьерного консультирования",
-                model="gpt-4o",
-                system_prompt="Ты - профессиональный консультант по карьере и поиску работы. Помогай пользователям находить подходящие вакансии, составлять резюме и готовиться к собеседованиям. Будь вежливым и профессиональным. Если пользователь прислал изображение, то используй его для анализа и ответа. Помоги пользователю стать увереннее в себе и мягко отвечай на вопросы, морально поддерживай как друга.",
-                temperature="0.5",
-                max_tokens=4096,
-                is_active=True
-            )
-            db.add(assistant)
-            await db.commit()
-            await db.refresh(assistant)
-    
-        # Находим или создаем историю чата
-        participant_id = request.participant
-        chat_history = None
+        # 1. Сохраняем сообщение пользователя и запоминаем историю
+        chat_history, recent_messages = await _prepare_chat(db, assistant_id, request, current_user)
+        chat_history_id = chat_history.id
+        summary = chat_history.summary
+        session_factory = get_session_factory(db.bind)
+        await db.commit()
         
-        if participant_id and participant_id != "":
-            # Проверяем, является ли participant_id числом (существующий чат)
-            try:
-                chat_id = int(participant_id)
-                # Ищем существующий чат по ID
-                chat_result = await db.execute(
-                    select(ChatHistory)
-                    .where(ChatHistory.id == chat_id)
-                    .where(ChatHistory.user_id == current_user.id)
-                    .where(ChatHistory.assistant_id == assistant.id)
-                    .options(selectinload(ChatHistory.messages))
-                )
-                chat_history = chat_result.scalar_one_or_none()
-            except ValueError:
-                # participant_id не является числом - это новый чат с UUID
-                # Не ищем существующий чат, создадим новый
-                chat_history = None
-        
-        if not chat_history:
-            # Создаем новый чат
-            current_time = int(time.time())
-            chat_history = ChatHistory(
-                assistant_id=assistant.id,
-                user_id=current_user.id,
-                title=request.message[:50] + "..." if len(request.message) > 50 else request.message,
-                last_conversation=request.message,
-                created_time=current_time,
-                updated_time=current_time,
-                enable=True
-            )
-            db.add(chat_history)
-            await db.flush()  # Получаем ID
-        
-        # Сохраняем сообщение пользователя
-        user_message = Message(
-            chat_history_id=chat_history.id,
-            content=request.message,
-            role=MessageRole.USER,
-            sender_id="user",
-            sender_name=current_user.username,
-            is_my_message=True,
-            fresh=False
-        )
-        db.add(user_message)
-        
-        # Загружаем историю сообщений ПЕРЕД вызовом AI API
-        messages_result = await db.execute(
-            select(Message)
-            .where(Message.chat_history_id == chat_history.id)
-            .order_by(Message.id.desc())
-            .limit(10)
-        )
-        recent_messages = messages_result.scalars().all()
+        # 2. Освобождаем сессию: соединение с БД не должно ждать ответа модели
+        await db.close()
         
         # Генерируем ответ ассистента (передаем список сообщений, НЕ chat_history)
         ai_response_content = await generate_ai_response(
             user_message=request.message,
-            recent_messages=list(reversed(recent_messages)),  # Переворачиваем для правильной очередности
-            images=request.images  # Передаем изображения
+            recent_messages=recent_messages,
+            images=request.images,  # Передаем изображения
+            summary=summary
         )
         
-        # Сохраняем ответ ассистента
-        ai_message = Message(
-            chat_history_id=chat_history.id,
-            content=ai_response_content,
-            role=MessageRole.AI,
-            sender_id="ai",
-            sender_name="BOT",
-            avatar_image_url="/img/thumbs/ai.jpg",
-            is_my_message=False,
-            fresh=True
-        )
-        db.add(ai_message)
+        # 3. Сохраняем ответ ассистента в отдельной короткой транзакции
+        # (даже если не получится, все равно возвращаем ответ)
+        await _save_ai_reply(session_factory, chat_history_id, ai_response_content)
         
-        # Сохраняем все изменения
-        try:
-            await db.commit()
-            logger.info(f"💾 Successfully saved message to database")
-        except Exception as e:
-            logger.error(f"❌ Database error: {str(e)}")
-            await db.rollback()
-            # Все равно возвращаем ответ, даже если не смогли сохранить в БД
-            pass
+        # Старые сообщения, которые перестают помещаться в контекст, сворачиваем в summary после ответа
+        summary_task = _summary_refresh(session_factory, chat_history_id, request, recent_messages)
+        if summary_task:
+            background_tasks.add_task(*summary_task)
         
         # Возвращаем ответ в формате, совместимом с фронтендом
         response = SendMessageResponse(
@@ -276,10 +472,67 @@ async def send_message_to_assistant(
             replies=[f"Извините, произошла ошибка при обработке вашего сообщения. Попробуйте еще раз. (Ошибка: {str(e)})"]
         )
 
+def build_chat_messages(
+    user_message: str,
+    recent_messages: list | None = None,
+    images: list[str] | None = None,
+    language: str = "russian",
+    summary: str | None = None
+) -> list[dict]:
+    """Собирает контекст разговора для Azure OpenAI в пределах бюджета токенов (см. chat_context)"""
+    
+    if images and len(images) > 0:
+        # Сообщение с изображениями - используем строку как fallback для совместимости
+        content_text = f"{user_message}\n\n[Изображение прикреплено]"
+        logger.info(f"📸 Received {len(images)} images for analysis")
+    else:
+        # Обычное текстовое сообщение
+        content_text = user_message
+    
+    # Системный промпт, summary старой части чата, последние сообщения и текущее сообщение
+    return build_context(get_system_prompt(language), recent_messages or [], content_text, summary)
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _chat_event_stream(
+    session_factory,
+    chat_history_id: int,
+    request: SendMessageRequest,
+    recent_messages: list,
+    summary: str | None = None
+) -> AsyncIterator[str]:
+    """
+    События SSE для потокового чата: start (id чата), delta (часть ответа), done (id сохраненного
+    сообщения) или error. Ответ сохраняется только после полного получения.
+    """
+    
+    yield _sse_event("start", {"chatId": str(chat_history_id)})
+    
+    parts = []
+    try:
+        async with aclosing(stream_ai_response(request.message, recent_messages, request.images, summary)) as replies:
+            async for delta in replies:
+                parts.append(delta)
+                yield _sse_event("delta", {"content": delta})
+    except Exception as e:
+        logger.error(f"❌ Error while streaming chat {chat_history_id}: {str(e)}")
+        yield _sse_event("error", {"detail": "Не удалось получить ответ ассистента. Попробуйте еще раз."})
+        return
+    
+    content = "".join(parts).strip()
+    
+    # Ответ получен целиком: сохраняем его, даже если клиент отключится во время записи
+    with anyio.CancelScope(shield=True):
+        message_id = await _save_ai_reply(session_factory, chat_history_id, content)
+    
+    yield _sse_event("done", {"messageId": str(message_id) if message_id is not None else None})
+
 async def generate_ai_response(
     user_message: str, 
     recent_messages: list | None = None,
-    images: list[str] | None = None
+    images: list[str] | None = None,
+    summary: str | None = None
 ) -> str:
     """Генерирует ответ ассистента используя Azure OpenAI API"""
     
@@ -291,49 +544,19 @@ async def generate_ai_response(
         logger.warning("Azure OpenAI API not configured, using mock responses")
         return generate_mock_ai_response(user_message, images, user_language)
     
+    # Типовые первые вопросы отвечаем из кэша, без вызова модели
+    cacheable = is_cacheable(user_message, recent_messages, summary, images)
+    if cacheable:
+        cached_reply = get_response_cache().lookup(user_language, get_system_prompt(user_language), user_message)
+        if cached_reply is not None:
+            logger.info("⚡ Reply served from the response cache")
+            return cached_reply
+    
     logger.info(f"🤖 Calling Azure OpenAI API for message: {user_message[:50]}... (Language: {user_language})")
     
     try:
         # Подготавливаем контекст разговора
-        messages = []
-        
-        # Добавляем системный промпт ассистента на соответствующем языке
-        system_prompt = get_system_prompt(user_language)
-        messages.append({
-            "role": "system",
-            "content": system_prompt
-        })
-        
-        # Добавляем историю последних сообщений
-        if recent_messages:
-            for msg in recent_messages:
-                if msg.role == MessageRole.USER:
-                    messages.append({
-                        "role": "user",
-                        "content": msg.content
-                    })
-                elif msg.role == MessageRole.AI:
-                    messages.append({
-                        "role": "assistant", 
-                        "content": msg.content
-                    })
-        
-        # Добавляем текущее сообщение пользователя
-        if images and len(images) > 0:
-            # Сообщение с изображениями - используем строку как fallback для совместимости
-            content_text = f"{user_message}\n\n[Изображение прикреплено]"
-            messages.append({
-                "role": "user", 
-                "content": content_text
-            })
-            
-            logger.info(f"📸 Received {len(images)} images for analysis")
-        else:
-            # Обычное текстовое сообщение
-            messages.append({
-                "role": "user",
-                "content": user_message
-            })
+        messages = build_chat_messages(user_message, recent_messages, images, user_language, summary)
         
         # Вызываем Azure OpenAI API
         response = await azure_openai_client.chat.completions.create(
@@ -352,6 +575,8 @@ async def generate_ai_response(
             return generate_mock_ai_response(user_message, images, user_language)
             
         logger.info(f"✅ Azure OpenAI API response received: {len(ai_response)} characters")
+        if cacheable:
+            get_response_cache().store(user_language, get_system_prompt(user_language), user_message, ai_response.strip())
         return ai_response.strip()
         
     except Exception as e:
@@ -360,6 +585,85 @@ async def generate_ai_response(
         # В случае ошибки возвращаем мок-ответ
         return generate_mock_ai_response(user_message, images, user_language)
 
+async def stream_ai_response(
+    user_message: str,
+    recent_messages: list | None = None,
+    images: list[str] | None = None,
+    summary: str | None = None
+) -> AsyncIterator[str]:
+    """Потоковый вариант generate_ai_response: отдает ответ частями по мере генерации"""
+    
+    user_language = detect_language(user_message)
+    
+    if not azure_openai_client or not settings.azure_openai_api_key:
+        logger.warning("Azure OpenAI API not configured, using mock responses")
+        yield generate_mock_ai_response(user_message, images, user_language)
+        return
+    
+    cacheable = is_cacheable(user_message, recent_messages, summary, images)
+    if cacheable:
+        cached_reply = get_response_cache().lookup(user_language, get_system_prompt(user_language), user_message)
+        if cached_reply is not None:
+            logger.info("⚡ Reply served from the response cache")
+            yield cached_reply
+            return
+    
+    logger.info(f"🤖 Streaming Azure OpenAI API response for message: {user_message[:50]}... (Language: {user_language})")
+    
+    try:
+        stream = await azure_openai_client.chat.completions.create(
+            model=settings.azure_openai_deployment_name,
+            messages=build_chat_messages(user_message, recent_messages, images, user_language, summary),
+            max_tokens=settings.azure_openai_max_tokens,
+            temperature=float(settings.azure_openai_temperature),
+            stream=True
+        )
+    except Exception as e:
+        # До первого токена ведем себя как generate_ai_response
+        logger.error(f"❌ Error calling Azure OpenAI API: {str(e)}")
+        logger.error(f"   Using mock response instead")
+        yield generate_mock_ai_response(user_message, images, user_language)
+        return
+    
+    parts = []
+    try:
+        async for chunk in stream:
+            # Azure присылает результаты контент-фильтра отдельными чанками без choices
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+        
+        # В кэш попадают только ответы, полученные целиком
+        reply = "".join(parts).strip()
+        if cacheable and reply:
+            get_response_cache().store(user_language, get_system_prompt(user_language), user_message, reply)
+    finally:
+        # Закрываем соединение с Azure и при отмене (клиент отключился), чтобы генерация прекратилась
+        with anyio.CancelScope(shield=True):
+            await stream.response.aclose()
+
+async def summarize_conversation(previous_summary: str | None, turns: list[dict]) -> str | None:
+    """Обновляет summary чата через Azure OpenAI; None, если модель недоступна (тогда summary строится без нее)"""
+    
+    if not azure_openai_client or not settings.azure_openai_api_key:
+        return None
+    
+    try:
+        response = await azure_openai_client.chat.completions.create(
+            model=settings.azure_openai_deployment_name,
+            messages=summary_prompt(previous_summary, turns),
+            max_tokens=settings.chat_summary_max_tokens,
+            temperature=0.2,
+            stream=False
+        )
+        return response.choices[0].message.content
+    except Exception as e:
+        logger.error(f"❌ Error summarizing chat with Azure OpenAI API: {str(e)}")
+        return None
+
 def detect_language(text: str) -> str:
     """Определяет язык текста (русский, казахский, английский)"""
     text_lower = text.lower()
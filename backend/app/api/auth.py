@@ -8,6 +8,7 @@ from ..database import get_db
 from ..schemas.user import UserCreate, UserResponse, TokenResponse
 from ..auth.jwt import create_access_token, create_refresh_token, verify_token
 from ..auth.security import authenticate_user, get_password_hash, get_user_by_email, get_user_by_username
+from ..auth.user_cache import get_user_cache
 from ..models.user import User
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -55,6 +56,9 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # A fresh login replaces whatever identity snapshot was cached for this user
+    await get_user_cache().set(user)
+    
     access_token = await create_access_token(data={"sub": user.username})
     refresh_token = await create_refresh_token(data={"sub": user.username})
     
@@ -94,6 +98,8 @@ async def refresh_token(refresh_token: str = Body(..., embed=True), db: AsyncSes
         logger.error(f"Database error retrieving user: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database query failed")
         
+    await get_user_cache().set(user)
+    
     access_token = await create_access_token(data={"sub": username})
     new_refresh_token = await create_refresh_token(data={"sub": username})
     
@@ -1,21 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc, func
+from sqlalchemy import desc, func
 from typing import List, Optional, Dict, Any
 import logging
 from datetime import datetime, timedelta
 
 from ..database import get_db
 from ..models.user import User
-from ..models.job import JobRecommendation
 from ..schemas.job import (
     DualRecommendationResponse, 
     DualRecommendationBlock,
     EnhancedJobRecommendationResponse,
     JobRecommendationResponse
 )
-from ..auth.jwt import get_current_user
+from ..auth.jwt import get_current_user, get_debug_user
 from ..services.enhanced_headhunter_service import EnhancedHeadHunterService, EnhancedRecommendation
+from ..services.recommendation_store import upsert_recommendations
+from ..services.search_cache import get_search_cache
+from ..services.vacancy_cache import get_vacancy_cache
 
 router = APIRouter(prefix="/api/enhanced-jobs", tags=["enhanced-jobs"])
 logger = logging.getLogger(__name__)
@@ -117,42 +119,24 @@ async def get_vacancy_details(
     """
     
     try:
-        import httpx
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.hh.kz/vacancies/{vacancy_id}",
-                headers={
-                    "User-Agent": "AI-Komekshi Job Platform Parser",
-                    "Accept": "application/json"
-                },
-                timeout=30.0
+        vacancy_data = await enhanced_hh_service.detail_fetcher.fetch_one(vacancy_id)
+        
+        if vacancy_data is not None:
+            # Add additional processing here if needed
+            # e.g., track that user viewed this vacancy
+            
+            return {
+                "success": True,
+                "vacancy": vacancy_data,
+                "alternate_url": vacancy_data.get("alternate_url"),  # Link to hh.ru
+                "has_contacts": "contacts" in vacancy_data and vacancy_data["contacts"]
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Failed to fetch vacancy details from HeadHunter"
             )
             
-            if response.status_code == 200:
-                vacancy_data = response.json()
-                
-                # Add additional processing here if needed
-                # e.g., track that user viewed this vacancy
-                
-                return {
-                    "success": True,
-                    "vacancy": vacancy_data,
-                    "alternate_url": vacancy_data.get("alternate_url"),  # Link to hh.ru
-                    "has_contacts": "contacts" in vacancy_data and vacancy_data["contacts"]
-                }
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail="Failed to fetch vacancy details from HeadHunter"
-                )
-                
-    except httpx.RequestError as e:
-        logger.error(f"Network error fetching vacancy {vacancy_id}: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Network error while fetching vacancy details"
-        )
     except Exception as e:
         logger.error(f"Error fetching vacancy {vacancy_id}: {e}")
         raise HTTPException(
@@ -266,7 +250,7 @@ async def get_task_status(
 async def debug_search_test(
     disable_filters: bool = Query(False, description="Disable filters for testing"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_debug_user)
 ):
     """
     Debug endpoint to test search parameters and HH API calls
@@ -324,6 +308,19 @@ async def debug_search_test(
             "hh_api_results": None
         }
 
+@router.get("/debug/cache-stats")
+async def debug_cache_stats(
+    current_user: User = Depends(get_debug_user)
+):
+    """
+    Debug endpoint exposing HH vacancy and search cache counters for this process
+    """
+    
+    return {
+        "vacancy_cache": get_vacancy_cache().stats(),
+        "search_cache": get_search_cache().stats()
+    }
+
 # Helper functions
 
 async def _convert_to_job_response(
@@ -436,50 +433,40 @@ async def _store_recommendations_batch(
     try:
         all_recommendations = dual_recommendations["personal"] + dual_recommendations["assessment"]
         
+        rows = []
         for enhanced_rec in all_recommendations:
-            # Check if already exists
-            existing = await db.execute(
-                select(JobRecommendation).where(
-                    and_(
-                        JobRecommendation.user_id == current_user.id,
-                        JobRecommendation.hh_vacancy_id == enhanced_rec.hh_vacancy_id
-                    )
-                )
-            )
+            vacancy = enhanced_rec.vacancy
+            scores = enhanced_rec.scores
+            
+            salary_info = vacancy.get("salary", {}) or {}
+            area_info = vacancy.get("area", {}) or {}
+            employer_info = vacancy.get("employer", {}) or {}
+            employment_info = vacancy.get("employment", {}) or {}
+            experience_info = vacancy.get("experience", {}) or {}
             
-            if not existing.scalar_one_or_none():
-                # Create new recommendation
-                vacancy = enhanced_rec.vacancy
-                scores = enhanced_rec.scores
-                
-                salary_info = vacancy.get("salary", {}) or {}
-                area_info = vacancy.get("area", {}) or {}
-                employer_info = vacancy.get("employer", {}) or {}
-                employment_info = vacancy.get("employment", {}) or {}
-                experience_info = vacancy.get("experience", {}) or {}
-                
-                recommendation = JobRecommendation(
-                    user_id=current_user.id,
-                    hh_vacancy_id=vacancy["id"],
-                    title=vacancy.get("name", ""),
-                    company_name=employer_info.get("name"),
-                    salary_from=salary_info.get("from"),
-                    salary_to=salary_info.get("to"),
-                    currency=salary_info.get("currency", "KZT"),
-                    area_name=area_info.get("name"),
-                    employment_type=employment_info.get("name"),
-                    experience_required=experience_info.get("name"),
-                    description=_extract_description(vacancy),
-                    key_skills=_extract_skills(vacancy),
-                    relevance_score=scores.get("relevance_score", 0.0),
-                    skills_match_score=scores.get("skills_match_score", 0.0),
-                    location_match_score=scores.get("location_match_score", 0.0),
-                    salary_match_score=scores.get("salary_match_score", 0.0),
-                    raw_data=vacancy,
-                    is_active=True
-                )
-                
-                db.add(recommendation)
+            rows.append(dict(
+                user_id=current_user.id,
+                hh_vacancy_id=vacancy["id"],
+                title=vacancy.get("name", ""),
+                company_name=employer_info.get("name"),
+                salary_from=salary_info.get("from"),
+                salary_to=salary_info.get("to"),
+                currency=salary_info.get("currency", "KZT"),
+                area_name=area_info.get("name"),
+                employment_type=employment_info.get("name"),
+                experience_required=experience_info.get("name"),
+                description=_extract_description(vacancy),
+                key_skills=_extract_skills(vacancy),
+                relevance_score=scores.get("relevance_score", 0.0),
+                skills_match_score=scores.get("skills_match_score", 0.0),
+                location_match_score=scores.get("location_match_score", 0.0),
+                salary_match_score=scores.get("salary_match_score", 0.0),
+                raw_data=vacancy,
+                is_active=True
+            ))
+        
+        # Existing recommendations are kept as they are; only new vacancies are inserted
+        await upsert_recommendations(db, rows, update_existing=False)
         
         await db.commit()
         logger.info(f"Stored {len(all_recommendations)} recommendations for user {current_user.id}")
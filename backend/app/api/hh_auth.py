@@ -7,6 +7,8 @@ import httpx
 import logging
 from typing import Optional
 
+from ..services.hh_client import get_hh_client
+
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/auth/hh", tags=["headhunter-auth"])
 
@@ -107,30 +109,25 @@ async def search_vacancies_open(
         if text:
             params["text"] = text
             
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.hh.kz/vacancies",
-                params=params,
-                headers={"User-Agent": "AI-Komekshi Job Platform Parser"},
-                timeout=30.0
+        client = get_hh_client()
+        response = await client.get("/vacancies", params=params)
+        
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "success": True,
+                "total_found": data.get("found", 0),
+                "total_pages": data.get("pages", 0),
+                "current_page": data.get("page", 0),
+                "per_page": data.get("per_page", 0),
+                "vacancies": data.get("items", [])
+            }
+        else:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"HeadHunter API error: {response.status_code}"
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "total_found": data.get("found", 0),
-                    "total_pages": data.get("pages", 0),
-                    "current_page": data.get("page", 0),
-                    "per_page": data.get("per_page", 0),
-                    "vacancies": data.get("items", [])
-                }
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"HeadHunter API error: {response.status_code}"
-                )
-                
     except httpx.RequestError as e:
         logger.error(f"Network error: {str(e)}")
         raise HTTPException(status_code=500, detail="Ошибка соединения с HeadHunter API")
@@ -144,25 +141,21 @@ async def get_areas():
     Get HeadHunter areas (regions/cities) for Kazakhstan
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.hh.kz/areas/40",  # Kazakhstan
-                headers={"User-Agent": "AI-Komekshi Job Platform Parser"},
-                timeout=30.0
+        client = get_hh_client()
+        response = await client.get("/areas/40")  # Kazakhstan
+        
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "success": True,
+                "areas": data.get("areas", [])
+            }
+        else:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"HeadHunter API error: {response.status_code}"
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "areas": data.get("areas", [])
-                }
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"HeadHunter API error: {response.status_code}"
-                )
-                
     except httpx.RequestError as e:
         logger.error(f"Network error: {str(e)}")
         raise HTTPException(status_code=500, detail="Ошибка соединения с HeadHunter API")
@@ -176,25 +169,21 @@ async def get_specializations():
     Get HeadHunter specializations for job filtering
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.hh.kz/specializations",
-                headers={"User-Agent": "AI-Komekshi Job Platform Parser"},
-                timeout=30.0
+        client = get_hh_client()
+        response = await client.get("/specializations")
+        
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "success": True,
+                "specializations": data
+            }
+        else:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"HeadHunter API error: {response.status_code}"
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "specializations": data
-                }
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"HeadHunter API error: {response.status_code}"
-                )
-                
     except httpx.RequestError as e:
         logger.error(f"Network error: {str(e)}")
         raise HTTPException(status_code=500, detail="Ошибка соединения с HeadHunter API")
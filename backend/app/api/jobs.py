@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc, func, update
+from sqlalchemy import select, and_, desc, func, update, tuple_
 from typing import List, Optional
 import logging
 from datetime import datetime, timedelta
 
 from ..database import get_db
 from ..models.user import User
-from ..models.job import JobRecommendation, SavedJob, JobFeedback, UserJobPreferences
+from ..models.job import JobRecommendation, SavedJob, JobFeedback, UserJobPreferences, Vacancy
 from ..models.onboarding import OnboardingProfile
 from ..schemas.job import (
     JobRecommendationListResponse, JobRecommendationResponse,
@@ -16,27 +16,48 @@ from ..schemas.job import (
     UserJobPreferencesCreate, UserJobPreferencesUpdate, UserJobPreferencesResponse,
     PersonalizedJobSearchRequest, HHSearchRequest, JobAnalyticsResponse
 )
-from ..auth.jwt import get_current_user
+from ..auth.jwt import get_current_user, get_debug_user
 from ..services.headhunter_service import HeadHunterService
+from ..services.recommendation_invalidation import (
+    enqueue_recommendation_refresh,
+    load_recommendation_state,
+    mark_recommendations_refreshed,
+    mark_recommendations_stale,
+    needs_refresh,
+)
+from ..services.job_enrichment import (
+    enrich_recommendations,
+    load_recommendations_by_id,
+    recommendation_card_options,
+)
+from ..services.pagination import InvalidCursorError, decode_cursor, encode_cursor, get_count_cache
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 logger = logging.getLogger(__name__)
 
 hh_service = HeadHunterService()
 
+# Cursor kinds, so a cursor of one list is rejected by the other
+RECOMMENDATIONS_CURSOR = "recommendations"
+SAVED_JOBS_CURSOR = "saved_jobs"
+
 @router.get("/recommendations", response_model=JobRecommendationListResponse)
 async def get_job_recommendations(
-    page: int = Query(0, ge=0),
+    page: int = Query(0, ge=0, description="Offset paging; ignored when a cursor is given"),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    include_total: bool = Query(True, description="Include the (cached) total count"),
     refresh: bool = Query(False, description="Fetch fresh recommendations from HH API"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get personalized job recommendations for the current user"""
     
+    after = _decode_cursor(RECOMMENDATIONS_CURSOR, cursor)
+    
     try:
         # If refresh is requested or user has no recent recommendations, fetch new ones
-        if refresh or await _should_refresh_recommendations(current_user.id, db): # type: ignore
+        if refresh or (after is None and await _should_refresh_recommendations(current_user.id, db)): # type: ignore
             logger.info(f"Fetching fresh recommendations for user {current_user.id}")
             
             # Create default search request
@@ -45,64 +66,67 @@ async def get_job_recommendations(
                 per_page=per_page
             )
             
-            # Get fresh recommendations from HH API
-            recommendations = await hh_service.get_personalized_recommendations(
+            # Changes made while this refresh runs keep the user stale
+            state = await load_recommendation_state(db, current_user.id)  # type: ignore
+            seen_version = state.version if state else 0
+            
+            # Store fresh recommendations from HH API; the page itself is read back below,
+            # as the HH list is only part of the stored list and has no id tie-break
+            await hh_service.get_personalized_recommendations(
                 current_user, db, search_request
             )
+            await mark_recommendations_refreshed(db, current_user.id, seen_version=seen_version)  # type: ignore
+            get_count_cache().invalidate(current_user.id)  # type: ignore
         else:
-            # Get existing recommendations from database
             logger.info(f"Using cached recommendations for user {current_user.id}")
-            result = await db.execute(
-                select(JobRecommendation)
-                .where(JobRecommendation.user_id == current_user.id)
-                .where(JobRecommendation.is_active == True)
-                .order_by(desc(JobRecommendation.relevance_score))
-                .offset(page * per_page)
-                .limit(per_page)
-            )
-            recommendations = result.scalars().all()
         
-        # Get total count
-        count_result = await db.execute(
-            select(func.count(JobRecommendation.id))
+        # Get recommendations from database (card columns only) in cursor order, one row
+        # past the page to know whether another page follows
+        query = (
+            select(JobRecommendation)
+            .options(*recommendation_card_options())
             .where(JobRecommendation.user_id == current_user.id)
             .where(JobRecommendation.is_active == True)
+            .order_by(desc(JobRecommendation.relevance_score), desc(JobRecommendation.id))
+            .limit(per_page + 1)
         )
-        total = count_result.scalar() or 0
-        
-        # Enrich recommendations with user interaction data
-        enriched_recommendations = []
-        for rec in recommendations:
-            rec_response = JobRecommendationResponse.model_validate(rec)
-            
-            # Check if job is saved
-            saved_result = await db.execute(
-                select(SavedJob)
-                .where(SavedJob.user_id == current_user.id)
-                .where(SavedJob.job_recommendation_id == rec.id)
-                .where(SavedJob.is_archived == False)
+        if after is not None:
+            query = query.where(
+                tuple_(JobRecommendation.relevance_score, JobRecommendation.id) < tuple_(*after)
             )
-            rec_response.is_saved = saved_result.scalar_one_or_none() is not None
-            
-            # Check if user gave feedback
-            feedback_result = await db.execute(
-                select(JobFeedback)
-                .where(JobFeedback.user_id == current_user.id)
-                .where(JobFeedback.job_recommendation_id == rec.id)
+        else:
+            query = query.offset(page * per_page)
+        
+        result = await db.execute(query)
+        recommendations = result.scalars().all()
+        has_more = len(recommendations) > per_page
+        recommendations = recommendations[:per_page]
+        
+        next_cursor = None
+        if has_more and recommendations:
+            last = recommendations[-1]
+            next_cursor = encode_cursor(RECOMMENDATIONS_CURSOR, [last.relevance_score, last.id])
+        
+        # Total count, reused across pages for a short while
+        total = None
+        total_pages = None
+        if include_total:
+            total = await get_count_cache().get_or_count(
+                current_user.id, "recommendations", # type: ignore
+                lambda: _count_active_recommendations(db, current_user.id) # type: ignore
             )
-            feedback = feedback_result.scalar_one_or_none()
-            rec_response.user_feedback = feedback.is_relevant if feedback else None # type: ignore
-            
-            enriched_recommendations.append(rec_response)
+            total_pages = (total + per_page - 1) // per_page
         
-        total_pages = (total + per_page - 1) // per_page
+        # Enrich recommendations with user interaction data (one query each for saves and feedback)
+        enriched_recommendations = await enrich_recommendations(db, current_user.id, recommendations) # type: ignore
         
         return JobRecommendationListResponse(
             recommendations=enriched_recommendations,
             total=total,
             page=page,
             per_page=per_page,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor
         )
         
     except Exception as e:
@@ -112,6 +136,30 @@ async def get_job_recommendations(
             detail="Failed to get job recommendations"
         )
 
+@router.get("/recommendations/{recommendation_id}", response_model=JobRecommendationResponse)
+async def get_job_recommendation(
+    recommendation_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get one recommendation with the full vacancy description"""
+    
+    result = await db.execute(
+        select(JobRecommendation)
+        .where(JobRecommendation.id == recommendation_id)
+        .where(JobRecommendation.user_id == current_user.id)
+    )
+    recommendation = result.scalar_one_or_none()
+    
+    if not recommendation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job recommendation not found"
+        )
+    
+    responses = await enrich_recommendations(db, current_user.id, [recommendation]) # type: ignore
+    return responses[0]
+
 @router.post("/search", response_model=JobRecommendationListResponse)
 async def search_personalized_jobs(
     search_request: PersonalizedJobSearchRequest,
@@ -135,20 +183,12 @@ async def search_personalized_jobs(
                 db
             )
         
-        # Convert to response format
-        rec_responses = []
-        for rec in recommendations:
-            rec_response = JobRecommendationResponse.model_validate(rec)
-            
-            # Check if saved/feedback exists
-            saved_result = await db.execute(
-                select(SavedJob)
-                .where(SavedJob.user_id == current_user.id)
-                .where(SavedJob.job_recommendation_id == rec.id)
-            )
-            rec_response.is_saved = saved_result.scalar_one_or_none() is not None
-            
-            rec_responses.append(rec_response)
+        # Convert to response format; archived saves still count as saved here
+        rec_responses = await enrich_recommendations(
+            db, current_user.id, recommendations, # type: ignore
+            include_feedback=False,
+            include_archived_saves=True
+        )
         
         total_pages = 1  # For fresh searches, we only return one page
         
@@ -205,6 +245,7 @@ async def save_job(
                 existing_saved.updated_at = datetime.utcnow()  # type: ignore
                 await db.commit()
                 await db.refresh(existing_saved)
+                get_count_cache().invalidate(current_user.id)  # type: ignore
                 
                 response = SavedJobResponse.model_validate(existing_saved)
                 response.job_recommendation = JobRecommendationResponse.model_validate(recommendation)
@@ -224,6 +265,7 @@ async def save_job(
         db.add(saved_job)
         await db.commit()
         await db.refresh(saved_job)
+        get_count_cache().invalidate(current_user.id)  # type: ignore
         
         response = SavedJobResponse.model_validate(saved_job)
         response.job_recommendation = JobRecommendationResponse.model_validate(recommendation)
@@ -240,42 +282,63 @@ async def save_job(
 
 @router.get("/saved", response_model=List[SavedJobResponse])
 async def get_saved_jobs(
+    response: Response,
     include_archived: bool = Query(False),
     application_status: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size; all saved jobs when omitted"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    include_total: bool = Query(False, description="Return the (cached) total in X-Total-Count"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get user's saved jobs"""
+    """Get user's saved jobs, newest first"""
+    
+    after = _decode_cursor(SAVED_JOBS_CURSOR, cursor)
     
     try:
         # Build query
-        query = select(SavedJob).where(SavedJob.user_id == current_user.id)
+        filters = [SavedJob.user_id == current_user.id]
         
         if not include_archived:
-            query = query.where(SavedJob.is_archived == False)
+            filters.append(SavedJob.is_archived == False)
         
         if application_status:
-            query = query.where(SavedJob.application_status == application_status)
+            filters.append(SavedJob.application_status == application_status)
         
-        query = query.order_by(desc(SavedJob.created_at))
+        query = select(SavedJob).where(*filters).order_by(desc(SavedJob.created_at), desc(SavedJob.id))
+        if after is not None:
+            query = query.where(tuple_(SavedJob.created_at, SavedJob.id) < tuple_(*after))
+        if limit is not None:
+            query = query.limit(limit + 1)
         
         result = await db.execute(query)
         saved_jobs = result.scalars().all()
         
+        if limit is not None and len(saved_jobs) > limit:
+            saved_jobs = saved_jobs[:limit]
+            last = saved_jobs[-1]
+            response.headers["X-Next-Cursor"] = encode_cursor(SAVED_JOBS_CURSOR, [last.created_at, last.id])
+        
+        if include_total:
+            total = await get_count_cache().get_or_count(
+                current_user.id, ("saved_jobs", include_archived, application_status), # type: ignore
+                lambda: _count_rows(db, SavedJob.id, filters)
+            )
+            response.headers["X-Total-Count"] = str(total)
+        
         # Enrich with job recommendation data
+        recommendations = await load_recommendations_by_id(
+            db, [saved_job.job_recommendation_id for saved_job in saved_jobs], cards=True
+        )
+        
         responses = []
         for saved_job in saved_jobs:
-            # Get job recommendation
-            rec_result = await db.execute(
-                select(JobRecommendation)
-                .where(JobRecommendation.id == saved_job.job_recommendation_id)
-            )
-            recommendation = rec_result.scalar_one_or_none()
+            recommendation = recommendations.get(saved_job.job_recommendation_id) # type: ignore
             
             if recommendation:
-                response = SavedJobResponse.model_validate(saved_job)
-                response.job_recommendation = JobRecommendationResponse.model_validate(recommendation)
-                responses.append(response)
+                response_item = SavedJobResponse.model_validate(saved_job)
+                response_item.job_recommendation = JobRecommendationResponse.model_validate(recommendation)
+                responses.append(response_item)
         
         return responses
         
@@ -317,6 +380,7 @@ async def update_saved_job(
         saved_job.updated_at = datetime.utcnow()  # type: ignore
         await db.commit()
         await db.refresh(saved_job)
+        get_count_cache().invalidate(current_user.id)  # type: ignore
         
         # Get job recommendation
         rec_result = await db.execute(
@@ -464,7 +528,9 @@ async def update_job_preferences(
                 setattr(preferences, field, value)
             preferences.updated_at = datetime.utcnow()  # type: ignore
         
+        await mark_recommendations_stale(db, current_user.id, "job_preferences")  # type: ignore
         await db.commit()
+        await enqueue_recommendation_refresh(current_user.id)  # type: ignore
         await db.refresh(preferences)
         
         return UserJobPreferencesResponse.model_validate(preferences)
@@ -507,9 +573,10 @@ async def get_job_analytics(
         
         # Get top skills from recommendations
         skills_result = await db.execute(
-            select(JobRecommendation.key_skills)
+            select(Vacancy.key_skills)
+            .join(JobRecommendation, JobRecommendation.vacancy_id == Vacancy.id)
             .where(JobRecommendation.user_id == current_user.id)
-            .where(JobRecommendation.key_skills.isnot(None))
+            .where(Vacancy.key_skills.isnot(None))
         )
         
         skill_count = {}
@@ -526,11 +593,12 @@ async def get_job_analytics(
         # Get salary range
         salary_result = await db.execute(
             select(
-                func.avg(JobRecommendation.salary_from),
-                func.avg(JobRecommendation.salary_to)
+                func.avg(Vacancy.salary_from),
+                func.avg(Vacancy.salary_to)
             )
+            .join(JobRecommendation, JobRecommendation.vacancy_id == Vacancy.id)
             .where(JobRecommendation.user_id == current_user.id)
-            .where(JobRecommendation.salary_from.isnot(None))
+            .where(Vacancy.salary_from.isnot(None))
         )
         salary_data = salary_result.first()
         
@@ -543,12 +611,13 @@ async def get_job_analytics(
         # Get most active areas
         area_result = await db.execute(
             select(
-                JobRecommendation.area_name,
+                Vacancy.area_name,
                 func.count(JobRecommendation.id).label("count")
             )
+            .join(JobRecommendation, JobRecommendation.vacancy_id == Vacancy.id)
             .where(JobRecommendation.user_id == current_user.id)
-            .where(JobRecommendation.area_name.isnot(None))
-            .group_by(JobRecommendation.area_name)
+            .where(Vacancy.area_name.isnot(None))
+            .group_by(Vacancy.area_name)
             .order_by(desc("count"))
             .limit(10)
         )
@@ -593,7 +662,7 @@ async def get_job_analytics(
 @router.get("/debug/skills")
 async def debug_user_skills(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_debug_user)
 ):
     """Debug endpoint to check user skills and preferences"""
     
@@ -666,7 +735,7 @@ async def debug_user_skills(
 @router.get("/debug/test-search")
 async def debug_test_search(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_debug_user)
 ):
     """Debug endpoint to test HeadHunter API search with user's parameters"""
     
@@ -713,10 +782,38 @@ async def debug_test_search(
             "hh_api_results": None
         }
 
+def _decode_cursor(kind: str, cursor: Optional[str]) -> Optional[list]:
+    """Sort key of a list cursor; 400 for cursors of another list or garbage"""
+    
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(kind, cursor, 2)
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+async def _count_rows(db: AsyncSession, column, filters) -> int:
+    result = await db.execute(select(func.count(column)).where(*filters))
+    return result.scalar() or 0
+
+async def _count_active_recommendations(db: AsyncSession, user_id: int) -> int:
+    return await _count_rows(
+        db, JobRecommendation.id,
+        [JobRecommendation.user_id == user_id, JobRecommendation.is_active == True]
+    )
+
 async def _should_refresh_recommendations(user_id: int, db: AsyncSession) -> bool:
     """Check if user's recommendations should be refreshed"""
     
-    # Check if user has any recommendations from the last 24 hours
+    # Refresh when something relevant changed (or the recommendations are too old)
+    state = await load_recommendation_state(db, user_id)
+    if state is not None:
+        return needs_refresh(state)
+    
+    # Users not tracked yet: check if user has any recommendations from the last 24 hours
     cutoff_time = datetime.utcnow() - timedelta(hours=24)
     
     result = await db.execute(
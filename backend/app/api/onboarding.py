@@ -10,6 +10,8 @@ from ..models.job import UserJobPreferences
 from ..schemas.onboarding import OnboardingProfileCreate, OnboardingProfileUpdate, OnboardingProfileResponse, OnboardingCompleteRequest
 from ..schemas.assessment import TakeAssessmentOption
 from ..auth.jwt import get_current_user
+from ..auth.user_cache import get_user_cache
+from ..services.recommendation_invalidation import enqueue_recommendation_refresh, mark_recommendations_stale
 from ..services.user_mapping_service import UserMappingService
 
 router = APIRouter(prefix="/api/onboarding", tags=["onboarding"])
@@ -34,7 +36,10 @@ async def create_or_update_profile(
         for field, value in profile_data.model_dump(exclude_unset=True).items():
             setattr(existing_profile, field, value)
         
+        await mark_recommendations_stale(db, current_user.id, "onboarding_profile")  # type: ignore
         await db.commit()
+        await get_user_cache().invalidate(current_user.username)  # type: ignore
+        await enqueue_recommendation_refresh(current_user.id)  # type: ignore
         await db.refresh(existing_profile)
         return existing_profile
     else:
@@ -45,7 +50,10 @@ async def create_or_update_profile(
         )
         
         db.add(new_profile)
+        await mark_recommendations_stale(db, current_user.id, "onboarding_profile")  # type: ignore
         await db.commit()
+        await get_user_cache().invalidate(current_user.username)  # type: ignore
+        await enqueue_recommendation_refresh(current_user.id)  # type: ignore
         await db.refresh(new_profile)
         return new_profile
 
@@ -115,6 +123,9 @@ async def complete_onboarding(
         .values(is_first_login=False)
     )
     
+    # Committed by either branch below
+    await mark_recommendations_stale(db, current_user.id, "onboarding_complete")  # type: ignore
+    
     # Создаем или обновляем job preferences на основе данных онбординга
     try:
         # Проверяем, есть ли уже preferences
@@ -142,6 +153,8 @@ async def complete_onboarding(
                 )
         
         await db.commit()
+        await get_user_cache().invalidate(current_user.username)  # type: ignore
+        await enqueue_recommendation_refresh(current_user.id)  # type: ignore
         
         return {
             "message": "Onboarding completed successfully",
@@ -151,6 +164,8 @@ async def complete_onboarding(
     except Exception as e:
         # Не фейлим весь запрос, если не удалось создать preferences
         await db.commit()  # Все равно сохраняем основные изменения
+        await get_user_cache().invalidate(current_user.username)  # type: ignore
+        await enqueue_recommendation_refresh(current_user.id)  # type: ignore
         
         return {
             "message": "Onboarding completed successfully",
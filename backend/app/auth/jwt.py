@@ -10,6 +10,7 @@ from ..schemas.user import TokenData
 from ..models.user import User
 from ..database import get_db
 from .security import get_user_by_username
+from .user_cache import get_user_cache, get_token_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -36,6 +37,12 @@ async def create_refresh_token(data: dict) -> str:
 async def verify_token(token: str, credentials_exception: HTTPException, token_type: str = "access") -> TokenData:
     if not settings.secret_key:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Secret key is not configured")
+
+    token_cache = get_token_cache()
+    cached_username = token_cache.get(token, token_type)
+    if cached_username is not None:
+        return TokenData(username=cached_username)
+
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         username: Optional[str] = payload.get("sub")
@@ -43,6 +50,8 @@ async def verify_token(token: str, credentials_exception: HTTPException, token_t
             raise credentials_exception
         if payload.get("type") != token_type:
             raise credentials_exception
+        if payload.get("exp") is not None:
+            token_cache.set(token, token_type, username, float(payload["exp"]))
         return TokenData(username=username)
     except JWTError:
         raise credentials_exception
@@ -59,9 +68,15 @@ async def get_current_user(
     token_data = await verify_token(token, credentials_exception)
     if not token_data.username:
         raise credentials_exception
-    user = await get_user_by_username(token_data.username, db)
-    if not user:
-        raise credentials_exception
+
+    # Served from the user cache when possible; the lookup is one query per request otherwise
+    user_cache = get_user_cache()
+    user = await user_cache.get(token_data.username)
+    if user is None:
+        user = await get_user_by_username(token_data.username, db)
+        if not user:
+            raise credentials_exception
+        await user_cache.set(user)
     if user.is_active is not True:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -72,4 +87,10 @@ async def get_current_user(
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if current_user.is_active is not True:  # type: ignore
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user 
+
+async def get_debug_user(current_user: User = Depends(get_current_user)) -> User:
+    """Debug and diagnostics endpoints: authenticated users only, and only when DEBUG is on"""
+    if not settings.debug:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return current_user
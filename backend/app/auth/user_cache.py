@@ -0,0 +1,215 @@
+"""
+Caches for the authentication path.
+
+``UserCache`` keeps a short-lived snapshot of each authenticated user's columns
+(never the password hash) so ``get_current_user`` does not hit the ``users``
+table on every request. Entries live in-process and, when enabled, in Redis;
+they are invalidated explicitly whenever the auth or onboarding endpoints
+change the user, and otherwise expire after ``user_cache_ttl`` seconds.
+
+``TokenClaimsCache`` memoizes verified JWT claims per token until the token's
+own expiry.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..config import settings
+from ..models.user import User
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "auth:user:"
+
+# Columns restored on cached users; hashed_password is loaded lazily only if a session needs it
+_CACHED_COLUMNS = [column.key for column in User.__table__.columns if column.key != "hashed_password"]
+_DATETIME_COLUMNS = {column.key for column in User.__table__.columns if isinstance(column.type, DateTime)}
+
+def _snapshot(user: User) -> Optional[Dict[str, Any]]:
+    """Column values of a loaded user, or None if any of them is not loaded"""
+    loaded = inspect(user).dict
+    if any(column not in loaded for column in _CACHED_COLUMNS):
+        return None
+    return {column: loaded[column] for column in _CACHED_COLUMNS}
+
+def _restore(snapshot: Dict[str, Any]) -> User:
+    """Build a detached User that can be attached to a session like a loaded one"""
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+class UserCache:
+    """TTL cache of user snapshots keyed by username"""
+
+    def __init__(
+        self,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        redis_url: Optional[str] = None
+    ):
+        self.ttl = ttl if ttl is not None else settings.user_cache_ttl
+        self.max_entries = max_entries if max_entries is not None else settings.user_cache_max_entries
+        self.redis_url = redis_url
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._redis = None
+        self._redis_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def _get_redis(self):
+        """Redis clients are bound to an event loop, so keep one per loop"""
+        if not self.redis_url:
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._redis_loop = loop
+        return self._redis
+
+    def _store_local(self, username: str, snapshot: Dict[str, Any]) -> None:
+        self._entries[username] = (time.monotonic() + self.ttl, snapshot)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_redis_snapshot(self, username: str) -> Optional[Dict[str, Any]]:
+        redis = self._get_redis()
+        if redis is None:
+            return None
+
+        try:
+            raw = await redis.get(REDIS_KEY_PREFIX + username)
+        except Exception as e:
+            logger.warning(f"User cache Redis read failed: {e}")
+            return None
+
+        if raw is None:
+            return None
+
+        snapshot = json.loads(raw)
+        for column in _DATETIME_COLUMNS:
+            if snapshot.get(column):
+                snapshot[column] = datetime.fromisoformat(snapshot[column])
+        return snapshot
+
+    async def get(self, username: str) -> Optional[User]:
+        """Return a detached copy of the cached user, or None on a miss"""
+
+        entry = self._entries.get(username)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return _restore(entry[1])
+        if entry is not None:
+            del self._entries[username]
+
+        snapshot = await self._get_redis_snapshot(username)
+        if snapshot is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._store_local(username, snapshot)
+        return _restore(snapshot)
+
+    async def set(self, user: User) -> None:
+        """Cache a user loaded from the database"""
+
+        snapshot = _snapshot(user)
+        if snapshot is None:
+            return
+
+        username = snapshot["username"]
+        self._store_local(username, snapshot)
+
+        redis = self._get_redis()
+        if redis is None:
+            return
+
+        try:
+            await redis.set(REDIS_KEY_PREFIX + username, json.dumps(snapshot, default=str), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"User cache Redis write failed: {e}")
+
+    async def invalidate(self, username: str) -> None:
+        """Drop a user after its row (or anything derived from it) changed"""
+
+        self._entries.pop(username, None)
+
+        redis = self._get_redis()
+        if redis is None:
+            return
+
+        try:
+            await redis.delete(REDIS_KEY_PREFIX + username)
+        except Exception as e:
+            logger.warning(f"User cache Redis delete failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class TokenClaimsCache:
+    """Verified JWT subjects keyed by (token, token type), kept until the token expires"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else settings.token_cache_max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+
+    def get(self, token: str, token_type: str) -> Optional[str]:
+        key = (token, token_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, username = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return username
+
+    def set(self, token: str, token_type: str, username: str, expires_at: float) -> None:
+        key = (token, token_type)
+        self._entries[key] = (expires_at, username)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+_user_cache: Optional[UserCache] = None
+_token_cache: Optional[TokenClaimsCache] = None
+
+def get_user_cache() -> UserCache:
+    """Return the process-wide user cache"""
+    global _user_cache
+
+    if _user_cache is None:
+        redis_url = settings.redis_url if settings.user_cache_redis_enabled else None
+        _user_cache = UserCache(redis_url=redis_url)
+    return _user_cache
+
+def get_token_cache() -> TokenClaimsCache:
+    """Return the process-wide verified token cache"""
+    global _token_cache
+
+    if _token_cache is None:
+        _token_cache = TokenClaimsCache()
+    return _token_cache
@@ -5,6 +5,14 @@ from typing import Optional
 class Settings(BaseSettings):
     # Database
     database_url: str = ""  # Required via .env
+    db_use_null_pool: bool = False  # Open a fresh connection per session (forking Celery workers)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Replace connections older than this many seconds
+    db_pool_pre_ping: bool = True
+    celery_db_pool_size: int = 8  # Per Celery worker process
+    celery_db_max_overflow: int = 4
 
     # Security
     secret_key: str = ""  # Required via .env
@@ -12,6 +20,12 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
 
+    # Authenticated user cache (in-process, optionally shared via redis_url)
+    user_cache_ttl: int = 60
+    user_cache_max_entries: int = 10000
+    user_cache_redis_enabled: bool = False
+    token_cache_max_entries: int = 10000  # Verified JWT claims, kept until token expiry
+
     # Redis
     redis_url: Optional[str] = None
 
@@ -26,6 +40,74 @@ class Settings(BaseSettings):
     azure_openai_max_tokens: int = 4096
     azure_openai_temperature: float = 0.2
 
+    # Assistant chat context
+    chat_context_max_tokens: int = 6000  # Prompt budget: system prompt, summary, history and the new message
+    chat_context_message_max_tokens: int = 1500  # Longer history messages are cut to this
+    chat_context_max_messages: int = 50  # Newest not yet summarized messages considered per request
+    chat_summary_enabled: bool = True  # Fold turns that no longer fit into a rolling summary
+    chat_summary_max_tokens: int = 500
+    chat_summary_keep_ratio: float = 0.75  # Share of the history budget unsummarized turns may use before folding
+    chat_summary_target_ratio: float = 0.5  # Share left verbatim after folding; lower, so folds are not needed every turn
+    chat_tokenizer_encoding: str = "o200k_base"  # tiktoken encoding of the deployed model
+
+    # Assistant response cache (replies to first-turn questions, shared between users)
+    response_cache_enabled: bool = False
+    response_cache_ttl: int = 86400
+    response_cache_max_entries: int = 2000
+    response_cache_max_message_chars: int = 300  # Longer first messages tend to be personal and are not cached
+
+    # HeadHunter API client
+    hh_api_url: str = "https://api.hh.kz"
+    hh_user_agent: str = "AI-Komekshi Job Platform Parser"
+    hh_http2: bool = True  # Used only when the h2 package is installed
+    hh_max_connections: int = 100
+    hh_max_keepalive_connections: int = 20
+    hh_keepalive_expiry: float = 30.0
+    hh_timeout: float = 30.0
+    hh_connect_timeout: float = 5.0
+    hh_rate_limit_per_second: float = 5.0  # Sustained HH request rate per process
+    hh_rate_limit_burst: int = 10
+    hh_detail_concurrency: int = 5  # Parallel /vacancies/{id} requests
+
+    # Vacancy detail cache (in-process LRU + optional Redis via redis_url)
+    vacancy_cache_max_entries: int = 5000
+    vacancy_cache_ttl: int = 900  # Seconds before an entry is revalidated with HH
+    vacancy_cache_redis_enabled: bool = True
+    vacancy_cache_redis_ttl: int = 86400  # Stale entries are kept this long for revalidation
+
+    # HH search result cache
+    hh_search_cache_ttl: int = 120
+    hh_search_cache_max_entries: int = 1000
+
+    # Batch recommendation refresh (Celery)
+    recommendation_refresh_concurrency: int = 8  # Users refreshed in parallel within a shard
+    recommendation_refresh_user_budget: int = 0  # Max users per run, 0 = no limit
+    recommendation_refresh_shard_size: int = 25  # Users per sub-task; keep under task_soft_time_limit
+    recommendation_incremental_refresh: bool = True  # Search only vacancies changed since the last refresh
+    recommendation_full_refresh_hours: int = 168  # Run a full search when the last one is older than this
+    recommendation_incremental_max_vacancies: int = 200  # Larger deltas are replaced by a full search
+    recommendation_archive_check_hours: int = 24  # Recheck recommended vacancies not seen open for this long
+    recommendation_archive_check_batch: int = 20  # Max such vacancies checked with HH per user refresh
+
+    # Recommendation invalidation
+    recommendation_refresh_max_age_hours: int = 168  # Refresh users with no changes at least this often
+    recommendation_invalidation_countdown: int = 30  # Seconds before a targeted refresh runs (absorbs bursts of edits)
+
+    # Compressed JSON payloads (vacancies.raw_data)
+    payload_compression: str = "zstd"  # "zstd" or "zlib"; zstd falls back to zlib without the zstandard package
+    payload_compression_level: Optional[int] = None  # Codec default when unset
+    payload_zstd_dictionary_path: Optional[str] = None  # Shared dictionary from scripts/train_payload_dictionary.py
+
+    # List endpoint totals
+    pagination_count_cache_ttl: int = 60  # Seconds a list total is reused across pages
+    pagination_count_cache_max_entries: int = 10000
+
+    # Recommendation retention cleanup
+    recommendation_retention_days: int = 30
+    recommendation_cleanup_batch_size: int = 1000  # Rows deleted per transaction
+    recommendation_cleanup_archive: bool = False  # Copy removed rows into job_recommendations_archive
+    recommendation_cleanup_vacancy_grace_hours: int = 24  # Unused vacancies written more recently are kept
+
     # Environment
     environment: str = "development"
     debug: bool = True
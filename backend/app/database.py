@@ -1,22 +1,129 @@
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import time
+from typing import AsyncGenerator, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from .config import settings
 
 # Create declarative base
 Base = declarative_base()
 
+class PoolMetrics:
+    """Counters for connection checkouts and time spent waiting for a free connection"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+
+    def record_wait(self, seconds: float) -> None:
+        self.waits += 1
+        self.wait_time_total += seconds
+        self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "wait_time_avg_ms": self.wait_time_total / self.waits * 1000 if self.waits else 0.0,
+            "wait_time_max_ms": self.wait_time_max * 1000
+        }
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records checkouts which had to wait for a free connection.
+    Checkout/checkin/connect counts come from pool events; no event fires before a
+    checkout blocks, so waits are timed around the public ``connect()``.
+    """
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def saturated(self) -> bool:
+        """No idle connection and no overflow left: the next checkout has to wait"""
+        return self.checkedin() == 0 and -1 < self.max_overflow <= self.overflow()
+
+    def connect(self):
+        blocked = self.saturated()
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            if blocked:
+                self.metrics.record_wait(time.perf_counter() - start)
+
+def _register_pool_events(engine: AsyncEngine) -> None:
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        engine.sync_engine.pool.metrics.checkouts += 1
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        engine.sync_engine.pool.metrics.checkins += 1
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        engine.sync_engine.pool.metrics.connects += 1
+
 # Create async engine only if database_url is provided
-def get_engine():
+def get_engine(
+    use_null_pool: Optional[bool] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None
+) -> AsyncEngine:
+    """
+    Create the async engine. Pooling is configured from settings (``pool_size`` and
+    ``max_overflow`` override them); NullPool is used when ``use_null_pool``
+    (or ``settings.db_use_null_pool``) is set, e.g. for code that runs each task on a new loop.
+    """
     if not settings.database_url:
         raise ValueError("DATABASE_URL not configured")
-    return create_async_engine(
+
+    if use_null_pool is None:
+        use_null_pool = settings.db_use_null_pool
+
+    if use_null_pool:
+        return create_async_engine(
+            settings.database_url,
+            future=True,
+            poolclass=NullPool,
+        )
+
+    engine = create_async_engine(
         settings.database_url,
         future=True,
-        poolclass=NullPool,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size if pool_size is not None else settings.db_pool_size,
+        max_overflow=max_overflow if max_overflow is not None else settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
     )
+    _register_pool_events(engine)
+    return engine
 
 # Create global engine instance only when database URL is available
 _engine = None
@@ -35,11 +142,12 @@ except ValueError:
     engine = None
 
 # Create async session factory
-def get_session_factory():
-    if engine is None:
+def get_session_factory(bind: Optional[AsyncEngine] = None):
+    bind = bind or engine
+    if bind is None:
         raise ValueError("Database engine not initialized. Check DATABASE_URL configuration.")
     return async_sessionmaker(
-        engine,
+        bind,
         class_=AsyncSession,
         expire_on_commit=False,
     )
@@ -50,6 +158,26 @@ try:
 except ValueError:
     async_session = None
 
+def get_pool_metrics(bind: Optional[AsyncEngine] = None) -> dict:
+    """Current pool occupancy plus checkout/wait counters for the given (default: global) engine"""
+    bind = bind or engine
+    if bind is None:
+        return {"pool": "unavailable"}
+
+    pool = bind.sync_engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {"pool": type(pool).__name__}
+
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool.max_overflow,
+        **pool.metrics.to_dict()
+    }
+
 # Dependency for database sessions
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     if async_session is None:
@@ -62,4 +190,4 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.rollback()
             raise
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -10,10 +10,12 @@ from sqlalchemy import select
 from .api import auth, onboarding, assistants, notifications, hh_auth, assessment, jobs, enhanced_jobs
 # TODO: Add hh_parser after fixing encoding issues
 from .api import settings as settings_api
-from .database import engine, Base, async_session
+from .database import engine, Base, async_session, get_pool_metrics
 from .models.assistant import Assistant
 from .models.user import User
 from .config import settings
+from .auth.jwt import get_debug_user
+from .services.hh_client import startup_hh_client, shutdown_hh_client
 
 # Create FastAPI app
 app = FastAPI(
@@ -72,6 +74,19 @@ app.include_router(enhanced_jobs.router)  # Enhanced dual recommendation system
 #     # TODO: Fix async session for creating default assistants
 #     # await create_default_assistants()
 
+@app.on_event("startup")
+async def start_hh_client():
+    await startup_hh_client()
+
+@app.on_event("shutdown")
+async def stop_hh_client():
+    await shutdown_hh_client()
+
+@app.on_event("shutdown")
+async def dispose_db_engine():
+    if engine is not None:
+        await engine.dispose()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to AI-Komekshi API"}
@@ -82,4 +97,9 @@ async def health_check():
         "status": "healthy",
         "version": "1.0.0",
         "environment": settings.environment
-    } 
\ No newline at end of file
+    }
+
+@app.get("/health/pool")
+async def pool_health_check(current_user: User = Depends(get_debug_user)):
+    """Connection pool occupancy and wait counters (debug only)"""
+    return get_pool_metrics()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, func, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, func, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -20,6 +20,10 @@ class ChatHistory(Base):
     title = Column(String, nullable=False)
     last_conversation = Column(Text, nullable=True)
     
+    # Краткое содержание старой части разговора (см. app/services/chat_context.py)
+    summary = Column(Text, nullable=True)
+    summary_until_message_id = Column(Integer, nullable=True)  # Последнее сообщение, вошедшее в summary
+    
     # Статус
     enable = Column(Boolean, default=True)
     
@@ -58,4 +62,9 @@ class Message(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Связи
-    chat_history = relationship("ChatHistory", back_populates="messages") 
\ No newline at end of file
+    chat_history = relationship("ChatHistory", back_populates="messages")
+    
+    __table_args__ = (
+        # Последние сообщения чата и страницы по id (keyset)
+        Index('ix_messages_chat_history_id_id', 'chat_history_id', 'id'),
+    )
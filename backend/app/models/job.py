@@ -1,14 +1,31 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, Float, func, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, Float, func, UniqueConstraint, Index, inspect
+from sqlalchemy.ext.asyncio import AsyncAttrs
+from sqlalchemy.orm import deferred, query_expression, relationship
 
 from ..database import Base
+from .types import CompressedJSON
 
-class JobRecommendation(Base):
-    __tablename__ = "job_recommendations"
+# Vacancy details stored once per vacancy and exposed read-only on each recommendation
+VACANCY_FIELDS = (
+    "title",
+    "company_name",
+    "salary_from",
+    "salary_to",
+    "currency",
+    "area_name",
+    "employment_type",
+    "experience_required",
+    "description",
+    "key_skills",
+    "raw_data",
+)
+
+class Vacancy(AsyncAttrs, Base):
+    """Canonical HH vacancy, shared by every recommendation of it"""
+    __tablename__ = "vacancies"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    hh_vacancy_id = Column(String, nullable=False)  # HeadHunter vacancy ID
+    hh_vacancy_id = Column(String, unique=True, nullable=False)  # HeadHunter vacancy ID
     
     # Job details from HH API
     title = Column(String, nullable=False)
@@ -22,27 +39,137 @@ class JobRecommendation(Base):
     description = Column(Text, nullable=True)
     key_skills = Column(JSON, nullable=True)  # List of required skills
     
+    # Leading part of the description, filled in only by list queries that skip the full text
+    description_preview = query_expression()
+    
+    # HH API response data, compressed and only loaded on access
+    # (use ``await vacancy.awaitable_attrs.raw_data`` from async code)
+    raw_data = deferred(Column(CompressedJSON, nullable=True))
+    
+    is_archived = Column(Boolean, default=False)  # Reported archived (or gone) by HH
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    recommendations = relationship("JobRecommendation", back_populates="vacancy")
+
+def _vacancy_field(name: str) -> property:
+    def getter(self):
+        return getattr(self.vacancy, name) if self.vacancy is not None else None
+    return property(getter, doc=f"Vacancy.{name} of the recommended vacancy")
+
+def _vacancy_description(self):
+    """Full description, or its preview when the list query did not load the full text"""
+    vacancy = self.vacancy
+    if vacancy is None:
+        return None
+    if "description" in inspect(vacancy).unloaded:
+        return vacancy.description_preview
+    return vacancy.description
+
+class JobRecommendation(Base):
+    __tablename__ = "job_recommendations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    hh_vacancy_id = Column(String, nullable=False)  # HeadHunter vacancy ID
+    vacancy_id = Column(Integer, ForeignKey("vacancies.id"), nullable=False, index=True)
+    
     # Recommendation scoring
     relevance_score = Column(Float, default=0.0)  # How well it matches user profile
     skills_match_score = Column(Float, default=0.0)  # Skills matching percentage
     location_match_score = Column(Float, default=0.0)  # Location preference match
     salary_match_score = Column(Float, default=0.0)  # Salary expectation match
     
-    # HH API response data
-    raw_data = Column(JSON, nullable=True)  # Store full API response
-    
     # Status and metadata
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Job details, loaded together with the recommendation
+    vacancy = relationship("Vacancy", back_populates="recommendations", lazy="joined", innerjoin=True)
+    title = _vacancy_field("title")
+    company_name = _vacancy_field("company_name")
+    salary_from = _vacancy_field("salary_from")
+    salary_to = _vacancy_field("salary_to")
+    currency = _vacancy_field("currency")
+    area_name = _vacancy_field("area_name")
+    employment_type = _vacancy_field("employment_type")
+    experience_required = _vacancy_field("experience_required")
+    description = property(_vacancy_description)
+    key_skills = _vacancy_field("key_skills")
+    raw_data = _vacancy_field("raw_data")
+    
     # Relationships
     user = relationship("User", back_populates="job_recommendations")
     saved_jobs = relationship("SavedJob", back_populates="job_recommendation", cascade="all, delete-orphan")
     job_feedbacks = relationship("JobFeedback", back_populates="job_recommendation", cascade="all, delete-orphan")
     
-    # Ensure unique recommendations per user
-    __table_args__ = (UniqueConstraint('user_id', 'hh_vacancy_id', name='uq_user_vacancy'),)
+    __table_args__ = (
+        # Ensure unique recommendations per user
+        UniqueConstraint('user_id', 'hh_vacancy_id', name='uq_user_vacancy'),
+        # Retention cleanup scans by age
+        Index('ix_job_recommendations_created_at', 'created_at'),
+        # Active recommendations of a user ordered by relevance (id breaks ties for keyset paging)
+        Index('ix_job_recommendations_user_active_score', 'user_id', 'is_active', 'relevance_score', 'id'),
+    )
+
+class ArchivedJobRecommendation(Base):
+    """Cold copy of recommendations removed by the retention cleanup"""
+    __tablename__ = "job_recommendations_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Original job_recommendations.id
+    user_id = Column(Integer, nullable=False, index=True)  # No foreign key: archived rows may outlive users
+    hh_vacancy_id = Column(String, nullable=False)
+
+    title = Column(String, nullable=False)
+    company_name = Column(String, nullable=True)
+    salary_from = Column(Integer, nullable=True)
+    salary_to = Column(Integer, nullable=True)
+    currency = Column(String, nullable=True)
+    area_name = Column(String, nullable=True)
+    employment_type = Column(String, nullable=True)
+    experience_required = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    key_skills = Column(JSON, nullable=True)
+
+    relevance_score = Column(Float, nullable=True)
+    skills_match_score = Column(Float, nullable=True)
+    location_match_score = Column(Float, nullable=True)
+    salary_match_score = Column(Float, nullable=True)
+
+    raw_data = deferred(Column(CompressedJSON, nullable=True))
+
+    is_active = Column(Boolean, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class RecommendationSearchCursor(Base):
+    """Last successful HH search per user and search query, used for incremental refreshes"""
+    __tablename__ = "recommendation_search_cursors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    params_hash = Column(String(40), nullable=False)  # normalize_search_params() of the query, without paging
+    last_searched_at = Column(DateTime(timezone=True), nullable=False)  # Passed as date_from next time
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (UniqueConstraint('user_id', 'params_hash', name='uq_user_search_cursor'),)
+
+class RecommendationState(Base):
+    """Whether a user's stored recommendations still reflect their profile, preferences and assessments"""
+    __tablename__ = "user_recommendation_states"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    is_stale = Column(Boolean, nullable=False, default=True)
+    stale_reason = Column(String, nullable=True)  # What changed first since the last refresh
+    stale_since = Column(DateTime(timezone=True), nullable=True)
+    version = Column(Integer, nullable=False, default=0)  # Bumped on every invalidation
+    last_refreshed_at = Column(DateTime(timezone=True), nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 class SavedJob(Base):
     __tablename__ = "saved_jobs"
@@ -66,8 +193,12 @@ class SavedJob(Base):
     user = relationship("User", back_populates="saved_jobs")
     job_recommendation = relationship("JobRecommendation", back_populates="saved_jobs")
     
-    # Ensure user can't save the same job twice
-    __table_args__ = (UniqueConstraint('user_id', 'job_recommendation_id', name='uq_user_saved_job'),)
+    __table_args__ = (
+        # Ensure user can't save the same job twice
+        UniqueConstraint('user_id', 'job_recommendation_id', name='uq_user_saved_job'),
+        # Saved jobs of a user, newest first (keyset paging)
+        Index('ix_saved_jobs_user_created', 'user_id', 'created_at', 'id'),
+    )
 
 class JobFeedback(Base):
     __tablename__ = "job_feedbacks"
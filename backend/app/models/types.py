@@ -0,0 +1,110 @@
+"""
+Column types shared by the models.
+
+``CompressedJSON`` stores JSON documents compressed in a binary column. Each
+value starts with a one-byte codec header so the codec (or the shared zstd
+dictionary) can change without rewriting existing rows:
+
+    0x01  zlib
+    0x02  zstd
+    0x03  zstd with a shared dictionary; followed by the 4-byte dictionary id
+
+zstd needs the optional ``zstandard`` package; without it values are written
+with zlib. A dictionary trained on HH vacancies (see
+``scripts/train_payload_dictionary.py``) improves the ratio for payloads that
+share most of their structure.
+"""
+
+import json
+import logging
+import struct
+import zlib
+from functools import lru_cache
+from typing import Any, Optional
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_ZSTD_DICT = 3
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+@lru_cache(maxsize=1)
+def _load_dictionary():
+    """The configured zstd dictionary, or None"""
+    path = settings.payload_zstd_dictionary_path
+    zstd = _zstd()
+    if not path or zstd is None:
+        return None
+    with open(path, "rb") as f:
+        dictionary = zstd.ZstdCompressionDict(f.read())
+    logger.info(f"Loaded zstd payload dictionary {dictionary.dict_id()} from {path}")
+    return dictionary
+
+def compress_payload(value: Any) -> bytes:
+    """Serialize and compress a JSON document with the configured codec"""
+
+    raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    zstd = _zstd() if settings.payload_compression == "zstd" else None
+
+    if zstd is None:
+        level = settings.payload_compression_level or 6
+        return bytes([CODEC_ZLIB]) + zlib.compress(raw, level)
+
+    level = settings.payload_compression_level or 3
+    dictionary = _load_dictionary()
+    if dictionary is None:
+        return bytes([CODEC_ZSTD]) + zstd.ZstdCompressor(level=level).compress(raw)
+
+    compressor = zstd.ZstdCompressor(level=level, dict_data=dictionary)
+    return bytes([CODEC_ZSTD_DICT]) + struct.pack(">I", dictionary.dict_id()) + compressor.compress(raw)
+
+def decompress_payload(data: bytes) -> Any:
+    """Inverse of ``compress_payload`` for any supported codec"""
+
+    codec, body = data[0], data[1:]
+    if codec == CODEC_ZLIB:
+        return json.loads(zlib.decompress(body))
+
+    zstd = _zstd()
+    if zstd is None:
+        raise RuntimeError("zstd-compressed payload found but the zstandard package is not installed")
+
+    if codec == CODEC_ZSTD:
+        return json.loads(zstd.ZstdDecompressor().decompress(body))
+
+    if codec == CODEC_ZSTD_DICT:
+        (dict_id,) = struct.unpack(">I", body[:4])
+        dictionary = _load_dictionary()
+        if dictionary is None or dictionary.dict_id() != dict_id:
+            raise RuntimeError(f"Payload was compressed with zstd dictionary {dict_id}, which is not configured")
+        return json.loads(zstd.ZstdDecompressor(dict_data=dictionary).decompress(body[4:]))
+
+    raise ValueError(f"Unknown payload codec {codec}")
+
+class CompressedJSON(TypeDecorator):
+    """JSON document stored compressed in a binary column"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return compress_payload(value)
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Any:
+        if value is None:
+            return None
+        return decompress_payload(bytes(value))
@@ -61,6 +61,23 @@ class ChatHistoryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ChatHistorySummary(BaseModel):
+    id: str
+    title: str
+    lastConversation: str
+    messageCount: int
+    createdTime: int
+    updatedTime: int
+    enable: bool
+
+class ChatHistoryListResponse(BaseModel):
+    data: List[ChatHistorySummary]
+    total: int
+
+class ChatMessagesResponse(BaseModel):
+    data: List[ConversationMessage]  # В хронологическом порядке
+    hasMore: bool  # Есть еще сообщения в направлении выборки (старше before_id / новее after_id)
+
 class SendMessageRequest(BaseModel):
     participant: str
     message: str
@@ -35,7 +35,7 @@ class JobRecommendationBase(BaseModel):
     area_name: Optional[str] = None
     employment_type: Optional[str] = None
     experience_required: Optional[str] = None
-    description: Optional[str] = None
+    description: Optional[str] = None  # Only a preview on list endpoints
     key_skills: Optional[List[str]] = None
     accept_handicapped_filter: Optional[bool] = None  # Indicates if job was found using accessibility filter
 
@@ -63,10 +63,11 @@ class JobRecommendationResponse(JobRecommendationBase):
 
 class JobRecommendationListResponse(BaseModel):
     recommendations: List[JobRecommendationResponse]
-    total: int
+    total: Optional[int] = None  # None when the total was not requested
     page: int
     per_page: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass as ``cursor`` to get the next page; None on the last page
 
 # Saved Job Schemas
 class SavedJobCreate(BaseModel):
@@ -0,0 +1,312 @@
+"""
+Vectorized relevance scoring for a batch of vacancies against one user profile.
+
+Text matching produces per-vacancy feature matrices (skill hits, keyword
+counts); location, salary and experience become boolean/float vectors, and the
+sub-scores and weighted ``relevance_score`` are computed for the whole batch
+with NumPy. Every sub-score is accumulated in the same order as the scalar
+code it replaces (column by column, left to right), so the results are
+bit-for-bit identical to scoring one vacancy at a time.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from ..utils.skill_matcher import AhoCorasick, get_profile_matcher
+
+# Assessment-based scoring keywords
+STRENGTH_KEYWORDS = {
+    "technical": ["программирование", "разработка", "код", "техническ", "IT", "анализ"],
+    "communication": ["общение", "презентац", "клиент", "продаж", "переговор", "коммуникац"],
+    "problem_solving": ["решение", "анализ", "исследование", "проблем", "задач", "логик"],
+    "learning": ["обучение", "развитие", "изучение", "новы", "рост", "карьер"],
+    "work_style": ["команд", "лидерство", "управление", "организац", "координац"],
+    "creativity": ["творческ", "креатив", "дизайн", "идеи", "инновац"],
+    "leadership": ["руководство", "управление", "лидер", "директор", "менеджер"]
+}
+COMPLEXITY_INDICATORS = ["опыт", "руководител", "senior", "lead", "главный"]
+ENTRY_LEVEL_INDICATORS = ["junior", "стажер", "начинающ", "без опыта"]
+GROWTH_INDICATORS = ["развитие", "карьер", "обучение", "тренинг", "рост", "возможност"]
+
+_ASSESSMENT_MATCHER = AhoCorasick(
+    [keyword for keywords in STRENGTH_KEYWORDS.values() for keyword in keywords]
+    + COMPLEXITY_INDICATORS + ENTRY_LEVEL_INDICATORS + GROWTH_INDICATORS
+)
+
+PREFERENCES_WEIGHTS = {
+    "skills_match_score": 0.4,
+    "location_match_score": 0.3,
+    "salary_match_score": 0.3
+}
+ONBOARDING_WEIGHTS = {
+    "skills_match_score": 0.4,
+    "location_match_score": 0.2,
+    "salary_match_score": 0.2,
+    "experience_match_score": 0.2
+}
+ASSESSMENT_WEIGHTS = {
+    "strength_match_score": 0.4,
+    "job_fit_score": 0.3,
+    "growth_potential_score": 0.1,
+    "location_score": 0.1,
+    "salary_score": 0.1
+}
+
+def _mask(values: Iterable[bool]) -> np.ndarray:
+    return np.fromiter(values, dtype=bool)
+
+def _numbers(values: Iterable[Any]) -> np.ndarray:
+    """Float vector with NaN for missing values"""
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+def _truthy(values: np.ndarray) -> np.ndarray:
+    """Python truthiness of optional numbers: None (NaN) and 0 are false"""
+    return ~np.isnan(values) & (values != 0)
+
+def _count_hits(found_sets: Sequence[frozenset], patterns: Sequence[str]) -> np.ndarray:
+    """Hit matrix (vacancies x patterns), with duplicate patterns kept as separate columns"""
+    hits = np.zeros((len(found_sets), len(patterns)), dtype=np.float64)
+    for row, found in enumerate(found_sets):
+        for column, pattern in enumerate(patterns):
+            if pattern in found:
+                hits[row, column] = 1.0
+    return hits
+
+def _sum_columns(matrix: np.ndarray) -> np.ndarray:
+    """Row sums accumulated left to right, matching a scalar ``+=`` loop"""
+    total = np.zeros(matrix.shape[0], dtype=np.float64)
+    for column in range(matrix.shape[1]):
+        total += matrix[:, column]
+    return total
+
+def _weighted_sum(columns: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    """``sum(score * weight)`` in the weights' order"""
+    total = np.zeros(len(next(iter(columns.values()))), dtype=np.float64)
+    for key, weight in weights.items():
+        total += columns[key] * weight
+    return total
+
+def _to_dicts(columns: Dict[str, np.ndarray]) -> List[Dict[str, float]]:
+    keys = list(columns)
+    rows = zip(*(columns[key].tolist() for key in keys))
+    return [dict(zip(keys, row)) for row in rows]
+
+def _snippet_text(vacancy: Dict[str, Any]) -> str:
+    snippet = vacancy.get("snippet", {})
+    return (
+        vacancy.get("name", "") + " " +
+        (snippet.get("responsibility", "") or "") + " " +
+        (snippet.get("requirement", "") or "")
+    ).lower()
+
+def _area_name(vacancy: Dict[str, Any]) -> str:
+    vacancy_area = vacancy.get("area", {})
+    return vacancy_area.get("name", "").lower() if vacancy_area else ""
+
+def score_preferences_batch(vacancies: Sequence[Dict[str, Any]], preferences: Any) -> List[Dict[str, float]]:
+    """Batch version of ``HeadHunterService._calculate_recommendation_scores``"""
+
+    n = len(vacancies)
+    if n == 0:
+        return []
+
+    skills = np.zeros(n)
+    location = np.zeros(n)
+    salary = np.zeros(n)
+
+    # Skills: weight matrix from the compiled profile matcher
+    preferred_skills = getattr(preferences, 'preferred_skills', None)
+    if preferred_skills is not None and len(preferred_skills) > 0:
+        matcher = get_profile_matcher(tuple(skill.lower() for skill in preferred_skills))
+        weights = np.array([matcher.weights(_snippet_text(vacancy)) for vacancy in vacancies], dtype=np.float64)
+        skills = np.minimum(_sum_columns(weights) / len(preferred_skills), 1.0)
+
+    # Location
+    preferred_areas = getattr(preferences, 'preferred_areas', None)
+    remote_work_preference = getattr(preferences, 'remote_work_preference', 'any')
+    has_area = _mask(bool(vacancy.get("area", {})) for vacancy in vacancies)
+    in_preferred = _mask(
+        preferred_areas is not None and bool(vacancy.get("area")) and str(vacancy["area"].get("id", "")) in preferred_areas
+        for vacancy in vacancies
+    )
+    if remote_work_preference == "only":
+        is_remote = _mask(
+            any(word in vacancy.get("name", "").lower() for word in ["удаленн", "remote", "дистанц"])
+            for vacancy in vacancies
+        )
+        otherwise = np.where(is_remote, 1.0, 0.2)
+    else:
+        otherwise = np.full(n, 0.5)
+    location = np.where(has_area, np.where(in_preferred, 1.0, otherwise), location)
+
+    # Salary bands
+    preferred_salary_min = getattr(preferences, 'preferred_salary_min', None)
+    if preferred_salary_min is not None:
+        user_max = getattr(preferences, 'preferred_salary_max', None)
+        has_salary = _mask(bool(vacancy.get("salary")) for vacancy in vacancies)
+        salary_from = _numbers((vacancy.get("salary") or {}).get("from") for vacancy in vacancies)
+        salary_to = _numbers((vacancy.get("salary") or {}).get("to") for vacancy in vacancies)
+        from_set, to_set = _truthy(salary_from), _truthy(salary_to)
+
+        with np.errstate(invalid="ignore"):
+            from_ok = from_set & (salary_from >= preferred_salary_min)
+            to_ok = to_set & (salary_to >= preferred_salary_min)
+            within_max = from_ok & (salary_from <= user_max) if user_max is not None else np.zeros(n, dtype=bool)
+
+        band = np.select([within_max, from_ok, to_ok], [1.0, 0.8, 0.6], default=0.3)
+        salary = np.where(has_salary & (from_set | to_set), band, salary)
+
+    columns = {
+        "skills_match_score": skills,
+        "location_match_score": location,
+        "salary_match_score": salary
+    }
+    columns["relevance_score"] = _weighted_sum(columns, PREFERENCES_WEIGHTS)
+    return _to_dicts(columns)
+
+def score_onboarding_batch(
+    vacancies: Sequence[Dict[str, Any]],
+    vacancy_texts: Sequence[str],
+    onboarding_profile: Any,
+    experience_mapping: Dict[str, str]
+) -> List[Dict[str, float]]:
+    """
+    Batch version of ``EnhancedHeadHunterService._calculate_recommendation_scores``.
+    ``vacancy_texts`` are the lower-cased full texts of the vacancies.
+    """
+
+    n = len(vacancies)
+    if n == 0:
+        return []
+
+    columns = {
+        "skills_match_score": np.zeros(n),
+        "location_match_score": np.zeros(n),
+        "salary_match_score": np.zeros(n),
+        "experience_match_score": np.zeros(n),
+        "relevance_score": np.zeros(n)
+    }
+    if not onboarding_profile:
+        return _to_dicts(columns)
+
+    # Skills: direct hit matrix
+    if onboarding_profile.skills:
+        patterns = [skill.lower() for skill in onboarding_profile.skills]
+        matcher = AhoCorasick(patterns)
+        hits = _count_hits([matcher.find(text) for text in vacancy_texts], patterns)
+        hits[:, [column for column, pattern in enumerate(patterns) if not pattern]] = 1.0
+        columns["skills_match_score"] = _sum_columns(hits) / len(patterns)
+    else:
+        columns["skills_match_score"] = np.full(n, 0.3)  # Neutral score if no skills specified
+
+    # Location
+    if onboarding_profile.preferred_cities:
+        cities = [city.lower() for city in onboarding_profile.preferred_cities]
+        in_city = _mask(any(city in _area_name(vacancy) for city in cities) for vacancy in vacancies)
+        columns["location_match_score"] = np.where(in_city, 1.0, 0.5)
+    else:
+        columns["location_match_score"] = np.full(n, 0.5)
+
+    # Salary bands
+    if onboarding_profile.min_salary:
+        min_salary = onboarding_profile.min_salary
+        has_salary = _mask(bool(vacancy.get("salary", {})) for vacancy in vacancies)
+        salary_from = _numbers((vacancy.get("salary") or {}).get("from") for vacancy in vacancies)
+        salary_to = _numbers((vacancy.get("salary") or {}).get("to") for vacancy in vacancies)
+        with np.errstate(invalid="ignore"):
+            from_ok = _truthy(salary_from) & (salary_from >= min_salary)
+            to_ok = _truthy(salary_to) & (salary_to >= min_salary)
+        band = np.select([from_ok, to_ok], [1.0, 0.7], default=0.3)
+        columns["salary_match_score"] = np.where(has_salary, band, 0.0)
+    else:
+        columns["salary_match_score"] = np.full(n, 0.5)
+
+    # Experience
+    if onboarding_profile.experience_level:
+        expected = experience_mapping.get(onboarding_profile.experience_level)
+        has_experience = _mask(bool(vacancy.get("experience", {})) for vacancy in vacancies)
+        same_level = _mask(
+            (vacancy.get("experience") or {}).get("id", "") == expected for vacancy in vacancies
+        )
+        columns["experience_match_score"] = np.where(has_experience, np.where(same_level, 1.0, 0.6), 0.0)
+
+    columns["relevance_score"] = _weighted_sum(columns, ONBOARDING_WEIGHTS)
+    return _to_dicts(columns)
+
+def score_assessment_batch(
+    vacancies: Sequence[Dict[str, Any]],
+    vacancy_texts: Sequence[str],
+    assessment_result: Any,
+    onboarding_profile: Optional[Any]
+) -> List[Dict[str, float]]:
+    """
+    Batch version of ``EnhancedHeadHunterService._calculate_assessment_scores``.
+    ``vacancy_texts`` are the lower-cased full texts of the vacancies.
+    """
+
+    n = len(vacancies)
+    if n == 0:
+        return []
+
+    found_sets = [_ASSESSMENT_MATCHER.find(text) for text in vacancy_texts]
+
+    # Strength matching: one column per strength, 1.0 if any keyword of its category occurs
+    strength_hits = np.zeros((n, len(assessment_result.top_strengths)))
+    for column, strength in enumerate(assessment_result.top_strengths):
+        if isinstance(strength, dict):
+            category = strength.get("category", "")
+        else:
+            category = getattr(strength, "category", "")
+        if category in STRENGTH_KEYWORDS:
+            keywords = STRENGTH_KEYWORDS[category]
+            strength_hits[:, column] = [any(keyword in found for keyword in keywords) for found in found_sets]
+
+    total_strengths = len(assessment_result.top_strengths)
+    strength = _sum_columns(strength_hits) / total_strengths if total_strengths > 0 else np.zeros(n)
+
+    # Job fit
+    job_fit = np.zeros(n)
+    if assessment_result.overall_score:
+        if assessment_result.overall_score >= 7.0:
+            complexity = _sum_columns(_count_hits(found_sets, COMPLEXITY_INDICATORS))
+            job_fit = np.minimum(1.0, 0.6 + (complexity * 0.2))
+        elif assessment_result.overall_score >= 5.0:
+            job_fit = np.full(n, 0.7)
+        else:
+            entry_level = _count_hits(found_sets, ENTRY_LEVEL_INDICATORS).any(axis=1)
+            job_fit = np.where(entry_level, 0.8, 0.5)
+
+    # Growth potential
+    growth = np.minimum(1.0, _sum_columns(_count_hits(found_sets, GROWTH_INDICATORS)) * 0.3)
+
+    # Location and salary from onboarding
+    location = np.full(n, 0.5)
+    salary = np.full(n, 0.5)
+    if onboarding_profile:
+        if onboarding_profile.preferred_cities:
+            cities = [city.lower() for city in onboarding_profile.preferred_cities]
+            in_city = _mask(any(city in _area_name(vacancy) for city in cities) for vacancy in vacancies)
+            location = np.where(in_city, 1.0, location)
+
+        if onboarding_profile.min_salary:
+            has_salary = _mask(bool(vacancy.get("salary", {})) for vacancy in vacancies)
+            salary_from = _numbers((vacancy.get("salary") or {}).get("from") for vacancy in vacancies)
+            with np.errstate(invalid="ignore"):
+                from_ok = _truthy(salary_from) & (salary_from >= onboarding_profile.min_salary)
+            salary = np.where(has_salary, np.where(from_ok, 1.0, 0.3), salary)
+
+    relevance = (
+        strength * ASSESSMENT_WEIGHTS["strength_match_score"] +
+        job_fit * ASSESSMENT_WEIGHTS["job_fit_score"] +
+        growth * ASSESSMENT_WEIGHTS["growth_potential_score"] +
+        location * ASSESSMENT_WEIGHTS["location_score"] +
+        salary * ASSESSMENT_WEIGHTS["salary_score"]
+    )
+
+    return _to_dicts({
+        "strength_match_score": strength,
+        "job_fit_score": job_fit,
+        "growth_potential_score": growth,
+        "relevance_score": relevance
+    })
@@ -0,0 +1,258 @@
+"""
+Token-budgeted prompt context for the assistant chat.
+
+Every prompt stays within ``chat_context_max_tokens``. The system prompt and
+the new message always go in (the message is cut if it alone would not fit).
+History is then added from the newest message backwards until the budget is
+spent. Long history messages are cut to ``chat_context_message_max_tokens``.
+
+Turns that no longer fit are folded into a rolling summary stored on
+``ChatHistory`` (``summary`` and ``summary_until_message_id``). The summary is
+sent in their place. ``refresh_chat_summary`` updates it incrementally after a
+reply has been saved, outside the request's critical path. A refresh is due once
+the unsummarized turns use ``chat_summary_keep_ratio`` of the budget or reach
+``chat_context_max_messages``, and folds them down to the lower
+``chat_summary_target_ratio`` and half the messages, so the summarizer runs once
+every several turns rather than on each one.
+
+Tokens are counted with tiktoken when it is installed; otherwise a conservative
+length-based estimate is used.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import select, update
+
+from ..config import settings
+from ..models.chat import ChatHistory, Message, MessageRole
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separators the chat format adds to each message
+TRUNCATION_MARKER = "\n[…]\n"
+SUMMARY_PREFIX = "Краткое содержание предыдущей части разговора:\n"
+SUMMARY_TURN_MAX_TOKENS = 400  # Per folded message in the summarization prompt
+MIN_MESSAGE_TOKENS = 256  # The new message is never cut below this
+
+_ROLES = {MessageRole.USER: "user", MessageRole.AI: "assistant"}
+_ROLE_LABELS = {"user": "Пользователь", "assistant": "Ассистент"}
+
+Summarizer = Callable[[Optional[str], List[Dict[str, str]]], Awaitable[Optional[str]]]
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(settings.chat_tokenizer_encoding)
+    except Exception as e:
+        # Not installed, or the encoding file cannot be fetched
+        logger.warning(f"tiktoken unavailable ({e}), estimating tokens from text length")
+        return None
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 2) // 3  # Russian and Kazakh text averages about 3 characters per token
+    return len(encoding.encode(text, disallowed_special=()))
+
+def message_tokens(content: str) -> int:
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to ``max_tokens``, keeping its beginning and end"""
+
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    keep = max(max_tokens - count_tokens(TRUNCATION_MARKER), 0)
+    head = keep * 2 // 3
+    tail = keep - head
+
+    encoding = _encoding()
+    if encoding is None:
+        return text[:head * 3] + TRUNCATION_MARKER + (text[-tail * 3:] if tail else "")
+
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode(tokens[:head]) + TRUNCATION_MARKER + (encoding.decode(tokens[-tail:]) if tail else "")
+
+def history_budget(system_prompt: str) -> int:
+    """Tokens left for history and the new message once the system prompt and a summary are in"""
+    reserved = message_tokens(system_prompt) + settings.chat_summary_max_tokens + count_tokens(SUMMARY_PREFIX) + MESSAGE_OVERHEAD_TOKENS
+    return max(settings.chat_context_max_tokens - reserved, 0)
+
+def _turn(message: Message) -> Optional[Dict[str, str]]:
+    role = _ROLES.get(message.role)
+    if role is None:
+        return None
+    return {"role": role, "content": truncate_to_tokens(message.content, settings.chat_context_message_max_tokens)}
+
+def build_context(
+    system_prompt: str,
+    history: Sequence[Message],
+    user_content: str,
+    summary: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """Prompt messages within the token budget; ``history`` is chronological and excludes the new message"""
+
+    budget = history_budget(system_prompt)
+    user_content = truncate_to_tokens(user_content, max(budget - MESSAGE_OVERHEAD_TOKENS, MIN_MESSAGE_TOKENS))
+    remaining = budget - message_tokens(user_content)
+
+    selected = []
+    for message in reversed(history):
+        turn = _turn(message)
+        if turn is None:
+            continue
+        cost = message_tokens(turn["content"])
+        if cost > remaining:
+            break
+        selected.append(turn)
+        remaining -= cost
+    selected.reverse()
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary:
+        messages.append({"role": "system", "content": SUMMARY_PREFIX + summary})
+    messages.extend(selected)
+    messages.append({"role": "user", "content": user_content})
+
+    omitted = sum(1 for message in history if message.role in _ROLES) - len(selected)
+    if omitted:
+        logger.info(f"Chat context: {omitted} older messages did not fit the {settings.chat_context_max_tokens} token budget")
+    return messages
+
+def needs_summary(system_prompt: str, history: Sequence[Message], new_contents: Sequence[str]) -> bool:
+    """Whether the unsummarized turns (plus the ones just added) outgrew the share of the budget they may use unfolded"""
+
+    if not settings.chat_summary_enabled:
+        return False
+    if len(history) >= settings.chat_context_max_messages:
+        return True
+
+    used = sum(message_tokens(turn["content"]) for turn in map(_turn, history) if turn is not None)
+    used += sum(message_tokens(content) for content in new_contents)
+    return used > history_budget(system_prompt) * settings.chat_summary_keep_ratio
+
+def summary_prompt(previous_summary: Optional[str], turns: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Messages asking the model to extend ``previous_summary`` with ``turns``"""
+
+    transcript = "\n".join(f"{_ROLE_LABELS[turn['role']]}: {turn['content']}" for turn in turns)
+    instructions = (
+        "You maintain a running summary of a conversation between a user and a career assistant. "
+        "Update the summary with the new part of the conversation. Keep facts about the user "
+        "(skills, experience, goals, constraints, disabilities they mentioned), advice already given, "
+        "decisions and open questions. Write in the language of the conversation, "
+        f"in at most {settings.chat_summary_max_tokens * 2 // 3} words. Reply with the summary only."
+    )
+    content = f"Current summary:\n{previous_summary or '(empty)'}\n\nNew part of the conversation:\n{transcript}"
+    return [{"role": "system", "content": instructions}, {"role": "user", "content": content}]
+
+def extractive_summary(previous_summary: Optional[str], turns: List[Dict[str, str]]) -> str:
+    """Fallback summary without a model: the start of every folded turn, newest lines kept within the limit"""
+
+    lines = previous_summary.split("\n") if previous_summary else []
+    for turn in turns:
+        first_line = turn["content"].strip().split("\n", 1)[0]
+        lines.append(f"{_ROLE_LABELS[turn['role']]}: {truncate_to_tokens(first_line, 60)}")
+
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > settings.chat_summary_max_tokens:
+        lines.pop(0)
+    return truncate_to_tokens("\n".join(lines), settings.chat_summary_max_tokens)
+
+def _summary_unchanged(summarized_until: int):
+    if summarized_until:
+        return ChatHistory.summary_until_message_id == summarized_until
+    return ChatHistory.summary_until_message_id.is_(None)
+
+async def refresh_chat_summary(
+    session_factory,
+    chat_history_id: int,
+    system_prompt: str,
+    summarize: Optional[Summarizer] = None
+) -> bool:
+    """
+    Fold the oldest unsummarized turns of a chat into its summary so the rest fits
+    ``chat_summary_target_ratio`` of the history budget and half of
+    ``chat_context_max_messages``. Returns True if the summary changed.
+    The database is not used while ``summarize`` runs.
+    """
+
+    keep_budget = history_budget(system_prompt) * settings.chat_summary_target_ratio
+    keep_messages = max(settings.chat_context_max_messages // 2, 1)
+    fold_budget = settings.chat_context_max_tokens  # Input cap per refresh; the rest is folded next time
+
+    async with session_factory() as db:
+        chat = await db.get(ChatHistory, chat_history_id)
+        if chat is None:
+            return False
+        previous_summary = chat.summary
+        summarized_until = chat.summary_until_message_id or 0
+
+        newest = (await db.execute(
+            select(Message)
+            .where(Message.chat_history_id == chat_history_id)
+            .where(Message.id > summarized_until)
+            .order_by(Message.id.desc())
+            .limit(settings.chat_context_max_messages)
+        )).scalars().all()
+
+        # Newest turns that fit the kept share stay verbatim (always at least one); older ones are folded
+        kept_from = None
+        used = 0
+        for kept, message in enumerate(newest, 1):
+            turn = _turn(message)
+            used += message_tokens(turn["content"]) if turn is not None else 0
+            if used > keep_budget or kept > keep_messages:
+                break
+            kept_from = message.id
+        else:
+            return False
+        boundary_id = kept_from if kept_from is not None else newest[0].id
+
+        older = (await db.execute(
+            select(Message)
+            .where(Message.chat_history_id == chat_history_id)
+            .where(Message.id > summarized_until)
+            .where(Message.id < boundary_id)
+            .order_by(Message.id)
+            .limit(settings.chat_context_max_messages)
+        )).scalars().all()
+
+    turns = []
+    folded_until = summarized_until
+    spent = 0
+    for message in older:
+        turn = _turn(message)
+        if turn is not None:
+            turn["content"] = truncate_to_tokens(turn["content"], SUMMARY_TURN_MAX_TOKENS)
+            spent += message_tokens(turn["content"])
+            if turns and spent > fold_budget:
+                break
+            turns.append(turn)
+        folded_until = message.id
+    if folded_until == summarized_until:
+        return False
+
+    summary = await summarize(previous_summary, turns) if summarize is not None and turns else None
+    if summary:
+        summary = truncate_to_tokens(summary.strip(), settings.chat_summary_max_tokens)
+    else:
+        summary = extractive_summary(previous_summary, turns)
+
+    # Only apply on top of the summary this was built from; a concurrent refresh may have won
+    async with session_factory() as db:
+        result = await db.execute(
+            update(ChatHistory)
+            .where(ChatHistory.id == chat_history_id)
+            .where(_summary_unchanged(summarized_until))
+            .values(summary=summary, summary_until_message_id=folded_until)
+        )
+        await db.commit()
+
+    applied = (result.rowcount or 0) > 0
+    if applied:
+        logger.info(f"Chat {chat_history_id}: summary now covers messages up to {folded_until} ({len(turns)} folded)")
+    return applied
@@ -1,19 +1,30 @@
 import httpx
-import asyncio
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from ..models.user import User
 from ..models.onboarding import OnboardingProfile
 from ..models.assessment import AssessmentResult
 from ..models.job import JobRecommendation, UserJobPreferences
 from ..schemas.job import PersonalizedJobSearchRequest
+from .batch_scorer import score_onboarding_batch, score_assessment_batch
+from .search_cache import search_vacancies
+from .vacancy_fetcher import VacancyDetailFetcher
 
 logger = logging.getLogger(__name__)
 
+# Largest page the search params allow
+CHANGED_VACANCIES_PAGE_SIZE = 50
+
+def format_hh_date(value: datetime) -> str:
+    """Format a timestamp for HH date filters (ISO 8601, naive values are UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.strftime("%Y-%m-%dT%H:%M:%S%z")
+
 class EnhancedRecommendation:
     """Enhanced recommendation with source information"""
     def __init__(self, vacancy: Dict[str, Any], scores: Dict[str, float], source: str, accept_handicapped_filter: bool = False):
@@ -27,12 +38,7 @@ class EnhancedHeadHunterService:
     """Enhanced HeadHunter service with dual recommendation blocks and accessibility filters"""
     
     def __init__(self):
-        self.base_url = "https://api.hh.kz"
-        self.headers = {
-            "User-Agent": "AI-Komekshi Job Platform Parser",
-            "Accept": "application/json"
-        }
-        self.timeout = 30.0
+        self.detail_fetcher = VacancyDetailFetcher()
         
         # Kazakhstan area mapping
         self.area_mapping = {
@@ -83,49 +89,55 @@ class EnhancedHeadHunterService:
         db: AsyncSession,
         page: int = 0,
         per_page: int = 20,
-        disable_filters: bool = False
+        disable_filters: bool = False,
+        vacancies: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, List[EnhancedRecommendation]]:
         """
         Get dual recommendations: onboarding-based and assessment-based
         Returns dict with 'personal' and 'assessment' recommendation lists
+        Given ``vacancies`` (e.g. from ``search_changed_vacancies``) are scored instead of
+        searching, all of them rather than only the top of the page
         """
         
         logger.info(f"Getting dual recommendations for user {user.id}")
         
-        # Get user data
+        # Get user data (assessment results are not used for scoring)
         onboarding_profile = await self._get_onboarding_profile(user, db)
-        assessment_result = await self._get_latest_assessment(user, db)
         
-        # Build search parameters only for onboarding block (exclude assessment as per requirements)
-        onboarding_params = await self._build_onboarding_search_params(onboarding_profile, page, per_page)
-
-        # Add inclusive filters (unless disabled)
-        if not disable_filters:
-            onboarding_params = self._add_inclusive_filters(onboarding_params, onboarding_profile)
+        if vacancies is not None:
+            onboarding_detailed = await self._get_detailed_vacancies(vacancies)
+        else:
+            # Build search parameters only for onboarding block (exclude assessment as per requirements)
+            onboarding_params = await self.build_personal_search_params(
+                onboarding_profile, page, per_page, disable_filters
+            )
 
-        # Log the parameters for debugging
-        logger.info(f"Onboarding search params: {onboarding_params}")
+            # Log the parameters for debugging
+            logger.info(f"Onboarding search params: {onboarding_params}")
 
-        # Search HH API only for onboarding
-        onboarding_vacancies = await self._search_hh_api(onboarding_params)
+            # Search HH API only for onboarding
+            onboarding_vacancies = await self._search_hh_api(onboarding_params)
 
-        # Handle potential errors
-        if isinstance(onboarding_vacancies, Exception):
-            logger.error(f"Error fetching onboarding recommendations: {onboarding_vacancies}")
-            onboarding_vacancies = []
-        else:
-            onboarding_vacancies = onboarding_vacancies or []
+            # Handle potential errors
+            if isinstance(onboarding_vacancies, Exception):
+                logger.error(f"Error fetching onboarding recommendations: {onboarding_vacancies}")
+                onboarding_vacancies = []
+            else:
+                onboarding_vacancies = onboarding_vacancies or []
 
-        # Get detailed info for top vacancies
-        onboarding_detailed = await self._get_detailed_vacancies(onboarding_vacancies[:10])
+            # Get detailed info for top vacancies
+            onboarding_detailed = await self._get_detailed_vacancies(onboarding_vacancies[:10])
 
         # Score and create recommendations
         personal_recommendations = []
         assessment_recommendations = []  # Empty as per requirements - do not use assessment
 
-        # Process onboarding-based recommendations
-        for vacancy in onboarding_detailed:
-            scores = await self._calculate_recommendation_scores(vacancy, onboarding_profile, assessment_result)
+        # Process onboarding-based recommendations, scoring the whole batch at once
+        vacancy_texts = [self._get_vacancy_text(vacancy).lower() for vacancy in onboarding_detailed]
+        batch_scores = score_onboarding_batch(
+            onboarding_detailed, vacancy_texts, onboarding_profile, self.experience_mapping
+        )
+        for vacancy, scores in zip(onboarding_detailed, batch_scores):
             recommendation = EnhancedRecommendation(vacancy, scores, "onboarding", accept_handicapped_filter=True)
             personal_recommendations.append(recommendation)
 
@@ -139,6 +151,60 @@ class EnhancedHeadHunterService:
             "assessment": assessment_recommendations
         }
 
+    async def search_changed_vacancies(
+        self,
+        onboarding_profile: Optional[OnboardingProfile],
+        date_from: datetime,
+        max_vacancies: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Every personal-search vacancy published or updated since ``date_from``, paging
+        through the result until it is exhausted. Returns None when more than
+        ``max_vacancies`` changed or a page could not be fetched; nothing is left out silently.
+        """
+
+        vacancies: List[Dict[str, Any]] = []
+        page = 0
+
+        while True:
+            params = await self.build_personal_search_params(onboarding_profile, page, CHANGED_VACANCIES_PAGE_SIZE)
+            params["date_from"] = format_hh_date(date_from)
+            self._ensure_search_criteria(params)
+
+            try:
+                data = await search_vacancies(params)
+            except httpx.RequestError as e:
+                logger.error(f"Network error searching changed vacancies: {e}")
+                return None
+
+            if data is None:
+                return None
+            if (data.get("found") or 0) > max_vacancies:
+                logger.info(f"{data.get('found')} vacancies changed since {params['date_from']}, more than {max_vacancies}")
+                return None
+
+            vacancies.extend(data.get("items", []))
+            page += 1
+            if page >= (data.get("pages") or 0):
+                logger.info(f"{len(vacancies)} vacancies changed since {params['date_from']}")
+                return vacancies
+
+    async def build_personal_search_params(
+        self,
+        onboarding_profile: Optional[OnboardingProfile],
+        page: int = 0,
+        per_page: int = 20,
+        disable_filters: bool = False
+    ) -> Dict[str, Any]:
+        """Search parameters of the personal (onboarding) block"""
+
+        params = await self._build_onboarding_search_params(onboarding_profile, page, per_page)
+
+        # Add inclusive filters (unless disabled)
+        if not disable_filters:
+            params = self._add_inclusive_filters(params, onboarding_profile)
+        return params
+
     def _add_inclusive_filters(self, params: Dict[str, Any], onboarding_profile: Optional[OnboardingProfile]) -> Dict[str, Any]:
         """Add mandatory inclusive filters to search parameters"""
         
@@ -234,8 +300,8 @@ class EnhancedHeadHunterService:
             if len(current_clean) > 2 and current_clean.lower() not in ["безработный", "студент", "не работаю"]:
                 search_terms.append(current_clean)
         
-        # Remove duplicates and ensure we have search terms
-        search_terms = list(set(search_terms))
+        # Remove duplicates in a stable order (the query identifies the user's search cursor)
+        search_terms = list(dict.fromkeys(search_terms))
         
         if search_terms:
             # Limit to reasonable number of terms to avoid too complex queries
@@ -347,13 +413,55 @@ class EnhancedHeadHunterService:
             params["salary"] = onboarding_profile.min_salary
         
         if search_terms:
-            params["text"] = " OR ".join(list(set(search_terms))[:10])  # Unique terms, max 10
+            # Unique terms in a stable order, max 10, so equal profiles produce equal queries
+            params["text"] = " OR ".join(list(dict.fromkeys(search_terms))[:10])
         
         return params
 
     async def _search_hh_api(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Search HeadHunter API with given parameters"""
         
+        self._ensure_search_criteria(params)
+
+        try:
+            logger.info(f"HH API search params: {params}")
+
+            # Identical searches from similar profiles are served from the shared search cache
+            data = await search_vacancies(params)
+            if data is None:
+                return []
+
+            vacancies = data.get("items", [])
+            logger.info(f"HH API returned {len(vacancies)} vacancies for params: {params}")
+            
+            # If no results and we have restrictive filters, try broader search
+            if len(vacancies) == 0 and (params.get("accept_handicapped") or params.get("label")):
+                logger.info("No results with inclusive filters, trying broader search...")
+                
+                # Create params without restrictive filters
+                broader_params = params.copy()
+                broader_params.pop("accept_handicapped", None)
+                broader_params.pop("label", None)
+                
+                # Try again with broader search
+                broader_data = await search_vacancies(broader_params)
+                
+                if broader_data is not None:
+                    vacancies = broader_data.get("items", [])
+                    logger.info(f"Broader search returned {len(vacancies)} vacancies")
+            
+            return vacancies
+                
+        except httpx.RequestError as e:
+            logger.error(f"Network error calling HH API: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Unexpected error calling HH API: {e}")
+            return []
+
+    def _ensure_search_criteria(self, params: Dict[str, Any]) -> None:
+        """Fill in the minimum search criteria HH needs"""
+
         # Ensure we have minimum search criteria
         if not params.get("text") and not params.get("area"):
             logger.warning("No search text or area provided, using fallback search")
@@ -364,91 +472,11 @@ class EnhancedHeadHunterService:
         if not params.get("area"):
             params["area"] = "40"  # Kazakhstan
 
-        async with httpx.AsyncClient() as client:
-            try:
-                # Log the request URL for debugging
-                request_url = client.build_request("GET", self.base_url + "/vacancies", params=params).url
-                logger.info(f"HH API Request URL: {request_url}")
-
-                response = await client.get(
-                    self.base_url + "/vacancies",
-                    params=params,
-                    headers=self.headers,
-                    timeout=self.timeout
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    vacancies = data.get("items", [])
-                    logger.info(f"HH API returned {len(vacancies)} vacancies for params: {params}")
-                    
-                    # If no results and we have restrictive filters, try broader search
-                    if len(vacancies) == 0 and (params.get("accept_handicapped") or params.get("label")):
-                        logger.info("No results with inclusive filters, trying broader search...")
-                        
-                        # Create params without restrictive filters
-                        broader_params = params.copy()
-                        broader_params.pop("accept_handicapped", None)
-                        broader_params.pop("label", None)
-                        
-                        # Try again with broader search
-                        broader_response = await client.get(
-                            self.base_url + "/vacancies",
-                            params=broader_params,
-                            headers=self.headers,
-                            timeout=self.timeout
-                        )
-                        
-                        if broader_response.status_code == 200:
-                            broader_data = broader_response.json()
-                            vacancies = broader_data.get("items", [])
-                            logger.info(f"Broader search returned {len(vacancies)} vacancies")
-                    
-                    return vacancies
-                else:
-                    logger.error(f"HH API error: {response.status_code} - {response.text}")
-                    return []
-                    
-            except httpx.RequestError as e:
-                logger.error(f"Network error calling HH API: {e}")
-                return []
-            except Exception as e:
-                logger.error(f"Unexpected error calling HH API: {e}")
-                return []
-
     async def _get_detailed_vacancies(self, vacancies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Get detailed information for top vacancies"""
         
-        if not vacancies:
-            return []
-        
-        detailed_vacancies = []
-        
-        # Get detailed info for each vacancy
-        async with httpx.AsyncClient() as client:
-            for vacancy in vacancies:
-                try:
-                    response = await client.get(
-                        f"{self.base_url}/vacancies/{vacancy['id']}",
-                        headers=self.headers,
-                        timeout=self.timeout
-                    )
-                    
-                    if response.status_code == 200:
-                        detailed_vacancy = response.json()
-                        detailed_vacancies.append(detailed_vacancy)
-                    else:
-                        # If detailed fetch fails, use basic info
-                        detailed_vacancies.append(vacancy)
-                        
-                except Exception as e:
-                    logger.error(f"Error fetching detailed vacancy {vacancy.get('id')}: {e}")
-                    detailed_vacancies.append(vacancy)
-                
-                # Add small delay to respect API limits
-                await asyncio.sleep(0.1)
-        
-        return detailed_vacancies
+        # Details are fetched concurrently; failed fetches fall back to the search snippet
+        return await self.detail_fetcher.fetch_details(vacancies)
 
     async def _calculate_recommendation_scores(
         self, 
@@ -458,77 +486,8 @@ class EnhancedHeadHunterService:
     ) -> Dict[str, float]:
         """Calculate recommendation scores based on onboarding data"""
         
-        scores = {
-            "skills_match_score": 0.0,
-            "location_match_score": 0.0,
-            "salary_match_score": 0.0,
-            "experience_match_score": 0.0,
-            "relevance_score": 0.0
-        }
-        
-        if not onboarding_profile:
-            return scores
-        
-        # Skills matching
-        if onboarding_profile.skills:
-            vacancy_text = self._get_vacancy_text(vacancy).lower()
-            skill_matches = sum(1 for skill in onboarding_profile.skills if skill.lower() in vacancy_text)
-            if len(onboarding_profile.skills) > 0:
-                scores["skills_match_score"] = skill_matches / len(onboarding_profile.skills)
-        else:
-            scores["skills_match_score"] = 0.3  # Neutral score if no skills specified
-        
-        # Location matching
-        if onboarding_profile.preferred_cities:
-            vacancy_area = vacancy.get("area", {})
-            area_name = vacancy_area.get("name", "").lower() if vacancy_area else ""
-            
-            for city in onboarding_profile.preferred_cities:
-                if city.lower() in area_name:
-                    scores["location_match_score"] = 1.0
-                    break
-            else:
-                scores["location_match_score"] = 0.5  # Neutral if no match
-        else:
-            scores["location_match_score"] = 0.5 # Neutral if no cities specified
-        
-        # Salary matching
-        if onboarding_profile.min_salary:
-            vacancy_salary = vacancy.get("salary", {})
-            if vacancy_salary:
-                salary_from = vacancy_salary.get("from")
-                salary_to = vacancy_salary.get("to")
-                
-                if salary_from and salary_from >= onboarding_profile.min_salary:
-                    scores["salary_match_score"] = 1.0
-                elif salary_to and salary_to >= onboarding_profile.min_salary:
-                    scores["salary_match_score"] = 0.7
-                else:
-                    scores["salary_match_score"] = 0.3
-        else:
-            scores["salary_match_score"] = 0.5 # Neutral score if no salary specified
-        
-        # Experience matching
-        if onboarding_profile.experience_level:
-            vacancy_experience = vacancy.get("experience", {})
-            if vacancy_experience:
-                exp_id = vacancy_experience.get("id", "")
-                if exp_id == self.experience_mapping.get(onboarding_profile.experience_level):
-                    scores["experience_match_score"] = 1.0
-                else:
-                    scores["experience_match_score"] = 0.6  # Partial match
-        
-        # Overall relevance score (weighted average)
-        weights = {
-            "skills_match_score": 0.4,
-            "location_match_score": 0.2,
-            "salary_match_score": 0.2,
-            "experience_match_score": 0.2
-        }
-        
-        scores["relevance_score"] = sum(scores[key] * weight for key, weight in weights.items())
-        
-        return scores
+        vacancy_text = self._get_vacancy_text(vacancy).lower()
+        return score_onboarding_batch([vacancy], [vacancy_text], onboarding_profile, self.experience_mapping)[0]
 
     async def _calculate_assessment_scores(
         self, 
@@ -538,105 +497,8 @@ class EnhancedHeadHunterService:
     ) -> Dict[str, float]:
         """Calculate recommendation scores based on assessment results"""
         
-        scores = {
-            "strength_match_score": 0.0,
-            "job_fit_score": 0.0,
-            "growth_potential_score": 0.0,
-            "relevance_score": 0.0
-        }
-        
         vacancy_text = self._get_vacancy_text(vacancy).lower()
-        
-        # Strength matching - how well job matches user's strengths
-        strength_keywords = {
-            "technical": ["программирование", "разработка", "код", "техническ", "IT", "анализ"],
-            "communication": ["общение", "презентац", "клиент", "продаж", "переговор", "коммуникац"],
-            "problem_solving": ["решение", "анализ", "исследование", "проблем", "задач", "логик"],
-            "learning": ["обучение", "развитие", "изучение", "новы", "рост", "карьер"],
-            "work_style": ["команд", "лидерство", "управление", "организац", "координац"],
-            "creativity": ["творческ", "креатив", "дизайн", "идеи", "инновац"],
-            "leadership": ["руководство", "управление", "лидер", "директор", "менеджер"]
-        }
-        
-        strength_matches = 0
-        total_strengths = len(assessment_result.top_strengths)
-        
-        for strength in assessment_result.top_strengths:
-            if isinstance(strength, dict):
-                category = strength.get("category", "")
-            else:
-                category = getattr(strength, "category", "")
-            
-            if category in strength_keywords:
-                keywords = strength_keywords[category]
-                if any(keyword in vacancy_text for keyword in keywords):
-                    strength_matches += 1
-        
-        if total_strengths > 0:
-            scores["strength_match_score"] = strength_matches / total_strengths
-        
-        # Job fit score based on overall assessment score
-        if assessment_result.overall_score:
-            # Higher overall score suggests better fit for challenging roles
-            vacancy_complexity_indicators = ["опыт", "руководител", "senior", "lead", "главный"]
-            complexity_score = sum(1 for indicator in vacancy_complexity_indicators if indicator in vacancy_text)
-            
-            if assessment_result.overall_score >= 7.0:  # High scorer
-                scores["job_fit_score"] = min(1.0, 0.6 + (complexity_score * 0.2))
-            elif assessment_result.overall_score >= 5.0:  # Medium scorer
-                scores["job_fit_score"] = 0.7
-            else:  # Lower scorer - better for entry level
-                entry_level_indicators = ["junior", "стажер", "начинающ", "без опыта"]
-                if any(indicator in vacancy_text for indicator in entry_level_indicators):
-                    scores["job_fit_score"] = 0.8
-                else:
-                    scores["job_fit_score"] = 0.5
-        
-        # Growth potential score
-        growth_indicators = ["развитие", "карьер", "обучение", "тренинг", "рост", "возможност"]
-        growth_score = sum(1 for indicator in growth_indicators if indicator in vacancy_text)
-        scores["growth_potential_score"] = min(1.0, growth_score * 0.3)
-        
-        # Add location and salary from onboarding if available
-        location_score = 0.5  # Default neutral
-        salary_score = 0.5    # Default neutral
-        
-        if onboarding_profile:
-            if onboarding_profile.preferred_cities:
-                vacancy_area = vacancy.get("area", {})
-                area_name = vacancy_area.get("name", "").lower() if vacancy_area else ""
-                for city in onboarding_profile.preferred_cities:
-                    if city.lower() in area_name:
-                        location_score = 1.0
-                        break
-            
-            if onboarding_profile.min_salary:
-                vacancy_salary = vacancy.get("salary", {})
-                if vacancy_salary:
-                    salary_from = vacancy_salary.get("from")
-                    if salary_from and salary_from >= onboarding_profile.min_salary:
-                        salary_score = 1.0
-                    else:
-                        salary_score = 0.3
-        
-        # Overall relevance score (weighted average)
-        weights = {
-            "strength_match_score": 0.4,
-            "job_fit_score": 0.3,
-            "growth_potential_score": 0.1,
-            "location_score": 0.1,
-            "salary_score": 0.1
-        }
-        
-        scores["relevance_score"] = (
-            scores["strength_match_score"] * weights["strength_match_score"] +
-            scores["job_fit_score"] * weights["job_fit_score"] +
-            scores["growth_potential_score"] * weights["growth_potential_score"] +
-            location_score * weights["location_score"] +
-            salary_score * weights["salary_score"]
-        )
-        
-        return scores
+        return score_assessment_batch([vacancy], [vacancy_text], assessment_result, onboarding_profile)[0]
 
     def _get_vacancy_text(self, vacancy: Dict[str, Any]) -> str:
         """Extract all text from vacancy for analysis"""
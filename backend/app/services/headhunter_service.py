@@ -16,6 +16,11 @@ from ..schemas.job import (
     JobRecommendationCreate, HHSearchRequest, PersonalizedJobSearchRequest,
     UserJobPreferencesCreate
 )
+from ..utils.skill_matcher import extract_skills, skill_match_weight
+from .batch_scorer import score_preferences_batch
+from .recommendation_invalidation import enqueue_recommendation_refresh, mark_recommendations_stale
+from .recommendation_store import upsert_recommendations
+from .search_cache import search_vacancies
 
 logger = logging.getLogger(__name__)
 
@@ -23,13 +28,6 @@ class HeadHunterService:
     """Service for HeadHunter API integration and personalized job recommendations"""
     
     def __init__(self):
-        self.base_url = "https://api.hh.kz"
-        self.headers = {
-            "User-Agent": "AI-Komekshi Job Platform Parser",
-            "Accept": "application/json"
-        }
-        self.timeout = 30.0
-        
         # Kazakhstan area mapping (can be expanded)
         self.area_mapping = {
             "almaty": "160",
@@ -95,48 +93,37 @@ class HeadHunterService:
             logger.warning(f"No vacancies found for user {user.id}")
             return []
         
+        # Score the whole page at once; malformed data falls back to per-vacancy scoring
+        try:
+            batch_scores = score_preferences_batch(hh_vacancies, user_preferences)
+        except Exception as e:
+            logger.error(f"Batch scoring failed, scoring vacancies one by one: {e}")
+            batch_scores = None
+        
         # Process and score vacancies
-        recommendations = []
-        for vacancy in hh_vacancies:
+        recommendation_rows = []
+        for index, vacancy in enumerate(hh_vacancies):
             try:
                 # Score the vacancy against user profile
-                scores = await self._calculate_recommendation_scores(
-                    vacancy, user, user_preferences, db
-                )
+                if batch_scores is not None:
+                    scores = batch_scores[index]
+                else:
+                    scores = await self._calculate_recommendation_scores(
+                        vacancy, user, user_preferences, db
+                    )
                 
                 # Create recommendation object
                 recommendation_data = await self._create_recommendation_from_vacancy(
                     vacancy, user.id, scores  # type: ignore
                 )
-                
-                # Check if we already have this recommendation
-                existing = await db.execute(
-                    select(JobRecommendation).where(
-                        and_(
-                            JobRecommendation.user_id == user.id,
-                            JobRecommendation.hh_vacancy_id == vacancy["id"]
-                        )
-                    )
-                )
-                existing_rec = existing.scalar_one_or_none()
-                
-                if existing_rec:
-                    # Update existing recommendation
-                    for key, value in recommendation_data.items():
-                        if key not in ["user_id", "hh_vacancy_id"]:
-                            setattr(existing_rec, key, value)
-                    existing_rec.updated_at = datetime.utcnow()  # type: ignore
-                    recommendations.append(existing_rec)
-                else:
-                    # Create new recommendation
-                    new_recommendation = JobRecommendation(**recommendation_data)
-                    db.add(new_recommendation)
-                    recommendations.append(new_recommendation)
+                recommendation_rows.append(recommendation_data)
                     
             except Exception as e:
                 logger.error(f"Error processing vacancy {vacancy.get('id', 'unknown')}: {e}")
                 continue
         
+        # Insert new recommendations and refresh existing ones in a single statement
+        recommendations = await upsert_recommendations(db, recommendation_rows)
         await db.commit()
         
         # Sort by relevance score
@@ -316,23 +303,15 @@ class HeadHunterService:
         """Search HeadHunter API with given parameters"""
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/vacancies",
-                    params=params,
-                    headers=self.headers,
-                    timeout=self.timeout
-                )
+            # Identical searches from similar profiles are served from the shared search cache
+            data = await search_vacancies(params)
+            if data is None:
+                return []
+
+            vacancies = data.get("items", [])
+            logger.info(f"HH API returned {len(vacancies)} vacancies")
+            return vacancies
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    vacancies = data.get("items", [])
-                    logger.info(f"HH API returned {len(vacancies)} vacancies")
-                    return vacancies
-                else:
-                    logger.error(f"HH API error: {response.status_code} - {response.text}")
-                    return []
-                    
         except httpx.RequestError as e:
             logger.error(f"Network error calling HH API: {e}")
             return []
@@ -349,85 +328,7 @@ class HeadHunterService:
     ) -> Dict[str, float]:
         """Calculate recommendation scores for a vacancy"""
         
-        scores = {
-            "skills_match_score": 0.0,
-            "location_match_score": 0.0,
-            "salary_match_score": 0.0,
-            "relevance_score": 0.0
-        }
-        
-        # Skills matching - improved algorithm
-        preferred_skills = getattr(preferences, 'preferred_skills', None)
-        if preferred_skills is not None:
-            vacancy_text = (
-                vacancy.get("name", "") + " " + 
-                (vacancy.get("snippet", {}).get("responsibility", "") or "") + " " +
-                (vacancy.get("snippet", {}).get("requirement", "") or "")
-            ).lower()
-            
-            skill_matches = 0
-            total_skill_weight = 0
-            
-            for skill in preferred_skills:
-                skill_weight = await self._calculate_skill_match_weight(skill.lower(), vacancy_text)
-                skill_matches += skill_weight
-                total_skill_weight += 1
-            
-            if len(preferred_skills) > 0:
-                scores["skills_match_score"] = min(skill_matches / total_skill_weight, 1.0)
-        
-        # Location matching
-        vacancy_area = vacancy.get("area", {})
-        if vacancy_area:
-            area_id = str(vacancy_area.get("id", ""))
-            area_name = vacancy_area.get("name", "").lower()
-            
-            preferred_areas = getattr(preferences, 'preferred_areas', None)
-            remote_work_preference = getattr(preferences, 'remote_work_preference', 'any')
-            
-            if preferred_areas is not None and area_id in preferred_areas:
-                scores["location_match_score"] = 1.0
-            elif remote_work_preference == "only":
-                # Check if it's a remote job
-                if any(word in vacancy.get("name", "").lower() for word in ["удаленн", "remote", "дистанц"]):
-                    scores["location_match_score"] = 1.0
-                else:
-                    scores["location_match_score"] = 0.2
-            else:
-                scores["location_match_score"] = 0.5  # Neutral if no specific preference
-        
-        # Salary matching
-        vacancy_salary = vacancy.get("salary")
-        preferred_salary_min = getattr(preferences, 'preferred_salary_min', None)
-        if vacancy_salary and preferred_salary_min is not None:
-            salary_from = vacancy_salary.get("from")
-            salary_to = vacancy_salary.get("to")
-            
-            if salary_from or salary_to:
-                user_min = preferred_salary_min
-                user_max = getattr(preferences, 'preferred_salary_max', None)
-                
-                if salary_from and salary_from >= user_min:
-                    scores["salary_match_score"] = 0.8
-                    if user_max is not None and salary_from <= user_max:
-                        scores["salary_match_score"] = 1.0
-                elif salary_to and salary_to >= user_min:
-                    scores["salary_match_score"] = 0.6
-                else:
-                    scores["salary_match_score"] = 0.3
-        
-        # Overall relevance score (weighted average)
-        weights = {
-            "skills_match_score": 0.4,
-            "location_match_score": 0.3,
-            "salary_match_score": 0.3
-        }
-        
-        scores["relevance_score"] = sum(
-            scores[key] * weight for key, weight in weights.items()
-        )
-        
-        return scores
+        return score_preferences_batch([vacancy], preferences)[0]
 
     async def _create_recommendation_from_vacancy(
         self,
@@ -492,195 +393,13 @@ class HeadHunterService:
     async def _extract_skills_from_text(self, text: str) -> List[str]:
         """Extract skills from job description text"""
         
-        if not text:
-            return []
-        
-        # Comprehensive skills and technologies dictionary
-        skill_keywords = [
-            # Programming Languages
-            "python", "java", "javascript", "typescript", "c#", "c++", "php", "ruby", "go", "rust",
-            "swift", "kotlin", "scala", "r", "matlab", "perl", "bash", "powershell",
-            
-            # Web Technologies
-            "html", "css", "react", "angular", "vue", "node.js", "express", "django", "flask",
-            "laravel", "spring", "asp.net", "jquery", "bootstrap", "sass", "less",
-            
-            # Databases
-            "sql", "mysql", "postgresql", "oracle", "mongodb", "redis", "elasticsearch",
-            "sqlite", "cassandra", "firebase",
-            
-            # Cloud & DevOps
-            "aws", "azure", "google cloud", "docker", "kubernetes", "jenkins", "gitlab",
-            "terraform", "ansible", "chef", "puppet", "vagrant",
-            
-            # Tools & Frameworks
-            "git", "svn", "jira", "confluence", "slack", "teams", "zoom", "figma", "sketch",
-            "photoshop", "illustrator", "after effects", "premiere", "indesign",
-            
-            # Operating Systems
-            "linux", "windows", "macos", "ubuntu", "centos", "redhat",
-            
-            # Office & Business
-            "excel", "powerpoint", "word", "outlook", "sharepoint", "visio", "project",
-            "1c", "sap", "crm", "erp", "salesforce", "hubspot",
-            
-            # Russian Skills
-            "программирование", "разработка", "тестирование", "администрирование",
-            "маркетинг", "продажи", "менеджмент", "аналитика", "дизайн", "копирайтинг",
-            "переводы", "преподавание", "консультирование", "проектирование",
-            "бухгалтерия", "логистика", "рекрутинг", "hr", "пиар", "реклама",
-            "фотография", "видеомонтаж", "графический дизайн", "веб-дизайн",
-            "контент-менеджмент", "smm", "seo", "контекстная реклама",
-            
-            # Soft Skills (Russian)
-            "коммуникация", "лидерство", "работа в команде", "организация",
-            "планирование", "координация", "переговоры", "презентации",
-            "решение проблем", "креативность", "инновации", "адаптивность",
-            
-            # Industry-specific
-            "медицина", "образование", "финансы", "банки", "страхование",
-            "недвижимость", "строительство", "производство", "логистика",
-            "торговля", "ритейл", "гостиничный бизнес", "туризм", "ресторанный бизнес",
-            
-            # Technical Skills (Russian)
-            "системное администрирование", "сетевое администрирование",
-            "информационная безопасность", "кибербезопасность",
-            "техническая поддержка", "helpdesk", "it поддержка",
-            "обслуживание техники", "ремонт компьютеров", "настройка оборудования",
-            
-            # Creative & Design
-            "ui/ux", "user experience", "user interface", "прототипирование",
-            "wireframing", "брендинг", "типографика", "композиция", "цветоведение",
-            
-            # Data & Analytics
-            "data science", "machine learning", "искусственный интеллект",
-            "big data", "tableau", "power bi", "google analytics", "яндекс метрика",
-            "статистика", "математическое моделирование",
-            
-            # Languages
-            "английский", "немецкий", "французский", "китайский", "корейский",
-            "японский", "испанский", "итальянский", "казахский", "узбекский",
-            
-            # Quality Assurance
-            "manual testing", "automation testing", "selenium", "cypress",
-            "postman", "jmeter", "test planning", "bug tracking",
-            
-            # Project Management
-            "agile", "scrum", "kanban", "waterfall", "pmp", "prince2",
-            "управление проектами", "координация проектов",
-        ]
-        
-        text_lower = text.lower()
-        found_skills = []
-        
-        # Look for exact matches and partial matches
-        for skill in skill_keywords:
-            skill_lower = skill.lower()
-            if skill_lower in text_lower:
-                found_skills.append(skill)
-            # Also check for skills as part of compound words
-            elif any(word in text_lower for word in skill_lower.split() if len(word) > 2):
-                found_skills.append(skill)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_skills = []
-        for skill in found_skills:
-            if skill.lower() not in seen:
-                seen.add(skill.lower())
-                unique_skills.append(skill)
-        
-        return unique_skills[:15]  # Increased limit to capture more skills
+        # Keyword dictionary is compiled once into a single-pass matcher
+        return extract_skills(text, limit=15)
 
     async def _calculate_skill_match_weight(self, user_skill: str, vacancy_text: str) -> float:
         """Calculate how well a user skill matches the vacancy text"""
         
-        # Skill synonyms and translations for better matching
-        skill_synonyms = {
-            # Programming
-            "программирование": ["программирование", "разработка", "coding", "development", "programming", "python", "java", "javascript", "c++", "c#"],
-            "веб-разработка": ["веб-разработка", "web development", "frontend", "backend", "html", "css", "javascript", "react", "angular", "vue"],
-            "разработка": ["разработка", "development", "программирование", "coding", "programming"],
-            "тестирование по": ["тестирование", "testing", "qa", "quality assurance", "автотестирование", "manual testing"],
-            "тестирование": ["тестирование", "testing", "qa", "quality assurance"],
-            
-            # Design
-            "графический дизайн": ["дизайн", "design", "графический", "graphic", "photoshop", "illustrator", "figma", "sketch"],
-            "дизайн": ["дизайн", "design", "ui", "ux", "graphic", "web design", "graphic design"],
-            "фотография": ["фотография", "photography", "photo", "фото"],
-            
-            # Data & Analytics
-            "аналитика данных": ["аналитика", "analytics", "data analysis", "sql", "python", "excel", "bi"],
-            "аналитика": ["аналитика", "analytics", "analysis", "data", "sql", "excel"],
-            "работа с базами данных": ["база данных", "database", "sql", "mysql", "postgresql", "oracle"],
-            
-            # Office & Admin
-            "работа с документами": ["документы", "documents", "word", "excel", "office", "делопроизводство"],
-            "бухгалтерия": ["бухгалтерия", "accounting", "финансы", "finance", "1c"],
-            "ввод данных": ["ввод данных", "data entry", "excel", "обработка данных"],
-            
-            # Sales & Marketing
-            "продажи": ["продажи", "sales", "менеджер по продажам", "торговый представитель"],
-            "маркетинг": ["маркетинг", "marketing", "smm", "реклама", "promotion"],
-            "интернет-маркетинг": ["интернет-маркетинг", "digital marketing", "smm", "seo", "контекстная реклама"],
-            "smm": ["smm", "social media", "социальные сети", "instagram", "facebook", "маркетинг"],
-            
-            # Education
-            "преподавание": ["преподавание", "teaching", "образование", "education", "репетитор", "tutor"],
-            "репетиторство": ["репетиторство", "tutoring", "преподавание", "обучение"],
-            
-            # Service
-            "кулинария": ["кулинария", "cooking", "повар", "chef", "кухня"],
-            "уборка": ["уборка", "cleaning", "клининг", "санитария"],
-            "обслуживание клиентов": ["клиенты", "customer service", "обслуживание", "support"],
-            "работа с клиентами": ["клиенты", "customer", "обслуживание", "support", "менеджер"],
-            
-            # Languages & Communication
-            "коммуникация": ["коммуникация", "communication", "общение", "переговоры"],
-            "английский язык": ["английский", "english", "язык", "language"],
-            "иностранные языки": ["язык", "language", "английский", "немецкий", "китайский"],
-            
-            # Soft skills
-            "работа в команде": ["команда", "team", "teamwork", "collaboration"],
-            "лидерство": ["лидерство", "leadership", "управление", "management"],
-            "организаторские способности": ["организация", "organization", "планирование", "координация"],
-            "стрессоустойчивость": ["стресс", "stress", "устойчивость", "pressure"],
-            
-            # Technical
-            "администрирование систем": ["администрирование", "admin", "системы", "linux", "windows", "сервер"],
-            "техническая поддержка": ["техподдержка", "technical support", "support", "помощь"],
-            "ремонт техники": ["ремонт", "repair", "техника", "оборудование"],
-        }
-        
-        # Direct match gets full weight
-        if user_skill in vacancy_text:
-            return 1.0
-        
-        # Check synonyms
-        synonyms = skill_synonyms.get(user_skill, [user_skill])
-        max_weight = 0.0
-        
-        for synonym in synonyms:
-            if synonym.lower() in vacancy_text:
-                # Give higher weight for exact synonym matches
-                if synonym == user_skill:
-                    max_weight = max(max_weight, 1.0)
-                else:
-                    max_weight = max(max_weight, 0.8)
-        
-        # Partial word matching for compound skills
-        words = user_skill.split()
-        if len(words) > 1:
-            word_matches = 0
-            for word in words:
-                if len(word) > 2 and word in vacancy_text:  # Skip short words
-                    word_matches += 1
-            
-            if word_matches > 0:
-                partial_weight = (word_matches / len(words)) * 0.6
-                max_weight = max(max_weight, partial_weight)
-        
-        return max_weight
+        return skill_match_weight(user_skill, vacancy_text)
 
     async def update_preferences_from_feedback(
         self, user_id: int, db: AsyncSession
@@ -715,6 +434,8 @@ class HeadHunterService:
         if not feedbacks:
             return preferences
         
+        previous_keywords = (preferences.positive_keywords, preferences.negative_keywords)
+        
         # Analyze feedback patterns
         positive_keywords = []
         negative_keywords = []
@@ -756,7 +477,14 @@ class HeadHunterService:
             preferences.negative_keywords = top_negative  # type: ignore
         
         preferences.last_feedback_analysis = datetime.utcnow()  # type: ignore
+        
+        # Learned keywords feed into scoring, so a change invalidates stored recommendations
+        keywords_changed = (preferences.positive_keywords, preferences.negative_keywords) != previous_keywords
+        if keywords_changed:
+            await mark_recommendations_stale(db, user_id, "feedback_learning")
         await db.commit()
+        if keywords_changed:
+            await enqueue_recommendation_refresh(user_id)
         
         logger.info(f"Updated preferences for user {user_id} based on {len(feedbacks)} feedback items")
         return preferences 
\ No newline at end of file
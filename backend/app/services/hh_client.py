@@ -0,0 +1,106 @@
+"""
+Shared HTTP client for the HeadHunter API.
+
+All HH calls go through one pooled ``httpx.AsyncClient`` so keep-alive
+connections (and HTTP/2 when ``h2`` is installed) are reused instead of paying
+a new TCP+TLS handshake per request. The FastAPI app opens and closes the
+client in its startup/shutdown hooks; other event loops (Celery tasks, scripts)
+get their own client lazily.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_request_count = 0
+
+
+def _http2_available() -> bool:
+    """HTTP/2 support in httpx requires the optional h2 package"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def _count_request(request: httpx.Request) -> None:
+    global _request_count
+    _request_count += 1
+
+
+def get_hh_request_count() -> int:
+    """Number of requests sent to HH by clients of this process (cache hits are not counted)"""
+    return _request_count
+
+
+def create_hh_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Create a pooled HH API client configured from settings"""
+
+    limits = httpx.Limits(
+        max_connections=settings.hh_max_connections,
+        max_keepalive_connections=settings.hh_max_keepalive_connections,
+        keepalive_expiry=settings.hh_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(settings.hh_timeout, connect=settings.hh_connect_timeout)
+
+    return httpx.AsyncClient(
+        base_url=settings.hh_api_url,
+        headers={
+            "User-Agent": settings.hh_user_agent,
+            "Accept": "application/json",
+        },
+        limits=limits,
+        timeout=timeout,
+        http2=settings.hh_http2 and transport is None and _http2_available(),
+        transport=transport,
+        event_hooks={"request": [_count_request]},
+    )
+
+
+def get_hh_client() -> httpx.AsyncClient:
+    """
+    Return the shared HH client for the running event loop.
+    A client is bound to the loop it was created on, so a new one is created
+    if the previous client was closed or belongs to another loop.
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = create_hh_client()
+        _client_loop = loop
+    return _client
+
+
+def set_hh_client(client: Optional[httpx.AsyncClient]) -> None:
+    """Replace the shared client (e.g. with one pointing at a fake HH server)"""
+    global _client, _client_loop
+
+    _client = client
+    _client_loop = asyncio.get_running_loop() if client is not None else None
+
+
+async def startup_hh_client() -> None:
+    """Open the shared client on application startup"""
+    client = get_hh_client()
+    logger.info(f"HH API client started (base_url={client.base_url}, http2={settings.hh_http2 and _http2_available()})")
+
+
+async def shutdown_hh_client() -> None:
+    """Close the shared client and its pooled connections on shutdown"""
+    global _client, _client_loop
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("HH API client closed")
+    _client = None
+    _client_loop = None
@@ -0,0 +1,59 @@
+"""
+Token-bucket rate limiter shared by all HeadHunter API calls in a process.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from ..config import settings
+
+
+class TokenBucket:
+    """
+    Token bucket that refills at ``rate`` tokens per second up to ``capacity``.
+
+    Tokens are reserved synchronously, so callers that arrive while the bucket
+    is empty queue up in order and each sleeps only until its own token is
+    available. No asyncio primitives are held, which keeps the limiter usable
+    from any event loop (FastAPI, Celery tasks, scripts).
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(float(self.capacity), self._tokens + elapsed * self.rate)
+
+    def reserve(self, tokens: int = 1) -> float:
+        """Take tokens from the bucket and return how long to wait before using them"""
+        self._refill(time.monotonic())
+        self._tokens -= tokens
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    async def acquire(self, tokens: int = 1) -> None:
+        """Wait until ``tokens`` requests may be sent"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_limiter: Optional[TokenBucket] = None
+
+
+def get_hh_rate_limiter() -> TokenBucket:
+    """Return the process-wide HH rate limiter"""
+    global _limiter
+
+    if _limiter is None:
+        _limiter = TokenBucket(settings.hh_rate_limit_per_second, settings.hh_rate_limit_burst)
+    return _limiter
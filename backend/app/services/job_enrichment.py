@@ -0,0 +1,128 @@
+"""
+Batched loading of per-user interaction state for pages of job recommendations.
+
+Each helper issues a single ``IN (...)`` query for the whole page instead of one
+query per row, and the results are mapped onto the response models in memory.
+
+List pages only load the vacancy columns a card shows (``recommendation_card_options``):
+the description is cut to a preview in SQL and the raw HH payload is never read.
+The full vacancy is served by the recommendation detail endpoint.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, with_expression
+
+from ..models.job import JobRecommendation, SavedJob, JobFeedback, Vacancy
+from ..schemas.job import JobRecommendationResponse
+
+DESCRIPTION_PREVIEW_LENGTH = 500  # Characters of the description shown on a list card
+
+# Vacancy columns rendered on a list card (the description comes from the preview)
+CARD_VACANCY_COLUMNS = (
+    Vacancy.title,
+    Vacancy.company_name,
+    Vacancy.salary_from,
+    Vacancy.salary_to,
+    Vacancy.currency,
+    Vacancy.area_name,
+    Vacancy.employment_type,
+    Vacancy.experience_required,
+    Vacancy.key_skills,
+)
+
+def recommendation_card_options():
+    """Loader options projecting a recommendation query onto the list card columns"""
+    return (
+        joinedload(JobRecommendation.vacancy, innerjoin=True).options(
+            load_only(*CARD_VACANCY_COLUMNS),
+            with_expression(
+                Vacancy.description_preview,
+                func.substr(Vacancy.description, 1, DESCRIPTION_PREVIEW_LENGTH)
+            ),
+        ),
+    )
+
+async def load_saved_recommendation_ids(
+    db: AsyncSession,
+    user_id: int,
+    recommendation_ids: Iterable[int],
+    include_archived: bool = False
+) -> Set[int]:
+    """Return the subset of ``recommendation_ids`` the user has saved"""
+
+    ids = list(set(recommendation_ids))
+    if not ids:
+        return set()
+
+    query = (
+        select(SavedJob.job_recommendation_id)
+        .where(SavedJob.user_id == user_id)
+        .where(SavedJob.job_recommendation_id.in_(ids))
+    )
+    if not include_archived:
+        query = query.where(SavedJob.is_archived == False)
+
+    result = await db.execute(query)
+    return set(result.scalars().all())
+
+async def load_feedback_by_recommendation(
+    db: AsyncSession,
+    user_id: int,
+    recommendation_ids: Iterable[int]
+) -> Dict[int, Optional[bool]]:
+    """Return ``is_relevant`` of the user's feedback keyed by recommendation id"""
+
+    ids = list(set(recommendation_ids))
+    if not ids:
+        return {}
+
+    result = await db.execute(
+        select(JobFeedback.job_recommendation_id, JobFeedback.is_relevant)
+        .where(JobFeedback.user_id == user_id)
+        .where(JobFeedback.job_recommendation_id.in_(ids))
+    )
+    return {rec_id: is_relevant for rec_id, is_relevant in result.all()}
+
+async def load_recommendations_by_id(
+    db: AsyncSession,
+    recommendation_ids: Iterable[int],
+    cards: bool = False
+) -> Dict[int, JobRecommendation]:
+    """Load job recommendations for a set of ids in one query (list card columns only with ``cards``)"""
+
+    ids = list(set(recommendation_ids))
+    if not ids:
+        return {}
+
+    query = select(JobRecommendation).where(JobRecommendation.id.in_(ids))
+    if cards:
+        query = query.options(*recommendation_card_options())
+
+    result = await db.execute(query)
+    return {rec.id: rec for rec in result.scalars().all()}
+
+async def enrich_recommendations(
+    db: AsyncSession,
+    user_id: int,
+    recommendations: Sequence[JobRecommendation],
+    include_feedback: bool = True,
+    include_archived_saves: bool = False
+) -> List[JobRecommendationResponse]:
+    """Convert recommendations to responses with ``is_saved`` and ``user_feedback`` filled in"""
+
+    rec_ids = [rec.id for rec in recommendations]
+    saved_ids = await load_saved_recommendation_ids(db, user_id, rec_ids, include_archived_saves)
+    feedback = await load_feedback_by_recommendation(db, user_id, rec_ids) if include_feedback else {}
+
+    responses = []
+    for rec in recommendations:
+        rec_response = JobRecommendationResponse.model_validate(rec)
+        rec_response.is_saved = rec.id in saved_ids
+        if include_feedback:
+            rec_response.user_feedback = feedback.get(rec.id)
+        responses.append(rec_response)
+
+    return responses
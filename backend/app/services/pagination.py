@@ -0,0 +1,87 @@
+"""
+Keyset pagination helpers for list endpoints.
+
+Pages are addressed by an opaque cursor holding the sort key of the last row
+returned, so the next page is an index range scan instead of an ``OFFSET`` that
+gets slower with depth. Cursors are tagged with the list they belong to.
+
+List totals are optional; when requested they come from ``CountCache``, a short
+TTL cache, instead of a ``COUNT(*)`` per page.
+"""
+
+import base64
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Hashable, List, Optional, Sequence, Tuple
+
+from ..config import settings
+
+class InvalidCursorError(ValueError):
+    """Cursor is malformed or belongs to another list"""
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(kind: str, values: Sequence[Any]) -> str:
+    """Opaque cursor for the row whose sort key is ``values``"""
+    payload = json.dumps({"k": kind, "v": [_encode_value(value) for value in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(kind: str, cursor: str, size: int) -> List[Any]:
+    """Sort key stored in ``cursor``; raises ``InvalidCursorError`` if it is not a ``kind`` cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(value) for value in payload["v"]]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+
+    if payload.get("k") != kind or len(values) != size:
+        raise InvalidCursorError("Cursor does not belong to this list")
+    return values
+
+class CountCache:
+    """TTL cache of list totals keyed by (user id, list key)"""
+
+    def __init__(self, ttl: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else settings.pagination_count_cache_ttl
+        self.max_entries = max_entries if max_entries is not None else settings.pagination_count_cache_max_entries
+        self._entries: "OrderedDict[Tuple[int, Hashable], Tuple[float, int]]" = OrderedDict()
+
+    async def get_or_count(self, user_id: int, key: Hashable, count: Callable[[], Awaitable[int]]) -> int:
+        """Cached total for ``key``, running ``count`` on a miss"""
+
+        cache_key = (user_id, key)
+        entry = self._entries.get(cache_key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(cache_key)
+            return entry[1]
+
+        total = await count()
+        self._entries[cache_key] = (time.monotonic() + self.ttl, total)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return total
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop every cached total of a user after their lists changed"""
+        for cache_key in [cache_key for cache_key in self._entries if cache_key[0] == user_id]:
+            del self._entries[cache_key]
+
+_count_cache: Optional[CountCache] = None
+
+def get_count_cache() -> CountCache:
+    global _count_cache
+    if _count_cache is None:
+        _count_cache = CountCache()
+    return _count_cache
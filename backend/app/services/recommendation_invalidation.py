@@ -0,0 +1,139 @@
+"""
+Change-driven invalidation of stored job recommendations.
+
+Writes that affect what a user should be recommended (onboarding profile,
+job preferences, feedback learning, new assessment results) mark the user's
+recommendations stale and enqueue a targeted refresh. Refreshes mark them
+fresh again, and the hourly sweep only picks up stale users plus those not
+refreshed for ``recommendation_refresh_max_age_hours``.
+
+Each invalidation bumps ``version``; a refresh only clears the stale flag if
+no invalidation arrived while it was running.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.job import RecommendationState
+from .recommendation_store import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# Keeps fire-and-forget publish tasks referenced until they finish
+_pending_publishes: Set[asyncio.Task] = set()
+
+async def load_recommendation_state(db: AsyncSession, user_id: int) -> Optional[RecommendationState]:
+    result = await db.execute(select(RecommendationState).where(RecommendationState.user_id == user_id))
+    return result.scalar_one_or_none()
+
+def needs_refresh(state: RecommendationState) -> bool:
+    """Stale, never refreshed, or older than the maximum age"""
+    if state.is_stale or state.last_refreshed_at is None:
+        return True
+
+    last_refreshed_at = state.last_refreshed_at
+    if last_refreshed_at.tzinfo is None:
+        last_refreshed_at = last_refreshed_at.replace(tzinfo=timezone.utc)
+    max_age = timedelta(hours=settings.recommendation_refresh_max_age_hours)
+    return datetime.now(timezone.utc) - last_refreshed_at >= max_age
+
+def refresh_due_clause(now: Optional[datetime] = None):
+    """
+    SQL condition for users the sweep should refresh, for queries outer-joined to
+    RecommendationState (users without a state row were never tracked and are due)
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(hours=settings.recommendation_refresh_max_age_hours)
+    return or_(
+        RecommendationState.user_id.is_(None),
+        RecommendationState.is_stale.is_(True),
+        RecommendationState.last_refreshed_at.is_(None),
+        RecommendationState.last_refreshed_at < cutoff
+    )
+
+async def mark_recommendations_stale(db: AsyncSession, user_id: int, reason: str) -> None:
+    """Flag a user's recommendations as outdated. Does not commit."""
+
+    now = datetime.now(timezone.utc)
+    insert = dialect_insert(db)
+    stmt = insert(RecommendationState).values(
+        user_id=user_id,
+        is_stale=True,
+        stale_reason=reason,
+        stale_since=now,
+        version=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "is_stale": True,
+            # Keep the first reason and time until the next refresh
+            "stale_reason": func.coalesce(RecommendationState.stale_reason, stmt.excluded.stale_reason),
+            "stale_since": func.coalesce(RecommendationState.stale_since, stmt.excluded.stale_since),
+            "version": RecommendationState.version + 1,
+            "updated_at": func.now()
+        }
+    )
+    await db.execute(stmt)
+    logger.info(f"Recommendations of user {user_id} marked stale ({reason})")
+
+async def mark_recommendations_refreshed(
+    db: AsyncSession,
+    user_id: int,
+    seen_version: Optional[int] = None
+) -> None:
+    """
+    Record a completed refresh. With ``seen_version`` (the state version read before
+    refreshing) the stale flag is kept if the user changed something meanwhile.
+    Does not commit.
+    """
+
+    now = datetime.now(timezone.utc)
+    insert = dialect_insert(db)
+    stmt = insert(RecommendationState).values(user_id=user_id, is_stale=False, version=0, last_refreshed_at=now)
+
+    if seen_version is None:
+        cleared = {"is_stale": False, "stale_reason": None, "stale_since": None}
+    else:
+        up_to_date = RecommendationState.version == seen_version
+        cleared = {
+            "is_stale": case((up_to_date, False), else_=RecommendationState.is_stale),
+            "stale_reason": case((up_to_date, None), else_=RecommendationState.stale_reason),
+            "stale_since": case((up_to_date, None), else_=RecommendationState.stale_since)
+        }
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={**cleared, "last_refreshed_at": now, "updated_at": func.now()}
+    )
+    await db.execute(stmt)
+
+async def _publish_refresh(user_id: int) -> None:
+    try:
+        # Imported lazily: the tasks module imports the services
+        from ..tasks.job_recommendations import REFRESH_QUEUE, update_user_recommendations
+
+        await asyncio.to_thread(
+            update_user_recommendations.apply_async,
+            args=[user_id],
+            queue=REFRESH_QUEUE,
+            countdown=settings.recommendation_invalidation_countdown,
+            retry=False
+        )
+    except Exception as e:
+        logger.warning(f"Could not enqueue recommendation refresh for user {user_id}: {e}")
+
+async def enqueue_recommendation_refresh(user_id: int) -> None:
+    """
+    Schedule a refresh of one user's recommendations without waiting for the broker
+    (best effort: the hourly sweep still picks the user up if publishing fails)
+    """
+    task = asyncio.create_task(_publish_refresh(user_id))
+    _pending_publishes.add(task)
+    task.add_done_callback(_pending_publishes.discard)
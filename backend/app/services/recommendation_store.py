@@ -0,0 +1,212 @@
+"""
+Bulk persistence of job recommendations.
+
+Rows are written with a single ``INSERT ... ON CONFLICT`` per chunk on the
+``uq_user_vacancy`` constraint instead of a lookup plus insert/update per
+vacancy. PostgreSQL is used in production; SQLite (3.35+) supports the same
+statement and is used by the tests.
+
+Vacancy details in the rows (``VACANCY_FIELDS``) are split off and upserted
+once per vacancy into the shared ``vacancies`` table; recommendation rows
+keep only the per-user scores and a reference to the vacancy.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models.job import VACANCY_FIELDS, JobRecommendation, RecommendationSearchCursor, Vacancy
+
+logger = logging.getLogger(__name__)
+
+CONFLICT_COLUMNS = ("user_id", "hh_vacancy_id")
+
+# Columns never overwritten when a recommendation already exists
+_PRESERVED_COLUMNS = set(CONFLICT_COLUMNS) | {"id", "created_at"}
+
+# Keeps the number of bind parameters well below PostgreSQL's 32767 limit
+CHUNK_SIZE = 500
+
+def dialect_insert(db: AsyncSession):
+    """The dialect-specific insert() that supports ON CONFLICT"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Bulk upsert is not supported for dialect '{dialect}'")
+
+async def upsert_vacancies(db: AsyncSession, rows: Iterable[Dict[str, Any]]) -> Dict[str, Vacancy]:
+    """
+    Insert or refresh shared vacancy rows keyed by ``hh_vacancy_id``.
+    Returns the stored vacancies by HH id. Does not commit.
+    """
+
+    unique: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        unique[str(row["hh_vacancy_id"])] = {**row, "hh_vacancy_id": str(row["hh_vacancy_id"])}
+    if not unique:
+        return {}
+
+    # A stable order keeps concurrent refreshes from locking shared rows in opposite orders
+    rows = [unique[hh_vacancy_id] for hh_vacancy_id in sorted(unique)]
+
+    insert = dialect_insert(db)
+    stored: Dict[str, Vacancy] = {}
+
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        stmt = insert(Vacancy).values(chunk)
+        update_columns = {
+            column: stmt.excluded[column]
+            for column in chunk[0]
+            if column not in ("id", "hh_vacancy_id", "created_at")
+        }
+        update_columns["is_archived"] = False
+        update_columns["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(index_elements=["hh_vacancy_id"], set_=update_columns)
+
+        result = await db.scalars(stmt.returning(Vacancy), execution_options={"populate_existing": True})
+        stored.update((vacancy.hh_vacancy_id, vacancy) for vacancy in result.all())
+
+    return stored
+
+def _dedupe(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One row per (user_id, hh_vacancy_id); ON CONFLICT cannot touch the same row twice"""
+    unique: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        unique[tuple(str(row[column]) for column in CONFLICT_COLUMNS)] = row
+    return list(unique.values())
+
+async def upsert_recommendations(
+    db: AsyncSession,
+    rows: Iterable[Dict[str, Any]],
+    update_existing: bool = True
+) -> List[JobRecommendation]:
+    """
+    Insert recommendation rows, updating existing ``(user_id, hh_vacancy_id)`` rows in place.
+    All rows must have the same keys. With ``update_existing=False`` existing rows are left
+    untouched and only newly inserted recommendations are returned; the shared vacancy
+    details are refreshed either way.
+    Does not commit.
+    """
+
+    rows = _dedupe(rows)
+    if not rows:
+        return []
+
+    vacancies = await upsert_vacancies(db, (
+        {"hh_vacancy_id": row["hh_vacancy_id"], **{field: row[field] for field in VACANCY_FIELDS if field in row}}
+        for row in rows
+    ))
+    rows = [
+        {
+            **{column: value for column, value in row.items() if column not in VACANCY_FIELDS},
+            "hh_vacancy_id": str(row["hh_vacancy_id"]),
+            "vacancy_id": vacancies[str(row["hh_vacancy_id"])].id
+        }
+        for row in rows
+    ]
+
+    insert = dialect_insert(db)
+    stored: List[JobRecommendation] = []
+
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        stmt = insert(JobRecommendation).values(chunk)
+
+        if update_existing:
+            update_columns = {
+                column: stmt.excluded[column]
+                for column in chunk[0]
+                if column not in _PRESERVED_COLUMNS
+            }
+            update_columns["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(index_elements=list(CONFLICT_COLUMNS), set_=update_columns)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(CONFLICT_COLUMNS))
+
+        result = await db.scalars(
+            stmt.returning(JobRecommendation),
+            execution_options={"populate_existing": True}
+        )
+        stored.extend(result.all())
+
+    # RETURNING cannot join; attach the vacancies loaded above instead of lazy loading them
+    for recommendation in stored:
+        set_committed_value(recommendation, "vacancy", vacancies[recommendation.hh_vacancy_id])
+
+    logger.debug(f"Upserted {len(rows)} recommendation rows, {len(stored)} returned")
+    return stored
+
+async def deactivate_recommendations(db: AsyncSession, user_id: int, hh_vacancy_ids: Iterable[str]) -> int:
+    """Mark the given vacancies inactive for a user. Does not commit."""
+
+    hh_vacancy_ids = [str(vacancy_id) for vacancy_id in hh_vacancy_ids]
+    if not hh_vacancy_ids:
+        return 0
+
+    result = await db.execute(
+        JobRecommendation.__table__.update()
+        .where(JobRecommendation.user_id == user_id)
+        .where(JobRecommendation.hh_vacancy_id.in_(hh_vacancy_ids))
+        .where(JobRecommendation.is_active.is_(True))
+        .values(is_active=False, updated_at=func.now())
+    )
+    return result.rowcount or 0
+
+async def mark_vacancies_archived(db: AsyncSession, hh_vacancy_ids: Iterable[str]) -> None:
+    """Flag shared vacancies HH reported as archived. Does not commit."""
+
+    hh_vacancy_ids = [str(vacancy_id) for vacancy_id in hh_vacancy_ids]
+    if not hh_vacancy_ids:
+        return
+
+    await db.execute(
+        Vacancy.__table__.update()
+        .where(Vacancy.hh_vacancy_id.in_(hh_vacancy_ids))
+        .values(is_archived=True, updated_at=func.now())
+    )
+
+async def mark_vacancies_checked(db: AsyncSession, hh_vacancy_ids: Iterable[str]) -> None:
+    """Record that HH still lists the given shared vacancies as open. Does not commit."""
+
+    hh_vacancy_ids = [str(vacancy_id) for vacancy_id in hh_vacancy_ids]
+    if not hh_vacancy_ids:
+        return
+
+    await db.execute(
+        Vacancy.__table__.update()
+        .where(Vacancy.hh_vacancy_id.in_(hh_vacancy_ids))
+        .values(updated_at=func.now())
+    )
+
+async def load_search_cursor(db: AsyncSession, user_id: int, params_hash: str) -> Optional[datetime]:
+    """When the given search last succeeded for a user, or None if it never ran"""
+
+    result = await db.execute(
+        select(RecommendationSearchCursor.last_searched_at)
+        .where(RecommendationSearchCursor.user_id == user_id)
+        .where(RecommendationSearchCursor.params_hash == params_hash)
+    )
+    return result.scalar_one_or_none()
+
+async def save_search_cursor(db: AsyncSession, user_id: int, params_hash: str, searched_at: datetime) -> None:
+    """Record a successful search. Does not commit."""
+
+    insert = dialect_insert(db)
+    stmt = insert(RecommendationSearchCursor).values(
+        user_id=user_id,
+        params_hash=params_hash,
+        last_searched_at=searched_at
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "params_hash"],
+        set_={"last_searched_at": stmt.excluded.last_searched_at, "updated_at": func.now()}
+    )
+    await db.execute(stmt)
@@ -0,0 +1,181 @@
+"""
+Normalized, typo-tolerant exact cache of assistant replies to standalone questions.
+
+Many chats open with the same question about resumes, interviews or job search.
+Replies to first-turn messages (no history, no summary, no images) are cached
+per (language, system prompt version, normalized message). Normalization drops
+case, punctuation and extra whitespace. A lookup tries the exact key first.
+It then accepts a cached question of the same language and prompt version with
+the same words in the same order, except for at most one one-character typo in
+a word of ``TYPO_MIN_WORD_LENGTH`` or more letters. Rephrasings are misses, and
+so are questions that differ in a short word such as a negation. Follow-up
+messages depend on the conversation and are never cached.
+
+The prompt version is a hash of the system prompt text, so editing a prompt
+retires its cached replies.
+"""
+
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Shorter words (negations, numbers, short names) must match exactly
+TYPO_MIN_WORD_LENGTH = 7
+
+_NON_WORD = re.compile(r"\W+")
+
+Namespace = Tuple[str, str]  # (language, prompt version)
+
+def normalize_message(text: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of a message"""
+    text = unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+    return " ".join(word for word in _NON_WORD.split(text) if word)
+
+def prompt_version(system_prompt: str) -> str:
+    return hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()[:12]
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """One character inserted, deleted, replaced or two neighbours swapped"""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            if len(a) < len(b):
+                return a[i:] == b[i + 1:]
+            swapped = a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2] and a[i + 2:] == b[i + 2:]
+            return a[i + 1:] == b[i + 1:] or swapped
+    return True
+
+def same_words(words: Sequence[str], other: Sequence[str]) -> bool:
+    """Same words in the same order, allowing one typo in a single word of TYPO_MIN_WORD_LENGTH or more"""
+    if len(words) != len(other):
+        return False
+
+    typos = 0
+    for word, other_word in zip(words, other):
+        if word == other_word:
+            continue
+        if typos or min(len(word), len(other_word)) < TYPO_MIN_WORD_LENGTH or not _one_edit_apart(word, other_word):
+            return False
+        typos += 1
+    return True
+
+def is_cacheable(message: str, history: Sequence[Any], summary: Optional[str], images: Optional[Sequence[str]]) -> bool:
+    """Only first-turn text messages short enough to be a general question are shared between users"""
+    if not settings.response_cache_enabled or history or summary or images:
+        return False
+    return 0 < len(message.strip()) <= settings.response_cache_max_message_chars
+
+class ResponseCache:
+    """TTL + LRU cache of assistant replies with exact and typo-tolerant lookup"""
+
+    def __init__(self, ttl: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else settings.response_cache_ttl
+        self.max_entries = max_entries if max_entries is not None else settings.response_cache_max_entries
+
+        # key -> (stored at, namespace, words, reply)
+        self._entries: "OrderedDict[str, Tuple[float, Namespace, Tuple[str, ...], str]]" = OrderedDict()
+        # Keys per namespace and word count; a typo never changes the word count
+        self._buckets: Dict[Tuple[Namespace, int], Dict[str, None]] = {}
+
+        self.exact_hits = 0
+        self.typo_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(namespace: Namespace, normalized: str) -> str:
+        return hashlib.sha1("\x00".join((*namespace, normalized)).encode("utf-8")).hexdigest()
+
+    def _drop(self, key: str) -> None:
+        _, namespace, words, _ = self._entries.pop(key)
+        bucket = self._buckets[(namespace, len(words))]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[(namespace, len(words))]
+
+    def _get_fresh(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if time.monotonic() - entry[0] >= self.ttl:
+            self._drop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[3]
+
+    def lookup(self, language: str, system_prompt: str, message: str) -> Optional[str]:
+        """Cached reply for ``message`` or the same message with one typo, or None on a miss"""
+
+        namespace = (language, prompt_version(system_prompt))
+        normalized = normalize_message(message)
+
+        reply = self._get_fresh(self._key(namespace, normalized))
+        if reply is not None:
+            self.exact_hits += 1
+            return reply
+
+        words = normalized.split()
+        bucket = self._buckets.get((namespace, len(words)), {})
+        for key in [key for key in bucket if same_words(words, self._entries[key][2])]:
+            # Expired matches are dropped and the next one is tried
+            reply = self._get_fresh(key)
+            if reply is not None:
+                self.typo_hits += 1
+                logger.info(f"Response cache: typo-tolerant hit for {language} message")
+                return reply
+
+        self.misses += 1
+        return None
+
+    def store(self, language: str, system_prompt: str, message: str, reply: str) -> None:
+        namespace = (language, prompt_version(system_prompt))
+        normalized = normalize_message(message)
+        key = self._key(namespace, normalized)
+        words = tuple(normalized.split())
+
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic(), namespace, words, reply)
+        self._buckets.setdefault((namespace, len(words)), {})[key] = None
+
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.typo_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": settings.response_cache_enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "exact_hits": self.exact_hits,
+            "typo_hits": self.typo_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide assistant response cache"""
+    global _response_cache
+
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
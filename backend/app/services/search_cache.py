@@ -0,0 +1,163 @@
+"""
+Short-lived cache for HH ``/vacancies`` search results.
+
+Users with similar profiles produce the same search (same area, same OR-chain
+of terms in a different order, same experience level). Results are keyed on a
+canonical form of the query parameters, and concurrent identical searches
+share one in-flight request. Every caller gets its own copy of the response, so
+callers may modify it without affecting the cache or each other.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..config import settings
+from .hh_client import get_hh_client
+from .hh_rate_limiter import get_hh_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+def _normalize_text(text: str) -> str:
+    """Deduplicate and sort the terms of an OR-chain; HH treats them as unordered"""
+    terms = {term.strip().casefold() for term in text.split(" OR ") if term.strip()}
+    return " OR ".join(sorted(terms))
+
+def normalize_search_params(params: Dict[str, Any]) -> str:
+    """Build a canonical cache key from HH search parameters"""
+
+    canonical = {}
+    for key in sorted(params):
+        value = params[key]
+        if value is None:
+            continue
+        if key == "text":
+            canonical[key] = _normalize_text(str(value))
+        elif isinstance(value, (list, tuple, set)):
+            canonical[key] = sorted({str(item) for item in value})
+        else:
+            canonical[key] = [str(value)] if key == "area" else str(value)
+
+    raw = json.dumps(canonical, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+class SearchResultCache:
+    """TTL + LRU cache of search responses with request coalescing"""
+
+    def __init__(self, ttl: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else settings.hh_search_cache_ttl
+        self.max_entries = max_entries if max_entries is not None else settings.hh_search_cache_max_entries
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _get_fresh(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, data = entry
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return data
+
+    def _store(self, key: str, data: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic(), data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(
+        self,
+        params: Dict[str, Any],
+        fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached response for ``params`` or run ``fetch`` once for all concurrent callers.
+        ``None`` results (errors) are shared with waiting callers but never cached.
+        Each caller receives a private copy of the response.
+        """
+
+        key = normalize_search_params(params)
+
+        data = self._get_fresh(key)
+        if data is not None:
+            self.hits += 1
+            return copy.deepcopy(data)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(inflight))
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await fetch()
+            if data is not None:
+                self._store(key, data)
+            future.set_result(data)
+            return copy.deepcopy(data)
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve the exception so it is not reported as never retrieved when nobody waits
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+_search_cache: Optional[SearchResultCache] = None
+
+def get_search_cache() -> SearchResultCache:
+    """Return the process-wide search result cache"""
+    global _search_cache
+
+    if _search_cache is None:
+        _search_cache = SearchResultCache()
+    return _search_cache
+
+async def _fetch_search(params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    await get_hh_rate_limiter().acquire()
+    response = await get_hh_client().get("/vacancies", params=params)
+
+    if response.status_code == 200:
+        return response.json()
+
+    logger.error(f"HH API error: {response.status_code} - {response.text}")
+    return None
+
+async def search_vacancies(params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Search HH ``/vacancies`` through the shared cache.
+    Returns the response JSON, or None if HH answered with an error status.
+    """
+    request_params = dict(params)
+    return await get_search_cache().get_or_fetch(request_params, lambda: _fetch_search(request_params))
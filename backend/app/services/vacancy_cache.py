@@ -0,0 +1,179 @@
+"""
+Two-tier cache for HH vacancy details.
+
+Tier one is an in-process LRU bounded by ``vacancy_cache_max_entries``; tier two
+is Redis (shared between API workers and Celery) when ``redis_url`` is set.
+Entries keep the ``ETag``/``Last-Modified`` validators so an expired entry can
+be revalidated with a conditional request and refreshed on ``304``.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "hh:vacancy:"
+
+class CachedVacancy:
+    """Vacancy payload plus the HTTP validators needed for revalidation"""
+
+    def __init__(
+        self,
+        data: Dict[str, Any],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        fetched_at: Optional[float] = None
+    ):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    def is_fresh(self, ttl: int) -> bool:
+        return time.time() - self.fetched_at < ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "data": self.data,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CachedVacancy":
+        payload = json.loads(raw)
+        return cls(payload["data"], payload.get("etag"), payload.get("last_modified"), payload.get("fetched_at"))
+
+class VacancyCache:
+    """LRU + Redis cache of vacancy details keyed by HH vacancy id"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        redis_ttl: Optional[int] = None
+    ):
+        self.max_entries = max_entries if max_entries is not None else settings.vacancy_cache_max_entries
+        self.ttl = ttl if ttl is not None else settings.vacancy_cache_ttl
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl if redis_ttl is not None else settings.vacancy_cache_redis_ttl
+
+        self._entries: "OrderedDict[str, CachedVacancy]" = OrderedDict()
+        self._redis = None
+        self._redis_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.redis_hits = 0
+        self.redis_errors = 0
+
+    def _get_redis(self):
+        """Redis clients are bound to an event loop, so keep one per loop"""
+        if not self.redis_url:
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._redis_loop = loop
+        return self._redis
+
+    def _store_local(self, vacancy_id: str, entry: CachedVacancy) -> None:
+        self._entries[vacancy_id] = entry
+        self._entries.move_to_end(vacancy_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, vacancy_id: str) -> Optional[CachedVacancy]:
+        """Return the cached entry (fresh or stale), checking the LRU first and then Redis"""
+
+        entry = self._entries.get(vacancy_id)
+        if entry is not None:
+            self._entries.move_to_end(vacancy_id)
+            return entry
+
+        redis = self._get_redis()
+        if redis is None:
+            return None
+
+        try:
+            raw = await redis.get(REDIS_KEY_PREFIX + vacancy_id)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Vacancy cache Redis read failed: {e}")
+            return None
+
+        if raw is None:
+            return None
+
+        entry = CachedVacancy.from_json(raw)
+        self.redis_hits += 1
+        self._store_local(vacancy_id, entry)
+        return entry
+
+    async def set(self, vacancy_id: str, entry: CachedVacancy) -> None:
+        """Store an entry in both tiers"""
+
+        self._store_local(vacancy_id, entry)
+
+        redis = self._get_redis()
+        if redis is None:
+            return
+
+        try:
+            await redis.set(REDIS_KEY_PREFIX + vacancy_id, entry.to_json(), ex=self.redis_ttl)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Vacancy cache Redis write failed: {e}")
+
+    async def mark_revalidated(self, vacancy_id: str, entry: CachedVacancy) -> None:
+        """HH answered 304: the cached payload is current again"""
+        self.revalidations += 1
+        entry.fetched_at = time.time()
+        await self.set(vacancy_id, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.revalidations
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors,
+            "hit_rate": (self.hits + self.revalidations) / lookups if lookups else 0.0
+        }
+
+_vacancy_cache: Optional[VacancyCache] = None
+
+def get_vacancy_cache() -> VacancyCache:
+    """Return the process-wide vacancy cache"""
+    global _vacancy_cache
+
+    if _vacancy_cache is None:
+        redis_url = settings.redis_url if settings.vacancy_cache_redis_enabled else None
+        _vacancy_cache = VacancyCache(redis_url=redis_url)
+    return _vacancy_cache
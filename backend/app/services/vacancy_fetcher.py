@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+import httpx
+
+from ..config import settings
+from .hh_client import get_hh_client
+from .hh_rate_limiter import TokenBucket, get_hh_rate_limiter
+from .vacancy_cache import CachedVacancy, VacancyCache, get_vacancy_cache
+
+logger = logging.getLogger(__name__)
+
+class VacancyDetailFetcher:
+    """
+    Fetches full HH vacancy details concurrently under a concurrency cap and the shared rate limiter.
+    Details are served from the vacancy cache while fresh and revalidated with conditional requests once stale.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        limiter: Optional[TokenBucket] = None,
+        concurrency: Optional[int] = None,
+        cache: Optional[VacancyCache] = None
+    ):
+        self._client = client
+        self._limiter = limiter
+        self._cache = cache
+        self.concurrency = concurrency or settings.hh_detail_concurrency
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_hh_client()
+
+    @property
+    def limiter(self) -> TokenBucket:
+        return self._limiter or get_hh_rate_limiter()
+
+    @property
+    def cache(self) -> VacancyCache:
+        return self._cache or get_vacancy_cache()
+
+    async def fetch_details(self, vacancies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fetch details for each search result, preserving order.
+        A vacancy whose detail request fails is returned as its search snippet.
+        """
+
+        if not vacancies:
+            return []
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_with_fallback(vacancy: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                detailed = await self.fetch_one(vacancy["id"])
+            return detailed if detailed is not None else vacancy
+
+        return list(await asyncio.gather(*(fetch_with_fallback(v) for v in vacancies)))
+
+    async def fetch_one(self, vacancy_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a single vacancy through the cache, returning None on any error"""
+
+        data, _ = await self._fetch(vacancy_id)
+        return data
+
+    async def find_archived(self, vacancy_ids: List[str]) -> List[str]:
+        """
+        Return the ids HH reports as archived or no longer has (404).
+        Vacancies whose state cannot be determined are treated as still open.
+        """
+
+        if not vacancy_ids:
+            return []
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def is_archived(vacancy_id: str) -> bool:
+            async with semaphore:
+                data, gone = await self._fetch(vacancy_id)
+            return gone or bool(data and data.get("archived"))
+
+        flags = await asyncio.gather(*(is_archived(str(vacancy_id)) for vacancy_id in vacancy_ids))
+        return [str(vacancy_id) for vacancy_id, archived in zip(vacancy_ids, flags) if archived]
+
+    async def _fetch(self, vacancy_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Return the vacancy (None on error) and whether HH answered 404"""
+
+        vacancy_id = str(vacancy_id)
+        cache = self.cache
+        cached = await cache.get(vacancy_id)
+
+        if cached is not None and cached.is_fresh(cache.ttl):
+            cache.hits += 1
+            return cached.data, False
+        if cached is None:
+            cache.misses += 1
+
+        try:
+            await self.limiter.acquire()
+            response = await self.client.get(
+                f"/vacancies/{vacancy_id}",
+                headers=cached.conditional_headers() if cached else None
+            )
+
+            if response.status_code == 304 and cached is not None:
+                await cache.mark_revalidated(vacancy_id, cached)
+                return cached.data, False
+
+            if response.status_code == 200:
+                data = response.json()
+                await cache.set(vacancy_id, CachedVacancy(
+                    data,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified")
+                ))
+                return data, False
+
+            logger.warning(f"HH API returned {response.status_code} for vacancy {vacancy_id}")
+            if response.status_code == 404:
+                return None, True
+
+        except Exception as e:
+            logger.error(f"Error fetching detailed vacancy {vacancy_id}: {e}")
+
+        # Serve a stale copy rather than nothing when HH is unavailable
+        return (cached.data if cached is not None else None), False
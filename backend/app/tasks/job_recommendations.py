@@ -2,19 +2,43 @@
 Celery tasks for automated job recommendation processing
 """
 
-import asyncio
 import logging
-from typing import List, Optional
-from datetime import datetime, timedelta
-from celery import Celery
+import time
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from celery import Celery, chord
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, or_, func, insert
 
-from ..database import async_session
+from ..config import settings
 from ..models.user import User
 from ..models.onboarding import OnboardingProfile
-from ..models.job import JobRecommendation
+from ..models.job import (
+    ArchivedJobRecommendation,
+    JobFeedback,
+    JobRecommendation,
+    RecommendationState,
+    SavedJob,
+    Vacancy,
+)
 from ..services.enhanced_headhunter_service import EnhancedHeadHunterService
+from ..services.recommendation_invalidation import (
+    load_recommendation_state,
+    mark_recommendations_refreshed,
+    needs_refresh,
+    refresh_due_clause,
+)
+from ..services.recommendation_store import (
+    deactivate_recommendations,
+    load_search_cursor,
+    mark_vacancies_archived,
+    mark_vacancies_checked,
+    save_search_cursor,
+    upsert_recommendations,
+)
+from ..services.search_cache import normalize_search_params
+from .refresh_pipeline import RefreshCheckpoint, run_refresh_pipeline
+from .worker_runtime import async_session, run_async
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +70,24 @@ celery_app.conf.update(
 
 enhanced_hh_service = EnhancedHeadHunterService()
 
+REFRESH_QUEUE = 'job_recommendations'
+
+# Columns copied into job_recommendations_archive by the retention cleanup, with their
+# source on the recommendation or on its shared vacancy
+ARCHIVED_COLUMNS = [
+    column.key for column in ArchivedJobRecommendation.__table__.columns if column.key != "archived_at"
+]
+_ARCHIVE_SOURCES = [
+    JobRecommendation.__table__.c[column] if column in JobRecommendation.__table__.c else Vacancy.__table__.c[column]
+    for column in ARCHIVED_COLUMNS
+]
+
+# Paging does not change which search a cursor belongs to
+CURSOR_IGNORED_PARAMS = ("page", "per_page", "date_from")
+
+# Re-read a little before the cursor so vacancies indexed late by HH are not missed
+CURSOR_OVERLAP = timedelta(minutes=10)
+
 @celery_app.task(bind=True, max_retries=3)
 def update_user_recommendations(self, user_id: int):
     """
@@ -53,11 +95,7 @@ def update_user_recommendations(self, user_id: int):
     This task runs the async function in a sync context
     """
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        result = loop.run_until_complete(_update_user_recommendations_async(user_id))
-        loop.close()
+        result = run_async(_update_user_recommendations_async(user_id))
         
         return result
     except Exception as e:
@@ -73,19 +111,89 @@ def update_all_user_recommendations(self):
     """
     Update job recommendations for all active users
     Runs every hour via Celery Beat
+
+    Dispatches the eligible users as a chord of refresh_user_shard sub-tasks on the
+    job_recommendations queue, so the refresh spreads across all workers of that queue;
+    aggregate_refresh_results collects the per-user results once every shard finished.
     """
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        user_ids, resume_after, complete = run_async(_prepare_refresh_dispatch())
         
-        result = loop.run_until_complete(_update_all_users_recommendations_async())
-        loop.close()
+        if not user_ids:
+            return {"success": True, "total_users": 0, "shards": 0}
         
-        return result
+        shard_size = max(1, settings.recommendation_refresh_shard_size)
+        shards = [user_ids[i:i + shard_size] for i in range(0, len(user_ids), shard_size)]
+        
+        header = [refresh_user_shard.s(shard).set(queue=REFRESH_QUEUE) for shard in shards]
+        callback = aggregate_refresh_results.s(
+            dispatched_at=time.time(),
+            resumed_after_user_id=resume_after or None,
+            complete=complete
+        ).set(queue=REFRESH_QUEUE)
+        aggregate = chord(header)(callback)
+        
+        logger.info(f"Dispatched {len(user_ids)} users in {len(shards)} shards")
+        return {
+            "success": True,
+            "total_users": len(user_ids),
+            "shards": len(shards),
+            "aggregate_task_id": aggregate.id,
+            "resumed_after_user_id": resume_after or None,
+            "complete": complete
+        }
     except Exception as e:
         logger.error(f"Error in batch recommendation update: {e}")
         raise
 
+@celery_app.task(bind=True, acks_late=True)
+def refresh_user_shard(self, user_ids: List[int]):
+    """Refresh one shard of users concurrently; returns shard stats with per-user results"""
+    try:
+        result = run_async(_refresh_user_shard_async(user_ids))
+        
+        return result
+    except Exception as e:
+        logger.error(f"Error refreshing shard of {len(user_ids)} users: {e}")
+        raise
+
+@celery_app.task
+def aggregate_refresh_results(
+    shard_results: List[dict],
+    dispatched_at: Optional[float] = None,
+    resumed_after_user_id: Optional[int] = None,
+    complete: bool = True
+):
+    """Chord callback: combine the shard results of one batch refresh"""
+    
+    user_results = [result for shard in shard_results for result in shard.get("results", [])]
+    processed = sum(shard["processed"] for shard in shard_results)
+    errors = sum(shard["errors"] for shard in shard_results)
+    hh_calls = sum(shard["hh_calls"] for shard in shard_results)
+    elapsed = time.time() - dispatched_at if dispatched_at else None
+    
+    summary = {
+        "success": True,
+        "total_users": sum(shard["total_users"] for shard in shard_results),
+        "processed": processed,
+        "errors": errors,
+        "shards": len(shard_results),
+        "recommendations_stored": sum(result.get("recommendations_stored", 0) for result in user_results),
+        "updated_users": sum(1 for result in user_results if "recommendations_stored" in result),
+        "failed_user_ids": [result["user_id"] for result in user_results if not result.get("success")],
+        "hh_calls": hh_calls,
+        "elapsed_seconds": round(elapsed, 3) if elapsed else None,
+        "users_per_second": round((processed + errors) / elapsed, 3) if elapsed else None,
+        "hh_calls_per_second": round(hh_calls / elapsed, 3) if elapsed else None,
+        "resumed_after_user_id": resumed_after_user_id,
+        "complete": complete
+    }
+    logger.info(
+        f"Batch update completed: {processed} successful, {errors} errors "
+        f"across {len(shard_results)} shards"
+    )
+    return summary
+
 @celery_app.task
 def cleanup_old_recommendations():
     """
@@ -93,11 +201,7 @@ def cleanup_old_recommendations():
     Runs daily via Celery Beat
     """
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        result = loop.run_until_complete(_cleanup_old_recommendations_async())
-        loop.close()
+        result = run_async(_cleanup_old_recommendations_async())
         
         return result
     except Exception as e:
@@ -129,45 +233,86 @@ async def _update_user_recommendations_async(user_id: int) -> dict:
                 logger.info(f"User {user_id} has not completed onboarding, skipping")
                 return {"success": True, "message": "User has not completed onboarding"}
             
-            # Check if user needs fresh recommendations (no recommendations in last 6 hours)
-            cutoff_time = datetime.utcnow() - timedelta(hours=6)
-            recent_recs_result = await db.execute(
-                select(func.count(JobRecommendation.id))
-                .where(JobRecommendation.user_id == user_id)
-                .where(JobRecommendation.created_at >= cutoff_time)
-                .where(JobRecommendation.is_active.is_(True))
+            # Skip users whose profile, preferences and assessments did not change since the last refresh
+            state = await load_recommendation_state(db, user_id)
+            if state is not None and not needs_refresh(state):
+                logger.info(f"Recommendations of user {user_id} are up to date, skipping")
+                return {"success": True, "message": "Recommendations are up to date"}
+            
+            if state is None:
+                # Not tracked yet: check if user needs fresh recommendations (no recommendations in last 6 hours)
+                cutoff_time = datetime.utcnow() - timedelta(hours=6)
+                recent_recs_result = await db.execute(
+                    select(func.count(JobRecommendation.id))
+                    .where(JobRecommendation.user_id == user_id)
+                    # Re-recommended vacancies are refreshed in place, so updated_at counts too
+                    .where(func.coalesce(JobRecommendation.updated_at, JobRecommendation.created_at) >= cutoff_time)
+                    .where(JobRecommendation.is_active.is_(True))
+                )
+                recent_count = recent_recs_result.scalar() or 0
+                
+                if recent_count > 0:
+                    logger.info(f"User {user_id} has recent recommendations ({recent_count}), skipping")
+                    return {"success": True, "message": f"User has {recent_count} recent recommendations"}
+            
+            # Refresh incrementally when this exact search ran recently: only vacancies
+            # published or updated since the last successful search are fetched
+            search_params = await enhanced_hh_service.build_personal_search_params(onboarding_profile)
+            params_hash = normalize_search_params(
+                {key: value for key, value in search_params.items() if key not in CURSOR_IGNORED_PARAMS}
             )
-            recent_count = recent_recs_result.scalar() or 0
+            last_searched_at = await load_search_cursor(db, user_id, params_hash)
+            if last_searched_at is not None and last_searched_at.tzinfo is None:
+                last_searched_at = last_searched_at.replace(tzinfo=timezone.utc)
             
-            if recent_count > 0:
-                logger.info(f"User {user_id} has recent recommendations ({recent_count}), skipping")
-                return {"success": True, "message": f"User has {recent_count} recent recommendations"}
+            searched_at = datetime.now(timezone.utc)
+            incremental = (
+                settings.recommendation_incremental_refresh
+                and last_searched_at is not None
+                and searched_at - last_searched_at < timedelta(hours=settings.recommendation_full_refresh_hours)
+            )
+            
+            changed_vacancies = None
+            if incremental:
+                changed_vacancies = await enhanced_hh_service.search_changed_vacancies(
+                    onboarding_profile, last_searched_at - CURSOR_OVERLAP,
+                    settings.recommendation_incremental_max_vacancies
+                )
+                # The cursor may only advance past a delta consumed in full; otherwise search from scratch
+                incremental = changed_vacancies is not None
             
             # Get dual recommendations
-            logger.info(f"Updating recommendations for user {user_id}")
+            logger.info(f"Updating recommendations for user {user_id} ({'incremental' if incremental else 'full'})")
             dual_recommendations = await enhanced_hh_service.get_dual_recommendations(
-                user, db, page=0, per_page=20, disable_filters=False
+                user, db, page=0, per_page=20, disable_filters=False, vacancies=changed_vacancies
             )
             
-            # Deactivate old recommendations
-            await db.execute(
-                JobRecommendation.__table__.update()
-                .where(JobRecommendation.user_id == user_id)
-                .values(is_active=False)
-            )
+            if not incremental:
+                # Deactivate old recommendations
+                await db.execute(
+                    JobRecommendation.__table__.update()
+                    .where(JobRecommendation.user_id == user_id)
+                    .values(is_active=False)
+                )
             
-            # Store new recommendations
-            total_stored = 0
+            # Store new recommendations; vacancies seen before are reactivated in place
             all_recommendations = (
                 dual_recommendations["personal"] + 
                 dual_recommendations["assessment"]
             )
             
+            rows = []
+            archived_ids = []
             for enhanced_rec in all_recommendations:
                 try:
                     vacancy = enhanced_rec.vacancy
                     scores = enhanced_rec.scores
                     
+                    # HH already reports it archived in the search result or the fetched details
+                    if vacancy.get("archived"):
+                        archived_ids.append(str(vacancy["id"]))
+                        continue
+                    
                     # Extract job details
                     salary_info = vacancy.get("salary", {}) or {}
                     area_info = vacancy.get("area", {}) or {}
@@ -175,8 +320,7 @@ async def _update_user_recommendations_async(user_id: int) -> dict:
                     employment_info = vacancy.get("employment", {}) or {}
                     experience_info = vacancy.get("experience", {}) or {}
                     
-                    # Create recommendation
-                    recommendation = JobRecommendation(
+                    rows.append(dict(
                         user_id=user_id,
                         hh_vacancy_id=vacancy["id"],
                         title=vacancy.get("name", ""),
@@ -195,22 +339,38 @@ async def _update_user_recommendations_async(user_id: int) -> dict:
                         salary_match_score=scores.get("salary_match_score", 0.0),
                         raw_data=vacancy,
                         is_active=True
-                    )
-                    
-                    db.add(recommendation)
-                    total_stored += 1
+                    ))
                     
                 except Exception as e:
                     logger.error(f"Error storing recommendation for user {user_id}: {e}")
                     continue
             
+            stored = await upsert_recommendations(db, rows)
+            total_stored = len(stored)
+            
+            if incremental:
+                # Earlier recommendations stay active unless HH reports them archived or gone
+                delta_ids = [row["hh_vacancy_id"] for row in rows] + archived_ids
+                archived_ids += await _find_archived_recommendations(db, user_id, delta_ids)
+            deactivated = await deactivate_recommendations(db, user_id, archived_ids)
+            await mark_vacancies_archived(db, archived_ids)
+            
+            # An empty full search may have failed, so the cursor only advances on results;
+            # a delta is only returned when every page of it was read
+            if rows or incremental:
+                await save_search_cursor(db, user_id, params_hash, searched_at)
+            
+            # Changes made while this refresh ran keep the user stale
+            await mark_recommendations_refreshed(db, user_id, seen_version=state.version if state else 0)
             await db.commit()
             
             logger.info(f"Successfully updated {total_stored} recommendations for user {user_id}")
             return {
                 "success": True, 
                 "user_id": user_id,
+                "mode": "incremental" if incremental else "full",
                 "recommendations_stored": total_stored,
+                "deactivated": deactivated,
                 "personal_count": len(dual_recommendations["personal"]),
                 "assessment_count": len(dual_recommendations["assessment"])
             }
@@ -220,92 +380,209 @@ async def _update_user_recommendations_async(user_id: int) -> dict:
             logger.error(f"Error updating recommendations for user {user_id}: {e}")
             raise
 
-async def _update_all_users_recommendations_async() -> dict:
-    """Async function to update recommendations for all active users"""
+async def _find_archived_recommendations(db: AsyncSession, user_id: int, exclude_ids: List[str]) -> List[str]:
+    """
+    Archived vacancies among a user's other active recommendations. Vacancies already flagged
+    archived need no request; of the rest only a bounded batch not seen open for
+    ``recommendation_archive_check_hours`` is checked with HH per run, longest unseen first.
+    """
+
+    active = (
+        select(JobRecommendation.hh_vacancy_id)
+        .join(Vacancy, Vacancy.hh_vacancy_id == JobRecommendation.hh_vacancy_id)
+        .where(JobRecommendation.user_id == user_id)
+        .where(JobRecommendation.is_active.is_(True))
+        .where(JobRecommendation.hh_vacancy_id.notin_(exclude_ids))
+    )
+    flagged_result = await db.execute(active.where(Vacancy.is_archived.is_(True)))
+    flagged_ids = list(flagged_result.scalars())
     
-    async with async_session() as db:
-        try:
-            # Get all users who have completed onboarding
-            users_result = await db.execute(
+    # Vacancies are touched whenever a search returns them or a check finds them open
+    last_seen_open = func.coalesce(Vacancy.updated_at, Vacancy.created_at)
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.recommendation_archive_check_hours)
+    due_result = await db.execute(
+        active
+        .where(Vacancy.is_archived.is_not(True))
+        .where(last_seen_open < cutoff)
+        .order_by(last_seen_open, Vacancy.id)
+        .limit(settings.recommendation_archive_check_batch)
+    )
+    due_ids = list(due_result.scalars())
+    
+    archived_ids = await enhanced_hh_service.detail_fetcher.find_archived(due_ids)
+    await mark_vacancies_checked(db, set(due_ids) - set(archived_ids))
+    return flagged_ids + archived_ids
+
+async def _prepare_refresh_dispatch() -> Tuple[List[int], int, bool]:
+    """
+    Select the users for this run: eligible users after the checkpoint, in id order, up to
+    the per-run budget. Returns the user ids, the checkpoint resumed from and whether the
+    run reaches the last user.
+    """
+
+    budget = settings.recommendation_refresh_user_budget
+    checkpoint = RefreshCheckpoint(settings.redis_url)
+
+    try:
+        # Continue after the last user dispatched by a budget-limited run
+        resume_after = await checkpoint.load()
+
+        async with async_session() as db:
+            query = (
                 select(User.id)
                 .join(OnboardingProfile)
+                # Users with no changes since their last refresh are skipped entirely
+                .outerjoin(RecommendationState, RecommendationState.user_id == User.id)
+                .where(refresh_due_clause())
                 .where(OnboardingProfile.is_completed.is_(True))
                 .where(User.is_active.is_(True))
+                .where(User.id > resume_after)
+                .order_by(User.id)
             )
+            if budget > 0:
+                # One extra row tells whether users remain after this run
+                query = query.limit(budget + 1)
+            users_result = await db.execute(query)
             user_ids = [row[0] for row in users_result.all()]
-            
-            logger.info(f"Found {len(user_ids)} users for recommendation update")
-            
-            # Process users in batches to avoid overwhelming the system
-            batch_size = 10
-            total_processed = 0
-            total_errors = 0
-            
-            for i in range(0, len(user_ids), batch_size):
-                batch = user_ids[i:i + batch_size]
-                
-                # Process batch
-                for user_id in batch:
-                    try:
-                        result = await _update_user_recommendations_async(user_id)
-                        if result["success"]:
-                            total_processed += 1
-                        else:
-                            total_errors += 1
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing user {user_id}: {e}")
-                        total_errors += 1
-                
-                # Small delay between batches
-                await asyncio.sleep(2)
-            
-            logger.info(f"Batch update completed: {total_processed} successful, {total_errors} errors")
-            return {
-                "success": True,
-                "total_users": len(user_ids),
-                "processed": total_processed,
-                "errors": total_errors
-            }
-            
-        except Exception as e:
-            logger.error(f"Error in batch recommendation update: {e}")
-            raise
+
+        complete = budget <= 0 or len(user_ids) <= budget
+        if complete:
+            await checkpoint.clear()
+        else:
+            user_ids = user_ids[:budget]
+            await checkpoint.save(user_ids[-1])
+
+        logger.info(
+            f"Found {len(user_ids)} users for recommendation update"
+            + (f" (resuming after user {resume_after})" if resume_after else "")
+        )
+        return user_ids, resume_after, complete
+
+    finally:
+        await checkpoint.close()
+
+async def _refresh_user_shard_async(user_ids: List[int]) -> dict:
+    """Async function to refresh one shard of users"""
+
+    # Workers share the worker loop's HH client and the global HH rate limiter,
+    # which paces requests instead of fixed sleeps between users
+    return await run_refresh_pipeline(
+        user_ids,
+        _update_user_recommendations_async,
+        concurrency=settings.recommendation_refresh_concurrency,
+        collect_results=True
+    )
 
 async def _cleanup_old_recommendations_async() -> dict:
-    """Async function to clean up old recommendations"""
+    """
+    Async function to clean up old recommendations
+
+    Walks the table in primary-key order and removes at most
+    recommendation_cleanup_batch_size rows per short transaction, so locks and
+    WAL volume stay bounded. Recommendations that are still saved by the user
+    are kept; feedback on removed rows is deleted with them.
+    """
     
-    async with async_session() as db:
-        try:
-            # Delete recommendations older than 30 days
-            cutoff_date = datetime.utcnow() - timedelta(days=30)
-            
-            result = await db.execute(
-                select(func.count(JobRecommendation.id))
-                .where(JobRecommendation.created_at < cutoff_date)
-            )
-            old_count = result.scalar() or 0
-            
-            if old_count > 0:
-                # Delete old recommendations
+    retention_days = settings.recommendation_retention_days
+    batch_size = max(1, settings.recommendation_cleanup_batch_size)
+    archive = settings.recommendation_cleanup_archive
+    cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
+    
+    # Recommendations refreshed in place keep their created_at, so recent updates also count
+    expired = and_(
+        JobRecommendation.created_at < cutoff_date,
+        or_(JobRecommendation.updated_at.is_(None), JobRecommendation.updated_at < cutoff_date),
+        ~select(SavedJob.id).where(SavedJob.job_recommendation_id == JobRecommendation.id).exists()
+    )
+    
+    cleaned_up = 0
+    archived = 0
+    batches = 0
+    last_id = 0
+    
+    while True:
+        async with async_session() as db:
+            try:
+                ids_result = await db.execute(
+                    select(JobRecommendation.id)
+                    .where(JobRecommendation.id > last_id)
+                    .where(expired)
+                    .order_by(JobRecommendation.id)
+                    .limit(batch_size)
+                )
+                ids = list(ids_result.scalars())
+                if not ids:
+                    break
+                
+                # The predicate is re-applied inside the range, so rows saved meanwhile survive
+                in_batch = and_(JobRecommendation.id >= ids[0], JobRecommendation.id <= ids[-1], expired)
+                last_id = ids[-1]
+                
+                if archive:
+                    archive_result = await db.execute(
+                        insert(ArchivedJobRecommendation).from_select(
+                            ARCHIVED_COLUMNS,
+                            select(*_ARCHIVE_SOURCES)
+                            .select_from(JobRecommendation.__table__.join(Vacancy.__table__))
+                            .where(in_batch)
+                        )
+                    )
+                    archived += archive_result.rowcount or 0
+                
                 await db.execute(
-                    JobRecommendation.__table__.delete()
-                    .where(JobRecommendation.created_at < cutoff_date)
+                    JobFeedback.__table__.delete()
+                    .where(JobFeedback.job_recommendation_id.in_(select(JobRecommendation.id).where(in_batch)))
                 )
+                delete_result = await db.execute(JobRecommendation.__table__.delete().where(in_batch))
+                await db.commit()
+                
+                cleaned_up += delete_result.rowcount or 0
+                batches += 1
                 
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error cleaning up old recommendations: {e}")
+                raise
+    
+    # Shared vacancies no user is recommended any more. A refresh upserts the vacancy
+    # before its recommendation, so recently written vacancies are left for a later run
+    vacancy_cutoff = datetime.utcnow() - timedelta(hours=settings.recommendation_cleanup_vacancy_grace_hours)
+    vacancies_removed = 0
+    while True:
+        async with async_session() as db:
+            try:
+                orphan_ids = select(Vacancy.id).where(
+                    func.coalesce(Vacancy.updated_at, Vacancy.created_at) < vacancy_cutoff,
+                    ~select(JobRecommendation.id).where(JobRecommendation.vacancy_id == Vacancy.id).exists()
+                ).limit(batch_size)
+                delete_result = await db.execute(
+                    Vacancy.__table__.delete().where(Vacancy.id.in_(orphan_ids.scalar_subquery()))
+                )
                 await db.commit()
-                logger.info(f"Cleaned up {old_count} old recommendations")
-            
-            return {
-                "success": True,
-                "cleaned_up": old_count,
-                "cutoff_date": cutoff_date.isoformat()
-            }
-            
-        except Exception as e:
-            await db.rollback()
-            logger.error(f"Error cleaning up old recommendations: {e}")
-            raise
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error cleaning up unused vacancies: {e}")
+                raise
+        
+        removed = delete_result.rowcount or 0
+        vacancies_removed += removed
+        if removed < batch_size:
+            break
+    
+    if cleaned_up:
+        logger.info(
+            f"Cleaned up {cleaned_up} old recommendations in {batches} batches ({archived} archived), "
+            f"{vacancies_removed} unused vacancies"
+        )
+    
+    return {
+        "success": True,
+        "cleaned_up": cleaned_up,
+        "archived": archived,
+        "batches": batches,
+        "vacancies_removed": vacancies_removed,
+        "cutoff_date": cutoff_date.isoformat()
+    }
 
 # Helper functions
 
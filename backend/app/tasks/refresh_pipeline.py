@@ -0,0 +1,163 @@
+"""
+Concurrent refresh of job recommendations for many users.
+
+A bounded pool of async workers pulls user ids from a queue. All workers run
+on one event loop, so they share the loop's HH client and the process-wide HH
+rate limiter; HH traffic stays within the configured rate however many
+workers are running.
+
+The batch refresh dispatcher walks users in id order and records the last
+user id it handed out in ``RefreshCheckpoint``, so a budget-limited run is
+continued by the next one. A run that reaches the last user clears the
+checkpoint. Shards already handed out are not checkpointed here: their tasks
+are acknowledged late and redelivered if a worker dies.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from ..services.hh_client import get_hh_request_count
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "job_recommendations:refresh:last_user_id"
+
+# Fallback when Redis is not configured: survives between runs in the same worker process
+_local_checkpoint: Optional[int] = None
+
+class RefreshCheckpoint:
+    """Last user id completed by the batch refresh, stored in Redis when available"""
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url
+        self._redis = None
+
+    def _get_redis(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    async def load(self) -> int:
+        redis = self._get_redis()
+        if redis is None:
+            return _local_checkpoint or 0
+
+        try:
+            value = await redis.get(CHECKPOINT_KEY)
+        except Exception as e:
+            logger.warning(f"Could not read refresh checkpoint, starting from the beginning: {e}")
+            return 0
+        return int(value) if value else 0
+
+    async def save(self, user_id: int) -> None:
+        global _local_checkpoint
+
+        redis = self._get_redis()
+        if redis is None:
+            _local_checkpoint = user_id
+            return
+
+        try:
+            await redis.set(CHECKPOINT_KEY, user_id)
+        except Exception as e:
+            logger.warning(f"Could not save refresh checkpoint {user_id}: {e}")
+
+    async def clear(self) -> None:
+        global _local_checkpoint
+
+        redis = self._get_redis()
+        if redis is None:
+            _local_checkpoint = None
+            return
+
+        try:
+            await redis.delete(CHECKPOINT_KEY)
+        except Exception as e:
+            logger.warning(f"Could not clear refresh checkpoint: {e}")
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+async def run_refresh_pipeline(
+    user_ids: Sequence[int],
+    refresh_user: Callable[[int], Awaitable[Dict[str, Any]]],
+    concurrency: int,
+    collect_results: bool = False
+) -> Dict[str, Any]:
+    """
+    Refresh ``user_ids`` (ascending) with at most ``concurrency`` users in flight.
+    ``refresh_user`` returns a result dict with a ``success`` flag; exceptions count as errors.
+    With ``collect_results`` the per-user result dicts are returned under ``results``.
+    """
+
+    user_ids = sorted(user_ids)
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for user_id in user_ids:
+        queue.put_nowait(user_id)
+
+    processed = 0
+    errors = 0
+    results: List[Dict[str, Any]] = []
+
+    hh_calls_before = get_hh_request_count()
+    started = time.perf_counter()
+
+    async def worker() -> None:
+        nonlocal processed, errors
+
+        while True:
+            try:
+                user_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                result = await refresh_user(user_id)
+                if result.get("success"):
+                    processed += 1
+                else:
+                    errors += 1
+            except Exception as e:
+                logger.error(f"Error processing user {user_id}: {e}")
+                errors += 1
+                result = {"success": False, "error": str(e)}
+
+            if collect_results:
+                results.append({"user_id": user_id, **result})
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(user_ids))))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+
+    elapsed = time.perf_counter() - started
+    hh_calls = get_hh_request_count() - hh_calls_before
+    handled = processed + errors
+
+    stats = {
+        "total_users": len(user_ids),
+        "processed": processed,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "hh_calls": hh_calls,
+        "users_per_second": round(handled / elapsed, 3) if elapsed > 0 else 0.0,
+        "hh_calls_per_second": round(hh_calls / elapsed, 3) if elapsed > 0 else 0.0
+    }
+    if collect_results:
+        stats["results"] = results
+    logger.info(
+        f"Refreshed {handled} users in {elapsed:.1f}s "
+        f"({stats['users_per_second']} users/s, {stats['hh_calls_per_second']} HH calls/s), "
+        f"{errors} errors"
+    )
+    return stats
@@ -0,0 +1,112 @@
+"""
+Long-lived async runtime for Celery worker processes.
+
+Each worker process owns one event loop for its whole life. Tasks run their
+coroutines on it with ``run_async``, so the pooled DB engine and the shared
+HH client (both bound to the loop they were created on) survive from one
+task to the next instead of being rebuilt per task.
+
+The runtime is created on ``worker_process_init`` (after the prefork pool
+forks, so no connection is shared with the parent) and torn down on
+``worker_process_shutdown``. Pools that do not fork (solo, threads) and
+direct calls create it lazily on first use.
+"""
+
+import asyncio
+import logging
+from typing import Any, Coroutine, Optional, TypeVar
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from ..config import settings
+from ..database import get_engine, get_session_factory
+from ..services.hh_client import shutdown_hh_client
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+# Sessions opened on any other loop (e.g. scripts calling the task coroutines
+# with asyncio.run) cannot use the pooled engine and get a NullPool one
+_fallback_session_factory: Optional[async_sessionmaker] = None
+
+def _init_runtime() -> asyncio.AbstractEventLoop:
+    global _loop, _engine, _session_factory
+
+    # State inherited from the parent process is dropped, never closed: its
+    # connections and sockets still belong to the parent
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    _engine = None
+    _session_factory = None
+    logger.info("Worker async runtime started")
+    return _loop
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Return this process's event loop, creating it if needed"""
+    if _loop is None or _loop.is_closed():
+        return _init_runtime()
+    return _loop
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on the worker loop"""
+    return get_worker_loop().run_until_complete(coro)
+
+def async_session() -> AsyncSession:
+    """Open a session on the worker's pooled engine"""
+    global _engine, _session_factory, _fallback_session_factory
+
+    if asyncio.get_running_loop() is not _loop:
+        if _fallback_session_factory is None:
+            _fallback_session_factory = get_session_factory(get_engine(use_null_pool=True))
+        return _fallback_session_factory()
+
+    if _session_factory is None:
+        _engine = get_engine(
+            pool_size=settings.celery_db_pool_size,
+            max_overflow=settings.celery_db_max_overflow
+        )
+        _session_factory = get_session_factory(_engine)
+    return _session_factory()
+
+async def _close_resources() -> None:
+    await shutdown_hh_client()
+    if _engine is not None:
+        await _engine.dispose()
+
+def shutdown_runtime() -> None:
+    """Close the HH client and DB connections, then the loop"""
+    global _loop, _engine, _session_factory
+
+    if _loop is None or _loop.is_closed():
+        return
+
+    try:
+        _loop.run_until_complete(_close_resources())
+        _loop.run_until_complete(_loop.shutdown_asyncgens())
+    except Exception as e:
+        logger.warning(f"Error closing worker async runtime: {e}")
+    finally:
+        _loop.close()
+        _loop = None
+        _engine = None
+        _session_factory = None
+        logger.info("Worker async runtime stopped")
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs) -> None:
+    _init_runtime()
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs) -> None:
+    shutdown_runtime()
+
+@worker_shutdown.connect
+def _on_worker_shutdown(**kwargs) -> None:
+    # Solo and thread pools never send worker_process_shutdown
+    shutdown_runtime()
@@ -0,0 +1,304 @@
+# coding: utf-8
+"""
+Precompiled skill matching for vacancy texts.
+
+All keyword and synonym patterns are compiled once into an Aho–Corasick
+automaton, so a vacancy text is scanned a single time and every skill,
+synonym and skill word occurring in it is found in that pass. Matching keeps
+plain substring semantics on lower-cased text, exactly like the previous
+``pattern in text`` checks:
+
+* the skill itself occurs in the text -> 1.0
+* one of its synonyms occurs -> 0.8
+* some words (longer than 2 chars) of a multi-word skill occur -> 0.6 * share of words
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+SKILL_KEYWORDS = [
+    # Programming Languages
+    "python", "java", "javascript", "typescript", "c#", "c++", "php", "ruby", "go", "rust",
+    "swift", "kotlin", "scala", "r", "matlab", "perl", "bash", "powershell",
+
+    # Web Technologies
+    "html", "css", "react", "angular", "vue", "node.js", "express", "django", "flask",
+    "laravel", "spring", "asp.net", "jquery", "bootstrap", "sass", "less",
+
+    # Databases
+    "sql", "mysql", "postgresql", "oracle", "mongodb", "redis", "elasticsearch",
+    "sqlite", "cassandra", "firebase",
+
+    # Cloud & DevOps
+    "aws", "azure", "google cloud", "docker", "kubernetes", "jenkins", "gitlab",
+    "terraform", "ansible", "chef", "puppet", "vagrant",
+
+    # Tools & Frameworks
+    "git", "svn", "jira", "confluence", "slack", "teams", "zoom", "figma", "sketch",
+    "photoshop", "illustrator", "after effects", "premiere", "indesign",
+
+    # Operating Systems
+    "linux", "windows", "macos", "ubuntu", "centos", "redhat",
+
+    # Office & Business
+    "excel", "powerpoint", "word", "outlook", "sharepoint", "visio", "project",
+    "1c", "sap", "crm", "erp", "salesforce", "hubspot",
+
+    # Russian Skills
+    "программирование", "разработка", "тестирование", "администрирование",
+    "маркетинг", "продажи", "менеджмент", "аналитика", "дизайн", "копирайтинг",
+    "переводы", "преподавание", "консультирование", "проектирование",
+    "бухгалтерия", "логистика", "рекрутинг", "hr", "пиар", "реклама",
+    "фотография", "видеомонтаж", "графический дизайн", "веб-дизайн",
+    "контент-менеджмент", "smm", "seo", "контекстная реклама",
+
+    # Soft Skills (Russian)
+    "коммуникация", "лидерство", "работа в команде", "организация",
+    "планирование", "координация", "переговоры", "презентации",
+    "решение проблем", "креативность", "инновации", "адаптивность",
+
+    # Industry-specific
+    "медицина", "образование", "финансы", "банки", "страхование",
+    "недвижимость", "строительство", "производство", "логистика",
+    "торговля", "ритейл", "гостиничный бизнес", "туризм", "ресторанный бизнес",
+
+    # Technical Skills (Russian)
+    "системное администрирование", "сетевое администрирование",
+    "информационная безопасность", "кибербезопасность",
+    "техническая поддержка", "helpdesk", "it поддержка",
+    "обслуживание техники", "ремонт компьютеров", "настройка оборудования",
+
+    # Creative & Design
+    "ui/ux", "user experience", "user interface", "прототипирование",
+    "wireframing", "брендинг", "типографика", "композиция", "цветоведение",
+
+    # Data & Analytics
+    "data science", "machine learning", "искусственный интеллект",
+    "big data", "tableau", "power bi", "google analytics", "яндекс метрика",
+    "статистика", "математическое моделирование",
+
+    # Languages
+    "английский", "немецкий", "французский", "китайский", "корейский",
+    "японский", "испанский", "итальянский", "казахский", "узбекский",
+
+    # Quality Assurance
+    "manual testing", "automation testing", "selenium", "cypress",
+    "postman", "jmeter", "test planning", "bug tracking",
+
+    # Project Management
+    "agile", "scrum", "kanban", "waterfall", "pmp", "prince2",
+    "управление проектами", "координация проектов",
+]
+
+# Skill synonyms and translations for better matching
+SKILL_SYNONYMS = {
+    # Programming
+    "программирование": ["программирование", "разработка", "coding", "development", "programming", "python", "java", "javascript", "c++", "c#"],
+    "веб-разработка": ["веб-разработка", "web development", "frontend", "backend", "html", "css", "javascript", "react", "angular", "vue"],
+    "разработка": ["разработка", "development", "программирование", "coding", "programming"],
+    "тестирование по": ["тестирование", "testing", "qa", "quality assurance", "автотестирование", "manual testing"],
+    "тестирование": ["тестирование", "testing", "qa", "quality assurance"],
+
+    # Design
+    "графический дизайн": ["дизайн", "design", "графический", "graphic", "photoshop", "illustrator", "figma", "sketch"],
+    "дизайн": ["дизайн", "design", "ui", "ux", "graphic", "web design", "graphic design"],
+    "фотография": ["фотография", "photography", "photo", "фото"],
+
+    # Data & Analytics
+    "аналитика данных": ["аналитика", "analytics", "data analysis", "sql", "python", "excel", "bi"],
+    "аналитика": ["аналитика", "analytics", "analysis", "data", "sql", "excel"],
+    "работа с базами данных": ["база данных", "database", "sql", "mysql", "postgresql", "oracle"],
+
+    # Office & Admin
+    "работа с документами": ["документы", "documents", "word", "excel", "office", "делопроизводство"],
+    "бухгалтерия": ["бухгалтерия", "accounting", "финансы", "finance", "1c"],
+    "ввод данных": ["ввод данных", "data entry", "excel", "обработка данных"],
+
+    # Sales & Marketing
+    "продажи": ["продажи", "sales", "менеджер по продажам", "торговый представитель"],
+    "маркетинг": ["маркетинг", "marketing", "smm", "реклама", "promotion"],
+    "интернет-маркетинг": ["интернет-маркетинг", "digital marketing", "smm", "seo", "контекстная реклама"],
+    "smm": ["smm", "social media", "социальные сети", "instagram", "facebook", "маркетинг"],
+
+    # Education
+    "преподавание": ["преподавание", "teaching", "образование", "education", "репетитор", "tutor"],
+    "репетиторство": ["репетиторство", "tutoring", "преподавание", "обучение"],
+
+    # Service
+    "кулинария": ["кулинария", "cooking", "повар", "chef", "кухня"],
+    "уборка": ["уборка", "cleaning", "клининг", "санитария"],
+    "обслуживание клиентов": ["клиенты", "customer service", "обслуживание", "support"],
+    "работа с клиентами": ["клиенты", "customer", "обслуживание", "support", "менеджер"],
+
+    # Languages & Communication
+    "коммуникация": ["коммуникация", "communication", "общение", "переговоры"],
+    "английский язык": ["английский", "english", "язык", "language"],
+    "иностранные языки": ["язык", "language", "английский", "немецкий", "китайский"],
+
+    # Soft skills
+    "работа в команде": ["команда", "team", "teamwork", "collaboration"],
+    "лидерство": ["лидерство", "leadership", "управление", "management"],
+    "организаторские способности": ["организация", "organization", "планирование", "координация"],
+    "стрессоустойчивость": ["стресс", "stress", "устойчивость", "pressure"],
+
+    # Technical
+    "администрирование систем": ["администрирование", "admin", "системы", "linux", "windows", "сервер"],
+    "техническая поддержка": ["техподдержка", "technical support", "support", "помощь"],
+    "ремонт техники": ["ремонт", "repair", "техника", "оборудование"],
+}
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; reports every pattern that occurs in a text"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Tuple[str, ...]] = [()]
+
+        for pattern in set(patterns):
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+        # Transitions are memoized per state as the automaton meets new characters
+        self._delta: List[Dict[str, int]] = [dict(edges) for edges in self._goto]
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+            state = nxt
+        self._outputs[state] = self._outputs[state] + (pattern,)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._outputs[nxt] = self._outputs[nxt] + self._outputs[self._fail[nxt]]
+
+    def _transition(self, state: int, ch: str) -> int:
+        origin = state
+        while state and ch not in self._goto[state]:
+            state = self._fail[state]
+        nxt = self._goto[state].get(ch, 0)
+        self._delta[origin][ch] = nxt
+        return nxt
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Return the set of patterns occurring in ``text``"""
+
+        delta = self._delta
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for ch in text:
+            nxt = delta[state].get(ch)
+            if nxt is None:
+                nxt = self._transition(state, ch)
+            state = nxt
+            if outputs[state]:
+                found.update(outputs[state])
+        return frozenset(found)
+
+def _skill_words(skill: str) -> List[str]:
+    """Words of a skill that count on their own (short words are skipped)"""
+    return [word for word in skill.split() if len(word) > 2]
+
+def _index_keywords(keywords: Sequence[str]) -> Dict[str, List[int]]:
+    """
+    Map each pattern to the dictionary positions of the keywords it reveals: a keyword is
+    found if it occurs, or if any of its longer words occurs. Duplicate keywords keep
+    only their first position.
+    """
+    index: Dict[str, List[int]] = {}
+    seen = set()
+    for position, keyword in enumerate(keywords):
+        keyword = keyword.lower()
+        if keyword in seen:
+            continue
+        seen.add(keyword)
+        for pattern in {keyword, *_skill_words(keyword)}:
+            index.setdefault(pattern, []).append(position)
+    return index
+
+_KEYWORDS_BY_PATTERN = _index_keywords(SKILL_KEYWORDS)
+_KEYWORD_MATCHER = AhoCorasick(_KEYWORDS_BY_PATTERN)
+
+def extract_skills(text: str, limit: int = 15) -> List[str]:
+    """Known skill keywords mentioned in ``text``, in dictionary order, without duplicates"""
+
+    if not text:
+        return []
+
+    positions = set()
+    for pattern in _KEYWORD_MATCHER.find(text.lower()):
+        positions.update(_KEYWORDS_BY_PATTERN[pattern])
+    return [SKILL_KEYWORDS[position] for position in sorted(positions)[:limit]]
+
+class SkillProfileMatcher:
+    """Matcher compiled for one set of user skills (already lower-cased)"""
+
+    def __init__(self, skills: Sequence[str]):
+        self.skills = tuple(skills)
+        self._rules = []
+        patterns = []
+        for skill in self.skills:
+            synonyms = tuple(
+                synonym.lower() for synonym in SKILL_SYNONYMS.get(skill, [skill]) if synonym != skill
+            )
+            words = skill.split()
+            counted_words = tuple(word for word in words if len(word) > 2) if len(words) > 1 else ()
+            self._rules.append((skill, synonyms, counted_words, len(words)))
+            patterns.extend((skill, *synonyms, *counted_words))
+        self._matcher = AhoCorasick(patterns)
+
+    def _weight(self, rule, found: FrozenSet[str]) -> float:
+        skill, synonyms, counted_words, word_count = rule
+
+        # Direct match gets full weight (an empty skill trivially occurs in any text)
+        if not skill or skill in found:
+            return 1.0
+
+        weight = 0.8 if any(synonym in found for synonym in synonyms) else 0.0
+
+        # Partial word matching for compound skills
+        if counted_words:
+            word_matches = sum(1 for word in counted_words if word in found)
+            if word_matches > 0:
+                weight = max(weight, (word_matches / word_count) * 0.6)
+
+        return weight
+
+    def weights(self, vacancy_text: str) -> List[float]:
+        """Match weight of each profile skill against a lower-cased vacancy text"""
+        found = self._matcher.find(vacancy_text)
+        return [self._weight(rule, found) for rule in self._rules]
+
+    def score(self, vacancy_text: str) -> float:
+        """Average skill weight, capped at 1.0 (0.0 for an empty profile)"""
+        if not self._rules:
+            return 0.0
+        return min(sum(self.weights(vacancy_text)) / len(self._rules), 1.0)
+
+@lru_cache(maxsize=1024)
+def get_profile_matcher(skills: Tuple[str, ...]) -> SkillProfileMatcher:
+    """Compiled matcher for a profile, reused across vacancies and requests"""
+    return SkillProfileMatcher(skills)
+
+def skill_match_weight(user_skill: str, vacancy_text: str) -> float:
+    """Weight of a single lower-cased skill against a lower-cased vacancy text"""
+    return get_profile_matcher((user_skill,)).weights(vacancy_text)[0]
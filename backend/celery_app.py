@@ -50,6 +50,8 @@ celery_app.conf.update(
     task_routes={
         'app.tasks.job_recommendations.update_user_recommendations': {'queue': 'job_recommendations'},
         'app.tasks.job_recommendations.update_all_user_recommendations': {'queue': 'job_recommendations'},
+        'app.tasks.job_recommendations.refresh_user_shard': {'queue': 'job_recommendations'},
+        'app.tasks.job_recommendations.aggregate_refresh_results': {'queue': 'job_recommendations'},
         'app.tasks.job_recommendations.cleanup_old_recommendations': {'queue': 'maintenance'},
         'app.tasks.job_recommendations.trigger_user_update': {'queue': 'job_recommendations'},
         'app.tasks.job_recommendations.trigger_batch_update': {'queue': 'job_recommendations'},
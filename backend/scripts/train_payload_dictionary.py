@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Train a zstd dictionary on stored HH vacancy payloads
+Run with: python scripts/train_payload_dictionary.py [output_path] [sample_count] [dict_size]
+
+Point PAYLOAD_ZSTD_DICTIONARY_PATH at the output file to compress new payloads
+with it. Keep old dictionary files around: payloads written with a dictionary
+can only be read with that same dictionary.
+"""
+
+import asyncio
+import json
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from app.database import async_session
+from app.models.job import Vacancy
+
+async def train_dictionary(output_path: str, sample_count: int, dict_size: int):
+    """Train and save a dictionary from the most recently updated vacancies"""
+
+    try:
+        import zstandard
+    except ImportError:
+        print("❌ The zstandard package is required: pip install zstandard")
+        return
+
+    async with async_session() as db:
+        result = await db.execute(
+            select(Vacancy.raw_data)
+            .where(Vacancy.raw_data.isnot(None))
+            .order_by(Vacancy.updated_at.desc().nulls_last(), Vacancy.id.desc())
+            .limit(sample_count)
+        )
+        samples = [
+            json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            for payload in result.scalars()
+        ]
+
+    if len(samples) < 10:
+        print(f"❌ Not enough vacancy payloads to train on ({len(samples)})")
+        return
+
+    dictionary = zstandard.train_dictionary(dict_size, samples)
+    with open(output_path, "wb") as f:
+        f.write(dictionary.as_bytes())
+
+    plain = sum(len(sample) for sample in samples)
+    compressor = zstandard.ZstdCompressor(level=3, dict_data=dictionary)
+    compressed = sum(len(compressor.compress(sample)) for sample in samples)
+    print(f"✅ Dictionary {dictionary.dict_id()} trained on {len(samples)} payloads, saved to {output_path}")
+    print(f"   Sample ratio with dictionary: {plain / compressed:.1f}x")
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else "vacancy_payload.zdict"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    size = int(sys.argv[3]) if len(sys.argv) > 3 else 112640
+    asyncio.run(train_dictionary(output, count, size))
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Regression test for the vectorized batch scorers.
+Compares score_preferences_batch, score_onboarding_batch and
+score_assessment_batch with the previous one-vacancy-at-a-time scoring code
+(kept below as the reference) on edge cases and randomized batches. Scores
+must be identical, not just close.
+"""
+
+import random
+from types import SimpleNamespace
+
+from app.services.batch_scorer import (
+    STRENGTH_KEYWORDS, score_assessment_batch, score_onboarding_batch, score_preferences_batch
+)
+from app.services.enhanced_headhunter_service import EnhancedHeadHunterService
+from test_skill_matcher import VOCABULARY, reference_skill_weight
+
+RANDOM_BATCHES = 400
+
+# Reference: the scalar scoring code the batch scorers replaced, unchanged apart from being synchronous
+
+def reference_preferences_scores(vacancy, preferences):
+    scores = {
+        "skills_match_score": 0.0,
+        "location_match_score": 0.0,
+        "salary_match_score": 0.0,
+        "relevance_score": 0.0
+    }
+
+    preferred_skills = getattr(preferences, 'preferred_skills', None)
+    if preferred_skills is not None:
+        vacancy_text = (
+            vacancy.get("name", "") + " " +
+            (vacancy.get("snippet", {}).get("responsibility", "") or "") + " " +
+            (vacancy.get("snippet", {}).get("requirement", "") or "")
+        ).lower()
+
+        skill_matches = 0
+        total_skill_weight = 0
+        for skill in preferred_skills:
+            skill_matches += reference_skill_weight(skill.lower(), vacancy_text)
+            total_skill_weight += 1
+
+        if len(preferred_skills) > 0:
+            scores["skills_match_score"] = min(skill_matches / total_skill_weight, 1.0)
+
+    vacancy_area = vacancy.get("area", {})
+    if vacancy_area:
+        area_id = str(vacancy_area.get("id", ""))
+        preferred_areas = getattr(preferences, 'preferred_areas', None)
+        remote_work_preference = getattr(preferences, 'remote_work_preference', 'any')
+
+        if preferred_areas is not None and area_id in preferred_areas:
+            scores["location_match_score"] = 1.0
+        elif remote_work_preference == "only":
+            if any(word in vacancy.get("name", "").lower() for word in ["удаленн", "remote", "дистанц"]):
+                scores["location_match_score"] = 1.0
+            else:
+                scores["location_match_score"] = 0.2
+        else:
+            scores["location_match_score"] = 0.5
+
+    vacancy_salary = vacancy.get("salary")
+    preferred_salary_min = getattr(preferences, 'preferred_salary_min', None)
+    if vacancy_salary and preferred_salary_min is not None:
+        salary_from = vacancy_salary.get("from")
+        salary_to = vacancy_salary.get("to")
+
+        if salary_from or salary_to:
+            user_min = preferred_salary_min
+            user_max = getattr(preferences, 'preferred_salary_max', None)
+
+            if salary_from and salary_from >= user_min:
+                scores["salary_match_score"] = 0.8
+                if user_max is not None and salary_from <= user_max:
+                    scores["salary_match_score"] = 1.0
+            elif salary_to and salary_to >= user_min:
+                scores["salary_match_score"] = 0.6
+            else:
+                scores["salary_match_score"] = 0.3
+
+    weights = {
+        "skills_match_score": 0.4,
+        "location_match_score": 0.3,
+        "salary_match_score": 0.3
+    }
+    scores["relevance_score"] = sum(scores[key] * weight for key, weight in weights.items())
+    return scores
+
+def reference_vacancy_text(vacancy):
+    text_parts = []
+    if vacancy.get("name"):
+        text_parts.append(vacancy["name"])
+    if vacancy.get("description"):
+        text_parts.append(vacancy["description"])
+    snippet = vacancy.get("snippet", {})
+    if snippet:
+        if snippet.get("responsibility"):
+            text_parts.append(snippet["responsibility"])
+        if snippet.get("requirement"):
+            text_parts.append(snippet["requirement"])
+    key_skills = vacancy.get("key_skills", [])
+    if key_skills:
+        skills_text = " ".join([skill.get("name", "") for skill in key_skills if isinstance(skill, dict)])
+        text_parts.append(skills_text)
+    return " ".join(text_parts)
+
+def reference_onboarding_scores(vacancy, onboarding_profile, experience_mapping):
+    scores = {
+        "skills_match_score": 0.0,
+        "location_match_score": 0.0,
+        "salary_match_score": 0.0,
+        "experience_match_score": 0.0,
+        "relevance_score": 0.0
+    }
+    if not onboarding_profile:
+        return scores
+
+    if onboarding_profile.skills:
+        vacancy_text = reference_vacancy_text(vacancy).lower()
+        skill_matches = sum(1 for skill in onboarding_profile.skills if skill.lower() in vacancy_text)
+        if len(onboarding_profile.skills) > 0:
+            scores["skills_match_score"] = skill_matches / len(onboarding_profile.skills)
+    else:
+        scores["skills_match_score"] = 0.3
+
+    if onboarding_profile.preferred_cities:
+        vacancy_area = vacancy.get("area", {})
+        area_name = vacancy_area.get("name", "").lower() if vacancy_area else ""
+        for city in onboarding_profile.preferred_cities:
+            if city.lower() in area_name:
+                scores["location_match_score"] = 1.0
+                break
+        else:
+            scores["location_match_score"] = 0.5
+    else:
+        scores["location_match_score"] = 0.5
+
+    if onboarding_profile.min_salary:
+        vacancy_salary = vacancy.get("salary", {})
+        if vacancy_salary:
+            salary_from = vacancy_salary.get("from")
+            salary_to = vacancy_salary.get("to")
+            if salary_from and salary_from >= onboarding_profile.min_salary:
+                scores["salary_match_score"] = 1.0
+            elif salary_to and salary_to >= onboarding_profile.min_salary:
+                scores["salary_match_score"] = 0.7
+            else:
+                scores["salary_match_score"] = 0.3
+    else:
+        scores["salary_match_score"] = 0.5
+
+    if onboarding_profile.experience_level:
+        vacancy_experience = vacancy.get("experience", {})
+        if vacancy_experience:
+            exp_id = vacancy_experience.get("id", "")
+            if exp_id == experience_mapping.get(onboarding_profile.experience_level):
+                scores["experience_match_score"] = 1.0
+            else:
+                scores["experience_match_score"] = 0.6
+
+    weights = {
+        "skills_match_score": 0.4,
+        "location_match_score": 0.2,
+        "salary_match_score": 0.2,
+        "experience_match_score": 0.2
+    }
+    scores["relevance_score"] = sum(scores[key] * weight for key, weight in weights.items())
+    return scores
+
+def reference_assessment_scores(vacancy, assessment_result, onboarding_profile):
+    scores = {
+        "strength_match_score": 0.0,
+        "job_fit_score": 0.0,
+        "growth_potential_score": 0.0,
+        "relevance_score": 0.0
+    }
+    vacancy_text = reference_vacancy_text(vacancy).lower()
+
+    strength_matches = 0
+    total_strengths = len(assessment_result.top_strengths)
+    for strength in assessment_result.top_strengths:
+        if isinstance(strength, dict):
+            category = strength.get("category", "")
+        else:
+            category = getattr(strength, "category", "")
+        if category in STRENGTH_KEYWORDS:
+            if any(keyword in vacancy_text for keyword in STRENGTH_KEYWORDS[category]):
+                strength_matches += 1
+    if total_strengths > 0:
+        scores["strength_match_score"] = strength_matches / total_strengths
+
+    if assessment_result.overall_score:
+        vacancy_complexity_indicators = ["опыт", "руководител", "senior", "lead", "главный"]
+        complexity_score = sum(1 for indicator in vacancy_complexity_indicators if indicator in vacancy_text)
+        if assessment_result.overall_score >= 7.0:
+            scores["job_fit_score"] = min(1.0, 0.6 + (complexity_score * 0.2))
+        elif assessment_result.overall_score >= 5.0:
+            scores["job_fit_score"] = 0.7
+        else:
+            entry_level_indicators = ["junior", "стажер", "начинающ", "без опыта"]
+            if any(indicator in vacancy_text for indicator in entry_level_indicators):
+                scores["job_fit_score"] = 0.8
+            else:
+                scores["job_fit_score"] = 0.5
+
+    growth_indicators = ["развитие", "карьер", "обучение", "тренинг", "рост", "возможност"]
+    growth_score = sum(1 for indicator in growth_indicators if indicator in vacancy_text)
+    scores["growth_potential_score"] = min(1.0, growth_score * 0.3)
+
+    location_score = 0.5
+    salary_score = 0.5
+    if onboarding_profile:
+        if onboarding_profile.preferred_cities:
+            vacancy_area = vacancy.get("area", {})
+            area_name = vacancy_area.get("name", "").lower() if vacancy_area else ""
+            for city in onboarding_profile.preferred_cities:
+                if city.lower() in area_name:
+                    location_score = 1.0
+                    break
+        if onboarding_profile.min_salary:
+            vacancy_salary = vacancy.get("salary", {})
+            if vacancy_salary:
+                salary_from = vacancy_salary.get("from")
+                if salary_from and salary_from >= onboarding_profile.min_salary:
+                    salary_score = 1.0
+                else:
+                    salary_score = 0.3
+
+    scores["relevance_score"] = (
+        scores["strength_match_score"] * 0.4 +
+        scores["job_fit_score"] * 0.3 +
+        scores["growth_potential_score"] * 0.1 +
+        location_score * 0.1 +
+        salary_score * 0.1
+    )
+    return scores
+
+# Random vacancies and profiles
+
+CITIES = ["Алматы", "Астана", "Шымкент", "Караганда", "almaty", "Remote", ""]
+INDICATORS = [
+    "опыт", "руководитель", "senior", "lead", "главный", "junior", "стажер", "начинающий", "без опыта",
+    "развитие", "карьера", "обучение", "тренинг", "рост", "возможности", "удаленно", "remote", "дистанционно"
+]
+KEYWORDS = sorted({keyword for keywords in STRENGTH_KEYWORDS.values() for keyword in keywords}) + INDICATORS
+EXPERIENCE_IDS = ["noExperience", "between1And3", "between3And6", "moreThan6", ""]
+EXPERIENCE_LEVELS = ["Без опыта", "no_experience", "between1And3", "between3And6", "moreThan6", "unknown", None, ""]
+
+def random_text(rng: random.Random, words: int) -> str:
+    pool = KEYWORDS + VOCABULARY + ["и", "в", "работа", "компания"]
+    text = " ".join(rng.choice(pool) for _ in range(rng.randint(0, words)))
+    return text.upper() if rng.random() < 0.1 else text
+
+def random_optional(rng: random.Random, value):
+    return rng.choice([value, value, None, 0]) if rng.random() < 0.4 else value
+
+def random_salary(rng: random.Random):
+    kind = rng.random()
+    if kind < 0.2:
+        return None
+    if kind < 0.3:
+        return {}
+    return {
+        "from": random_optional(rng, rng.choice([100000, 150000, 250000, 400000.5])),
+        "to": random_optional(rng, rng.choice([150000, 300000, 500000])),
+        "currency": "KZT"
+    }
+
+def random_vacancy(rng: random.Random, index: int) -> dict:
+    vacancy = {"id": str(index), "name": random_text(rng, 4)}
+    if rng.random() < 0.8:
+        vacancy["snippet"] = {
+            "responsibility": rng.choice([random_text(rng, 8), None, ""]),
+            "requirement": rng.choice([random_text(rng, 8), None])
+        }
+    if rng.random() < 0.5:
+        vacancy["description"] = random_text(rng, 30)
+    if rng.random() < 0.4:
+        vacancy["key_skills"] = [{"name": rng.choice(VOCABULARY)} for _ in range(rng.randint(0, 4))] + rng.choice([[], ["bad"]])
+    area = rng.random()
+    if area < 0.7:
+        vacancy["area"] = {"id": rng.choice(["160", "159", "161", 40]), "name": rng.choice(CITIES)}
+    elif area < 0.8:
+        vacancy["area"] = {}
+    elif area < 0.9:
+        vacancy["area"] = None
+    salary = random_salary(rng)
+    if salary is not None or rng.random() < 0.5:
+        vacancy["salary"] = salary
+    if rng.random() < 0.7:
+        vacancy["experience"] = rng.choice([{"id": rng.choice(EXPERIENCE_IDS)}, {}, None])
+    return vacancy
+
+def random_preferences(rng: random.Random):
+    return SimpleNamespace(
+        preferred_skills=rng.choice([None, [], [rng.choice(VOCABULARY).upper() if rng.random() < 0.2 else rng.choice(VOCABULARY) for _ in range(rng.randint(1, 6))]]),
+        preferred_areas=rng.choice([None, [], ["160"], ["159", "40"]]),
+        remote_work_preference=rng.choice(["any", "only", "no"]),
+        preferred_salary_min=rng.choice([None, 0, 120000, 200000, 300000]),
+        preferred_salary_max=rng.choice([None, 250000, 450000])
+    )
+
+def random_profile(rng: random.Random):
+    if rng.random() < 0.05:
+        return None
+    return SimpleNamespace(
+        skills=rng.choice([None, [], [rng.choice(VOCABULARY + KEYWORDS + [""]) for _ in range(rng.randint(1, 6))]]),
+        preferred_cities=rng.choice([None, [], [rng.choice(CITIES) for _ in range(rng.randint(1, 3))]]),
+        min_salary=rng.choice([None, 0, 100000, 200000, 350000]),
+        experience_level=rng.choice(EXPERIENCE_LEVELS)
+    )
+
+def random_assessment(rng: random.Random):
+    categories = list(STRENGTH_KEYWORDS) + ["unknown", ""]
+    strengths = []
+    for _ in range(rng.randint(0, 4)):
+        category = rng.choice(categories)
+        strengths.append({"category": category} if rng.random() < 0.5 else SimpleNamespace(category=category))
+    return SimpleNamespace(top_strengths=strengths, overall_score=rng.choice([None, 0, 3.5, 5.0, 6.9, 7.0, 9.2]))
+
+def check_batch(service, vacancies, preferences, profile, assessment, label):
+    texts = [service._get_vacancy_text(vacancy).lower() for vacancy in vacancies]
+    assert texts == [reference_vacancy_text(vacancy).lower() for vacancy in vacancies], label
+
+    expected = [reference_preferences_scores(vacancy, preferences) for vacancy in vacancies]
+    assert score_preferences_batch(vacancies, preferences) == expected, label
+
+    expected = [reference_onboarding_scores(vacancy, profile, service.experience_mapping) for vacancy in vacancies]
+    assert score_onboarding_batch(vacancies, texts, profile, service.experience_mapping) == expected, label
+
+    expected = [reference_assessment_scores(vacancy, assessment, profile) for vacancy in vacancies]
+    assert score_assessment_batch(vacancies, texts, assessment, profile) == expected, label
+
+def test_batch_scorer():
+    service = EnhancedHeadHunterService()
+
+    print("🔍 Checking edge cases against the scalar scorers...")
+    empty_profile = SimpleNamespace(skills=None, preferred_cities=None, min_salary=None, experience_level=None)
+    empty_preferences = SimpleNamespace()
+    no_strengths = SimpleNamespace(top_strengths=[], overall_score=None)
+    edge_vacancies = [
+        {"id": "1", "name": ""},
+        {"id": "2", "name": "Python", "area": None, "salary": None, "experience": None},
+        {"id": "3", "name": "Remote", "area": {}, "salary": {}, "experience": {}},
+        {"id": "4", "name": "x", "salary": {"from": 0, "to": None}, "area": {"id": 160, "name": "Алматы"}},
+        {"id": "5", "name": "x", "salary": {"from": None, "to": 300000}, "snippet": {}},
+    ]
+    for profile in (None, empty_profile):
+        for preferences in (empty_preferences, SimpleNamespace(preferred_skills=[], preferred_salary_min=0)):
+            check_batch(service, edge_vacancies, preferences, profile, no_strengths, "edge")
+    assert score_preferences_batch([], empty_preferences) == []
+    assert score_onboarding_batch([], [], empty_profile, service.experience_mapping) == []
+    print("✅ Edge cases match")
+
+    print("🔍 Checking randomized batches...")
+    rng = random.Random(20260118)
+    vacancies_scored = 0
+    for batch in range(RANDOM_BATCHES):
+        vacancies = [random_vacancy(rng, i) for i in range(rng.randint(1, 25))]
+        check_batch(service, vacancies, random_preferences(rng), random_profile(rng), random_assessment(rng), batch)
+        vacancies_scored += len(vacancies)
+    print(f"✅ {RANDOM_BATCHES} random batches ({vacancies_scored} vacancies) score identically")
+
+if __name__ == "__main__":
+    test_batch_scorer()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test for the token-budgeted chat context and rolling chat summaries.
+Checks that prompts stay within chat_context_max_tokens however long the chat
+or the pasted messages are, that turns which no longer fit are folded into
+ChatHistory.summary incrementally, and that a long chat calls the summarizer
+once every several turns rather than on each one.
+Uses an in-memory SQLite database (no PostgreSQL or Azure OpenAI needed).
+"""
+
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+import app.models  # noqa: F401 - registers all models
+from app.config import settings
+from app.models.user import User
+from app.models.assistant import Assistant
+from app.models.chat import ChatHistory, Message, MessageRole
+from app.services.chat_context import (
+    SUMMARY_PREFIX, build_context, count_tokens, message_tokens, needs_summary, refresh_chat_summary
+)
+
+SYSTEM_PROMPT = "Ты - профессиональный консультант по карьере. " * 10
+RESUME = "Опыт работы: Python, SQL, анализ данных, управление проектами. " * 400  # A pasted resume
+
+def prompt_tokens(messages) -> int:
+    return sum(message_tokens(message["content"]) for message in messages)
+
+def make_message(message_id: int, role: MessageRole, content: str) -> Message:
+    return Message(id=message_id, chat_history_id=1, role=role, content=content, sender_id="x", sender_name="x")
+
+def check_budget():
+    print("🔍 Checking the prompt budget...")
+
+    history = []
+    for i in range(40):
+        history.append(make_message(2 * i + 1, MessageRole.USER, f"Вопрос {i}: как подготовиться к собеседованию? " * 5))
+        history.append(make_message(2 * i + 2, MessageRole.AI, f"Ответ {i}: изучите компанию и подготовьте примеры. " * 12))
+    history[-3].content = RESUME
+
+    messages = build_context(SYSTEM_PROMPT, history, "Что дальше?", summary="Пользователь ищет работу аналитиком.")
+    assert prompt_tokens(messages) <= settings.chat_context_max_tokens, prompt_tokens(messages)
+    assert messages[0]["content"] == SYSTEM_PROMPT
+    assert messages[1]["content"].startswith(SUMMARY_PREFIX)
+    assert messages[-1] == {"role": "user", "content": "Что дальше?"}
+    assert messages[-2]["content"] == history[-1].content, "Newest history comes first"
+    assert len(messages) - 3 < len(history), "Older history is left out"
+    assert all(count_tokens(m["content"]) <= settings.chat_context_message_max_tokens for m in messages[2:-1])
+    print(f"✅ 80-message chat with a pasted resume: {prompt_tokens(messages)} prompt tokens")
+
+    messages = build_context(SYSTEM_PROMPT, [], RESUME)
+    assert prompt_tokens(messages) <= settings.chat_context_max_tokens
+    print(f"✅ Oversized new message cut to fit: {prompt_tokens(messages)} prompt tokens")
+
+async def create_chat(turns: int):
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as db:
+        user = User(username="summary", email="summary@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        assistant = Assistant(user_id=user.id, name="Bot", model="gpt-4o")
+        db.add(assistant)
+        await db.flush()
+        now = int(time.time())
+        chat = ChatHistory(assistant_id=assistant.id, user_id=user.id, title="t", created_time=now, updated_time=now)
+        db.add(chat)
+        await db.flush()
+        for i in range(turns):
+            db.add(Message(chat_history_id=chat.id, role=MessageRole.USER, content=f"Вопрос {i}? " * 40, sender_id="user", sender_name="u"))
+            db.add(Message(chat_history_id=chat.id, role=MessageRole.AI, content=f"Ответ {i}. " * 80, sender_id="ai", sender_name="BOT"))
+        await db.commit()
+        return engine, session_factory, chat.id
+
+async def check_summary():
+    print("🔍 Checking rolling summaries...")
+
+    engine, session_factory, chat_id = await create_chat(30)
+
+    async def load_chat():
+        async with session_factory() as db:
+            return await db.get(ChatHistory, chat_id)
+
+    calls = []
+
+    async def fake_summarize(previous, turns):
+        calls.append(len(turns))
+        return f"{previous or ''} +{len(turns)}".strip()
+
+    async def refresh_until_settled(summarize) -> int:
+        # Each refresh folds a bounded chunk; a long backlog takes several
+        rounds = 0
+        while await refresh_chat_summary(session_factory, chat_id, SYSTEM_PROMPT, summarize):
+            rounds += 1
+        return rounds
+
+    rounds = await refresh_until_settled(fake_summarize)
+    chat = await load_chat()
+    first_until = chat.summary_until_message_id
+    assert rounds >= 1 and first_until is not None
+    assert chat.summary == " ".join(f"+{folded}" for folded in calls)
+
+    # Whatever is left unsummarized fits the kept share of the budget
+    async with session_factory() as db:
+        remaining = (await db.execute(
+            Message.__table__.select().where(Message.chat_history_id == chat_id).where(Message.id > first_until)
+        )).all()
+    assert not needs_summary(SYSTEM_PROMPT, [make_message(r.id, r.role, r.content) for r in remaining], [])
+    print(f"✅ Summary folded {sum(calls)} turns in {rounds} refreshes, {len(remaining)} newer messages stay verbatim")
+
+    # The chat keeps growing: the summary is extended, not rebuilt
+    async with session_factory() as db:
+        for i in range(10):
+            db.add(Message(chat_history_id=chat_id, role=MessageRole.USER, content="Еще вопрос? " * 60, sender_id="user", sender_name="u"))
+        await db.commit()
+
+    folded_before = len(calls)
+    assert await refresh_until_settled(fake_summarize) >= 1
+    chat = await load_chat()
+    assert chat.summary.startswith(" ".join(f"+{folded}" for folded in calls[:folded_before]) + " +")
+    assert chat.summary_until_message_id > first_until
+
+    # Without a model the summary is extractive and bounded
+    async with session_factory() as db:
+        for i in range(10):
+            db.add(Message(chat_history_id=chat_id, role=MessageRole.AI, content="Длинный ответ. " * 200, sender_id="ai", sender_name="BOT"))
+        await db.commit()
+    assert await refresh_until_settled(None) >= 1
+    chat = await load_chat()
+    assert count_tokens(chat.summary) <= settings.chat_summary_max_tokens
+    print("✅ Summary extended incrementally, extractive fallback stays within its limit")
+
+    await engine.dispose()
+
+async def check_summary_frequency():
+    print("🔍 Checking how often a long chat is summarized...")
+
+    engine, session_factory, chat_id = await create_chat(0)
+    calls = []
+
+    async def fake_summarize(previous, turns):
+        calls.append(len(turns))
+        return f"{previous or ''} +{len(turns)}".strip()
+
+    # The chat endpoints: load the unsummarized history, save the turn, refresh the summary once if due
+    turns = 60
+    for i in range(turns):
+        question, reply = f"Вопрос {i}: что изучить дальше? " * 8, f"Ответ {i}: начните с основ и практики. " * 20
+        async with session_factory() as db:
+            chat = await db.get(ChatHistory, chat_id)
+            recent = (await db.execute(
+                select(Message)
+                .where(Message.chat_history_id == chat_id)
+                .where(Message.id > (chat.summary_until_message_id or 0))
+                .order_by(Message.id.desc())
+                .limit(settings.chat_context_max_messages)
+            )).scalars().all()
+            due = needs_summary(SYSTEM_PROMPT, list(reversed(recent)), [question])
+            db.add(Message(chat_history_id=chat_id, role=MessageRole.USER, content=question, sender_id="user", sender_name="u"))
+            db.add(Message(chat_history_id=chat_id, role=MessageRole.AI, content=reply, sender_id="ai", sender_name="BOT"))
+            await db.commit()
+        if due:
+            assert await refresh_chat_summary(session_factory, chat_id, SYSTEM_PROMPT, fake_summarize)
+
+    assert calls, "A long chat is summarized"
+    assert len(calls) <= turns // 5, f"{len(calls)} summarizer calls in {turns} turns"
+    assert min(calls) >= 8, f"Each call folds several turns: {calls}"
+    print(f"✅ {turns} turns made {len(calls)} summarizer calls, folding {calls} messages")
+
+    await engine.dispose()
+
+def test_chat_context():
+    check_budget()
+    asyncio.run(check_summary())
+    asyncio.run(check_summary_frequency())
+
+if __name__ == "__main__":
+    test_chat_context()
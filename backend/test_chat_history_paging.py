@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test for the assistant chat list and paged chat messages.
+Checks that the chat list returns counts without loading messages, that
+before_id pages walk a chat backwards exactly once, and that after_id returns
+only the messages a client has not seen yet.
+Uses an in-memory SQLite database (no PostgreSQL needed).
+"""
+
+import asyncio
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import Base
+import app.models  # noqa: F401 - registers all models
+from app.models.user import User
+from app.models.assistant import Assistant
+from app.models.chat import ChatHistory, Message, MessageRole
+from app.api.assistants import get_assistant, get_assistant_chats, get_chat_messages
+
+MESSAGE_COUNT = 45
+
+async def seed(session_factory) -> tuple[User, int, list[int]]:
+    async with session_factory() as db:
+        user = User(username="history", email="history@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        assistant = Assistant(user_id=user.id, name="Bot", model="gpt-4o")
+        db.add(assistant)
+        await db.flush()
+
+        now = int(time.time())
+        chats = []
+        for i, size in enumerate([MESSAGE_COUNT, 3, 0]):
+            chat = ChatHistory(
+                assistant_id=assistant.id, user_id=user.id, title=f"Chat {i}",
+                last_conversation=f"Last {i}", created_time=now, updated_time=now + i
+            )
+            db.add(chat)
+            await db.flush()
+            for j in range(size):
+                role = MessageRole.USER if j % 2 == 0 else MessageRole.AI
+                db.add(Message(chat_history_id=chat.id, role=role, content=f"{i}-{j}", sender_id=role.value, sender_name="x"))
+            chats.append(chat.id)
+
+        db.add(ChatHistory(
+            assistant_id=assistant.id, user_id=user.id, title="Hidden",
+            created_time=now, updated_time=now + 10, enable=False
+        ))
+        await db.commit()
+        await db.refresh(user)
+        return user, assistant.id, chats
+
+async def check_history():
+    print("🔍 Checking chat list and message pages...")
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user, assistant_id, chat_ids = await seed(session_factory)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    async with session_factory() as db:
+        chats = await get_assistant_chats(assistant_id, db=db, current_user=user)
+        assert [chat.id for chat in chats.data] == [str(chat_id) for chat_id in reversed(chat_ids)]
+        assert [chat.messageCount for chat in chats.data] == [0, 3, MESSAGE_COUNT]
+        assert chats.data[-1].lastConversation == "Last 0"
+        assert not any("messages.content" in statement for statement in statements), "Chat list must not load messages"
+        print(f"✅ {chats.total} chats listed with counts and no message rows loaded")
+
+        statements.clear()
+        assistant = await get_assistant(assistant_id, include_messages=False, db=db, current_user=user)
+        assert len(assistant.chat_history) == 3 and all(chat.conversation is None for chat in assistant.chat_history)
+        assert not any("FROM messages" in statement for statement in statements)
+
+    async with session_factory() as db:
+        assistant = await get_assistant(assistant_id, include_messages=True, db=db, current_user=user)
+        assert sum(len(chat.conversation) for chat in assistant.chat_history) == MESSAGE_COUNT + 3
+        print("✅ get_assistant loads messages only when asked to")
+
+    async with session_factory() as db:
+        chat_id = chat_ids[0]
+        seen = []
+        before_id = None
+        while True:
+            page = await get_chat_messages(
+                assistant_id, chat_id, limit=10, before_id=before_id, after_id=None, db=db, current_user=user
+            )
+            ids = [int(message.id) for message in page.data]
+            assert ids == sorted(ids), "Each page is chronological"
+            seen = ids + seen
+            if not page.hasMore:
+                break
+            before_id = ids[0]
+
+        assert len(seen) == MESSAGE_COUNT and seen == sorted(set(seen))
+        assert [message.content for message in page.data][0] == "0-0"
+        print(f"✅ Walked {MESSAGE_COUNT} messages backwards with before_id")
+
+        # Incremental sync: only what arrived after the newest message the client has
+        newest = seen[-1]
+        synced = await get_chat_messages(assistant_id, chat_id, limit=50, before_id=None, after_id=newest, db=db, current_user=user)
+        assert synced.data == [] and not synced.hasMore
+
+        db.add(Message(chat_history_id=chat_id, role=MessageRole.USER, content="new", sender_id="user", sender_name="x"))
+        await db.commit()
+        synced = await get_chat_messages(assistant_id, chat_id, limit=50, before_id=None, after_id=newest, db=db, current_user=user)
+        assert [message.content for message in synced.data] == ["new"]
+
+        partial = await get_chat_messages(assistant_id, chat_id, limit=5, before_id=None, after_id=seen[9], db=db, current_user=user)
+        assert [int(message.id) for message in partial.data] == seen[10:15] and partial.hasMore
+        print("✅ after_id returns only newer messages, oldest first")
+
+        for kwargs, code in [
+            ({"chat_id": chat_id, "before_id": 5, "after_id": 1}, 400),
+            ({"chat_id": chat_id + 100, "before_id": None, "after_id": None}, 404),
+        ]:
+            try:
+                await get_chat_messages(assistant_id, limit=10, db=db, current_user=user, **kwargs)
+                raise AssertionError(f"Expected {code}")
+            except HTTPException as e:
+                assert e.status_code == code
+
+        try:
+            await get_assistant_chats(assistant_id + 1, db=db, current_user=user)
+            raise AssertionError("Expected 404")
+        except HTTPException as e:
+            assert e.status_code == 404
+        print("✅ Conflicting parameters and foreign chats are rejected")
+
+    await engine.dispose()
+
+def test_chat_history_paging():
+    asyncio.run(check_history())
+
+if __name__ == "__main__":
+    test_chat_history_paging()
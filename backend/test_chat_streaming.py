@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Tests for the assistant chat endpoints against a slow LLM.
+Runs a local fake OpenAI-compatible server and the assistants router with
+uvicorn, then checks that:
+  - tokens are relayed as delta events and the full reply is saved at the end
+  - a client disconnect cancels the upstream completion and saves no reply
+  - concurrent chats do not hold database connections while the LLM answers
+Uses a temporary SQLite database (no PostgreSQL or Azure OpenAI needed).
+"""
+
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from contextlib import contextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from openai import AsyncAzureOpenAI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.database import Base, get_db
+import app.models  # noqa: F401 - registers all models
+from app.models.user import User
+from app.models.chat import Message, MessageRole
+from app.api import assistants
+from app.auth.jwt import get_current_user
+from app.config import settings
+
+TOKENS = [f"token{i} " for i in range(40)]
+TOKEN_DELAY = 0.05
+
+# What the fake upstream saw: completed streams and streams cut off by the client
+upstream = {"completed": 0, "cancelled": 0}
+
+def build_fake_openai() -> FastAPI:
+    fake = FastAPI()
+
+    @fake.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        if not body.get("stream"):
+            await asyncio.sleep(TOKEN_DELAY * len(TOKENS))
+            upstream["completed"] += 1
+            return {
+                "id": "c", "object": "chat.completion", "created": 0, "model": deployment,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(TOKENS)}, "finish_reason": "stop"}]
+            }
+
+        async def events():
+            try:
+                # Azure sends content filter results first, without choices
+                yield f"data: {json.dumps({'id': 'c', 'object': 'chat.completion.chunk', 'created': 0, 'model': deployment, 'choices': []})}\n\n"
+                for token in TOKENS:
+                    await asyncio.sleep(TOKEN_DELAY)
+                    chunk = {
+                        "id": "c", "object": "chat.completion.chunk", "created": 0, "model": deployment,
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+                upstream["completed"] += 1
+            except asyncio.CancelledError:
+                upstream["cancelled"] += 1
+                raise
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return fake
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def serve(app: FastAPI) -> tuple[uvicorn.Server, int]:
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, port
+
+def read_events(response: httpx.Response, stop_after_deltas: int | None = None) -> list[tuple[str, dict]]:
+    events = []
+    event = None
+    deltas = 0
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            events.append((event, json.loads(line[len("data: "):])))
+            if event == "delta":
+                deltas += 1
+                if stop_after_deltas is not None and deltas >= stop_after_deltas:
+                    break
+    return events
+
+async def load_messages(session_factory, chat_id: int) -> list[Message]:
+    async with session_factory() as db:
+        result = await db.execute(
+            select(Message).where(Message.chat_history_id == chat_id).order_by(Message.id)
+        )
+        return list(result.scalars().all())
+
+async def create_user(engine, session_factory, username: str) -> User:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as db:
+        user = User(username=username, email=f"{username}@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        return user
+
+@contextmanager
+def running_chat_app(app_session_factory, user: User):
+    """Fake OpenAI server plus the assistants router; yields the router base URL"""
+
+    async def override_db():
+        async with app_session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(assistants.router)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    fake_server, fake_port = serve(build_fake_openai())
+    app_server, app_port = serve(app)
+
+    original_client, original_key = assistants.azure_openai_client, settings.azure_openai_api_key
+    assistants.azure_openai_client = AsyncAzureOpenAI(
+        api_key="test-key",
+        azure_endpoint=f"http://127.0.0.1:{fake_port}",
+        api_version="2024-02-01",
+        http_client=httpx.AsyncClient(timeout=10)
+    )
+    settings.azure_openai_api_key = "test-key"
+    try:
+        yield f"http://127.0.0.1:{app_port}/api/main/assistants"
+    finally:
+        assistants.azure_openai_client, settings.azure_openai_api_key = original_client, original_key
+        app_server.should_exit = True
+        fake_server.should_exit = True
+
+def test_chat_streaming():
+    print("🔍 Testing streaming chat endpoint...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "chat_stream.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user = asyncio.run(create_user(engine, session_factory, "streamer"))
+    upstream.update(completed=0, cancelled=0)
+
+    with running_chat_app(session_factory, user) as base_url, httpx.Client(timeout=10) as client:
+        url = f"{base_url}/1/chat/stream"
+
+        # 1. Full stream
+        started = time.monotonic()
+        with client.stream("POST", url, json={"participant": "", "message": "Hello"}) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = read_events(response)
+        elapsed = time.monotonic() - started
+
+        names = [name for name, _ in events]
+        assert names[0] == "start" and names[-1] == "done", names
+        reply = "".join(data["content"] for name, data in events if name == "delta")
+        assert reply == "".join(TOKENS)
+        chat_id = int(events[0][1]["chatId"])
+
+        messages = asyncio.run(load_messages(session_factory, chat_id))
+        assert [m.role for m in messages] == [MessageRole.USER, MessageRole.AI]
+        assert messages[1].content == reply.strip()
+        assert events[-1][1]["messageId"] == str(messages[1].id)
+        print(f"✅ {len(TOKENS)} deltas relayed in {elapsed:.2f}s and the reply was saved")
+
+        # 2. Client disconnects after the first tokens
+        with client.stream("POST", url, json={"participant": str(chat_id), "message": "Again"}) as response:
+            events = read_events(response, stop_after_deltas=3)
+
+        deadline = time.monotonic() + 5
+        while upstream["cancelled"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert upstream["cancelled"] == 1, upstream
+        assert upstream["completed"] == 1, upstream
+
+        messages = asyncio.run(load_messages(session_factory, chat_id))
+        assert [m.role for m in messages] == [MessageRole.USER, MessageRole.AI, MessageRole.USER]
+        print("✅ Disconnect cancelled the upstream completion and saved no partial reply")
+
+    asyncio.run(engine.dispose())
+
+def test_chat_releases_connection():
+    print("🔍 Testing concurrent chats against a one-connection pool...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "chat_pool.db")
+    setup_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    setup_factory = async_sessionmaker(setup_engine, expire_on_commit=False)
+    user = asyncio.run(create_user(setup_engine, setup_factory, "pooled"))
+    upstream.update(completed=0, cancelled=0)
+
+    # One connection and a pool timeout shorter than one LLM call: holding the
+    # connection across the call would fail every other concurrent chat
+    app_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0, pool_timeout=1
+    )
+    chats = 4
+
+    async def send_all(url: str) -> list[dict]:
+        async with httpx.AsyncClient(timeout=30) as client:
+            responses = await asyncio.gather(*[
+                client.post(url, json={"participant": "", "message": f"Question {i}"}) for i in range(chats)
+            ])
+        return [response.json() for response in responses]
+
+    with running_chat_app(async_sessionmaker(app_engine, expire_on_commit=False), user) as base_url:
+        started = time.monotonic()
+        results = asyncio.run(send_all(f"{base_url}/1/chat"))
+        elapsed = time.monotonic() - started
+
+    assert all(result["replies"] == ["".join(TOKENS).strip()] for result in results), results
+    assert upstream["completed"] == chats
+
+    async def count_ai_messages() -> int:
+        async with setup_factory() as db:
+            result = await db.execute(select(Message).where(Message.role == MessageRole.AI))
+            return len(result.scalars().all())
+
+    assert asyncio.run(count_ai_messages()) == chats
+    print(f"✅ {chats} concurrent chats answered in {elapsed:.2f}s through one pooled connection")
+
+    asyncio.run(setup_engine.dispose())
+
+if __name__ == "__main__":
+    test_chat_streaming()
+    test_chat_releases_connection()
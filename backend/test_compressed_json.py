@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test for the compressed JSON column type.
+Checks that payloads round-trip through a database column with the zlib, zstd
+and zstd-with-dictionary codec headers, that values keep decoding after the
+configured codec changes, that reading a value whose codec or dictionary is
+not available fails clearly, and that the a7c4e1f9d386 migration converts
+existing JSON rows in batches and back.
+Uses temporary SQLite databases; zstd checks need the zstandard package.
+"""
+
+import importlib.util
+import json
+import os
+import struct
+import tempfile
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from app.config import settings
+from app.models import types
+from app.models.types import CODEC_ZLIB, CODEC_ZSTD, CODEC_ZSTD_DICT, CompressedJSON, compress_payload, decompress_payload
+
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic", "versions", "a7c4e1f9d386_compress_vacancy_raw_data.py")
+
+def make_payload(i: int) -> dict:
+    return {
+        "id": str(i),
+        "name": f"Python разработчик {i}",
+        "area": {"id": "160", "name": "Алматы"},
+        "salary": {"from": 300000 + i, "to": None, "currency": "KZT"} if i % 3 else None,
+        "key_skills": [{"name": "Python"}, {"name": "SQL"}, {"name": f"skill-{i % 7}"}],
+        "description": "<p>Разработка backend-сервисов на FastAPI и PostgreSQL</p>" * (1 + i % 4),
+        "archived": False
+    }
+
+def configure(compression: str, dictionary_path=None):
+    settings.payload_compression = compression
+    settings.payload_zstd_dictionary_path = dictionary_path
+    types._load_dictionary.cache_clear()
+
+def round_trip(engine, payloads) -> list:
+    """Write payloads through a CompressedJSON column and return (raw bytes, decoded value) pairs"""
+    metadata = sa.MetaData()
+    table = sa.Table(
+        "payloads_" + os.urandom(4).hex(), metadata,
+        sa.Column("id", sa.Integer, primary_key=True), sa.Column("data", CompressedJSON, nullable=True)
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [{"id": i, "data": payload} for i, payload in enumerate(payloads)])
+        raw = conn.execute(sa.text(f"SELECT data FROM {table.name} ORDER BY id")).scalars().all()
+        decoded = conn.execute(sa.select(table.c.data).order_by(table.c.id)).scalars().all()
+    return list(zip(raw, decoded))
+
+def check_codecs(engine, dictionary_path: str):
+    print("🔍 Checking codec round trips...")
+    payloads = [make_payload(i) for i in range(5)] + [None, [], {"text": "ü€😀"}]
+
+    configure("zlib")
+    zlib_rows = round_trip(engine, payloads)
+    for (raw, decoded), payload in zip(zlib_rows, payloads):
+        assert decoded == payload
+        assert raw is None if payload is None else raw[0] == CODEC_ZLIB
+
+    configure("zstd")
+    zstd_rows = round_trip(engine, payloads)
+    for (raw, decoded), payload in zip(zstd_rows, payloads):
+        assert decoded == payload
+        assert raw is None if payload is None else raw[0] == CODEC_ZSTD
+
+    configure("zstd", dictionary_path)
+    dict_id = types._load_dictionary().dict_id()
+    dict_rows = round_trip(engine, payloads)
+    for (raw, decoded), payload in zip(dict_rows, payloads):
+        assert decoded == payload
+        if payload is not None:
+            assert raw[0] == CODEC_ZSTD_DICT and struct.unpack(">I", raw[1:5])[0] == dict_id
+    plain = sum(len(raw) for raw, _ in zstd_rows[:5])
+    with_dictionary = sum(len(raw) for raw, _ in dict_rows[:5])
+    assert with_dictionary < plain, (with_dictionary, plain)
+    print(f"✅ zlib, zstd and zstd dictionary {dict_id} values round-trip ({plain} -> {with_dictionary} bytes with the dictionary)")
+
+    # Existing values keep their own codec after the configuration changes
+    configure("zlib", dictionary_path)
+    for raw, decoded in zlib_rows + zstd_rows + dict_rows:
+        if raw is not None:
+            assert decompress_payload(raw) == decoded
+    print("✅ Values written with any codec decode under another configured codec")
+    return zstd_rows, dict_rows
+
+def check_missing_codec(zstd_rows, dict_rows):
+    print("🔍 Checking values whose codec is not available...")
+    zstd_value, dict_value = zstd_rows[0][0], dict_rows[0][0]
+
+    # The dictionary is not configured, or another dictionary is
+    configure("zstd")
+    try:
+        decompress_payload(dict_value)
+        assert False, "A dictionary payload must not decode without its dictionary"
+    except RuntimeError as e:
+        assert "not configured" in str(e)
+    assert decompress_payload(zstd_value) == make_payload(0)
+
+    # The zstandard package is not installed: writes fall back to zlib, zstd reads fail clearly
+    zstd = types._zstd
+    types._zstd = lambda: None
+    try:
+        value = compress_payload(make_payload(1))
+        assert value[0] == CODEC_ZLIB and decompress_payload(value) == make_payload(1)
+        for stored in (zstd_value, dict_value):
+            try:
+                CompressedJSON().process_result_value(stored, None)
+                assert False, "A zstd payload must not decode without zstandard"
+            except RuntimeError as e:
+                assert "zstandard" in str(e)
+    finally:
+        types._zstd = zstd
+
+    try:
+        decompress_payload(bytes([9]) + value[1:])
+        assert False, "An unknown codec header must be rejected"
+    except ValueError as e:
+        assert "codec 9" in str(e)
+    print("✅ Missing zstandard, a missing dictionary and unknown headers raise clear errors")
+
+def check_migration(engine):
+    print("🔍 Checking the a7c4e1f9d386 raw_data migration...")
+    spec = importlib.util.spec_from_file_location("compress_vacancy_raw_data", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    migration.BATCH_SIZE = 3
+
+    metadata = sa.MetaData()
+    tables = [
+        sa.Table(name, metadata, sa.Column("id", sa.Integer, primary_key=True), sa.Column("raw_data", sa.JSON, nullable=True))
+        for name in migration.TABLES
+    ]
+    metadata.create_all(engine)
+    payloads = {i: make_payload(i) if i % 4 else None for i in range(1, 11)}
+    with engine.begin() as conn:
+        for table in tables:
+            conn.execute(table.insert(), [
+                {"id": i, "raw_data": sa.null() if payload is None else payload} for i, payload in payloads.items()
+            ])
+
+    configure("zstd")
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            for table in migration.TABLES:
+                # SQLite counterpart of the upgrade's "USING convert_to(raw_data::text, 'UTF8')"
+                conn.execute(sa.text(f"UPDATE {table} SET raw_data = CAST(raw_data AS BLOB)"))
+                migration._convert(table, sa.LargeBinary(), migration._compress_json_text)
+
+    with engine.connect() as conn:
+        for name in migration.TABLES:
+            columns = {column["name"] for column in sa.inspect(conn).get_columns(name)}
+            assert columns == {"id", "raw_data"}, columns
+            compressed = sa.table(name, sa.column("id"), sa.column("raw_data", CompressedJSON()))
+            rows = dict(conn.execute(sa.select(compressed.c.id, compressed.c.raw_data)).all())
+            assert rows == payloads
+            headers = conn.execute(sa.text(f"SELECT substr(raw_data, 1, 1) FROM {name} WHERE raw_data IS NOT NULL")).scalars()
+            assert all(header == bytes([CODEC_ZSTD]) for header in headers)
+            nulls = conn.execute(sa.text(f"SELECT count(*) FROM {name} WHERE raw_data IS NULL")).scalar()
+            assert nulls == sum(payload is None for payload in payloads.values())
+    print(f"✅ {len(payloads)} rows per table converted in batches of {migration.BATCH_SIZE}, NULLs kept")
+
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.downgrade()
+    with engine.connect() as conn:
+        for table in tables:
+            assert dict(conn.execute(sa.select(table.c.id, table.c.raw_data)).all()) == payloads
+    print("✅ The downgrade restores plain JSON")
+
+def train_dictionary(path: str):
+    import zstandard
+    samples = [json.dumps(make_payload(i), ensure_ascii=False).encode("utf-8") for i in range(200)]
+    with open(path, "wb") as f:
+        f.write(zstandard.train_dictionary(2048, samples).as_bytes())
+
+def test_compressed_json():
+    if types._zstd() is None:
+        print("⚠️ zstandard is not installed; skipping the zstd codec checks")
+        return
+
+    saved = (settings.payload_compression, settings.payload_zstd_dictionary_path)
+    directory = tempfile.mkdtemp()
+    dictionary_path = os.path.join(directory, "payload.zdict")
+    train_dictionary(dictionary_path)
+    engine = sa.create_engine(f"sqlite:///{os.path.join(directory, 'payloads.db')}")
+    try:
+        zstd_rows, dict_rows = check_codecs(engine, dictionary_path)
+        check_missing_codec(zstd_rows, dict_rows)
+        check_migration(engine)
+    finally:
+        engine.dispose()
+        configure(*saved)
+
+if __name__ == "__main__":
+    test_compressed_json()
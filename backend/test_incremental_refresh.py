@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test for the incremental recommendation refresh.
+Checks that a delta larger than one search page is read in full before the
+search cursor advances, that a delta over the limit falls back to a full
+search, and that archival checks only request a bounded batch of the
+recommendations not seen open for a while.
+Runs against a fake HH search and a local fake HH server, with a temporary
+SQLite database (no PostgreSQL or network access needed).
+"""
+
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.database import Base
+import app.models  # noqa: F401 - registers all models
+from app.models.user import User
+from app.models.onboarding import OnboardingProfile
+from app.models.job import JobRecommendation, RecommendationSearchCursor, Vacancy
+from app.services import enhanced_headhunter_service
+from app.services.hh_client import create_hh_client
+from app.services.hh_rate_limiter import TokenBucket
+from app.services.recommendation_invalidation import mark_recommendations_stale
+from app.services.vacancy_cache import VacancyCache
+from app.services.vacancy_fetcher import VacancyDetailFetcher
+from app.tasks import job_recommendations
+
+class FakeHH:
+    """Vacancies with the time they last changed; search honours date_from and paging"""
+
+    def __init__(self):
+        self.vacancies = {}
+        self.changed_at = {}
+        self.gone = set()
+        self.searches = 0
+        self.detail_requests = 0
+
+    def publish(self, ids, archived: bool = False):
+        for vacancy_id in ids:
+            self.vacancies[vacancy_id] = {
+                "id": vacancy_id, "name": f"Python developer {vacancy_id}",
+                "description": "<p>Python, SQL</p>", "archived": archived
+            }
+            self.changed_at[vacancy_id] = datetime.now(timezone.utc)
+
+    def settle(self):
+        """Move every change out of the cursor overlap window"""
+        for vacancy_id in self.changed_at:
+            self.changed_at[vacancy_id] -= timedelta(hours=1)
+
+    async def search(self, params):
+        self.searches += 1
+        items = list(self.vacancies.values())
+        if "date_from" in params:
+            since = datetime.strptime(params["date_from"], "%Y-%m-%dT%H:%M:%S%z")
+            items = [item for item in items if self.changed_at[item["id"]] >= since]
+        per_page = params["per_page"]
+        page = items[params["page"] * per_page:(params["page"] + 1) * per_page]
+        return {"items": page, "found": len(items), "pages": -(-len(items) // per_page)}
+
+    def create_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/vacancies/{vacancy_id}")
+        async def vacancy(vacancy_id: str):
+            self.detail_requests += 1
+            if vacancy_id in self.gone:
+                raise HTTPException(status_code=404, detail="Not Found")
+            return self.vacancies[vacancy_id]
+
+        return app
+
+async def seed(session_factory) -> int:
+    async with session_factory() as db:
+        user = User(username="incremental", email="incremental@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        db.add(OnboardingProfile(user_id=user.id, is_completed=True, profession="Python developer", skills=["python"]))
+        await mark_recommendations_stale(db, user.id, "test")
+        await db.commit()
+        return user.id
+
+async def refresh(session_factory, user_id: int) -> dict:
+    async with session_factory() as db:
+        await mark_recommendations_stale(db, user_id, "test")
+        await db.commit()
+    return await job_recommendations._update_user_recommendations_async(user_id)
+
+async def active_ids(session_factory, user_id: int) -> set:
+    async with session_factory() as db:
+        result = await db.execute(
+            select(JobRecommendation.hh_vacancy_id)
+            .where(JobRecommendation.user_id == user_id)
+            .where(JobRecommendation.is_active.is_(True))
+        )
+        return set(result.scalars())
+
+async def check_incremental_refresh():
+    print("🔍 Checking incremental refresh...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "incremental.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user_id = await seed(session_factory)
+
+    hh = FakeHH()
+    hh.publish([f"old-{i}" for i in range(20)])
+    job_recommendations.async_session = session_factory
+    enhanced_headhunter_service.search_vacancies = hh.search
+
+    async with create_hh_client(transport=httpx.ASGITransport(app=hh.create_app())) as client:
+        job_recommendations.enhanced_hh_service.detail_fetcher = VacancyDetailFetcher(
+            client=client, limiter=TokenBucket(rate=1000, capacity=1000), concurrency=5, cache=VacancyCache(ttl=0)
+        )
+
+        result = await refresh(session_factory, user_id)
+        assert result["mode"] == "full" and result["recommendations_stored"] == 10, result
+        first_ten = await active_ids(session_factory, user_id)
+
+        # More changes than one search page: every page is read before the cursor moves
+        hh.settle()
+        hh.publish([f"new-{i}" for i in range(119)])
+        hh.publish(["new-archived"], archived=True)
+        hh.searches = 0
+        result = await refresh(session_factory, user_id)
+        assert result["mode"] == "incremental" and hh.searches == 3, (result, hh.searches)
+        assert result["recommendations_stored"] == 119, result
+        active = await active_ids(session_factory, user_id)
+        assert active == first_ten | {f"new-{i}" for i in range(119)}, "Archived search results are not stored"
+        print(f"✅ {result['recommendations_stored']} changed vacancies read over {hh.searches} pages")
+
+        # Nothing changed: only a bounded batch of long unseen vacancies is checked with HH
+        hh.settle()
+        old = sorted(first_ten)
+        async with session_factory() as db:
+            for age, vacancy_id in enumerate(reversed(old)):
+                await db.execute(
+                    update(Vacancy).where(Vacancy.hh_vacancy_id == vacancy_id)
+                    .values(updated_at=datetime.now(timezone.utc) - timedelta(days=2, hours=age))
+                )
+            await db.execute(update(Vacancy).where(Vacancy.hh_vacancy_id == old[9]).values(is_archived=True))
+            await db.commit()
+            cursor_before = (await db.execute(select(RecommendationSearchCursor.last_searched_at))).scalar_one()
+        hh.vacancies[old[0]]["archived"] = True
+        hh.gone.add(old[1])
+
+        settings.recommendation_archive_check_batch = 4
+        hh.detail_requests = 0
+        result = await refresh(session_factory, user_id)
+        assert result["mode"] == "incremental" and result["recommendations_stored"] == 0, result
+        assert hh.detail_requests == 4, hh.detail_requests
+        assert result["deactivated"] == 3, result
+        assert not await active_ids(session_factory, user_id) & {old[0], old[1], old[9]}
+        async with session_factory() as db:
+            cursor_after = (await db.execute(select(RecommendationSearchCursor.last_searched_at))).scalar_one()
+        assert cursor_after > cursor_before, "An empty but complete delta still advances the cursor"
+
+        # Vacancies found open are not checked again on the next run
+        hh.detail_requests = 0
+        result = await refresh(session_factory, user_id)
+        assert hh.detail_requests == 4 and result["deactivated"] == 0, (hh.detail_requests, result)
+        print(f"✅ At most {settings.recommendation_archive_check_batch} archival checks per run for {len(old)} older recommendations")
+
+        # Too many changes to page through: a full search replaces the delta
+        hh.publish([f"burst-{i}" for i in range(settings.recommendation_incremental_max_vacancies + 1)])
+        hh.searches = 0
+        result = await refresh(session_factory, user_id)
+        assert result["mode"] == "full" and hh.searches == 2, (result, hh.searches)
+        print("✅ A delta over the limit falls back to a full search")
+
+    await engine.dispose()
+
+def test_incremental_refresh():
+    session, search = job_recommendations.async_session, enhanced_headhunter_service.search_vacancies
+    fetcher = job_recommendations.enhanced_hh_service.detail_fetcher
+    batch = settings.recommendation_archive_check_batch
+    try:
+        asyncio.run(check_incremental_refresh())
+    finally:
+        job_recommendations.async_session = session
+        enhanced_headhunter_service.search_vacancies = search
+        job_recommendations.enhanced_hh_service.detail_fetcher = fetcher
+        settings.recommendation_archive_check_batch = batch
+
+if __name__ == "__main__":
+    test_incremental_refresh()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Query-count regression test for job recommendation enrichment.
+The number of SQL statements per page must not grow with the page size, and
+list pages must only read the card columns of each vacancy.
+Uses an in-memory SQLite database (no PostgreSQL needed).
+"""
+
+import asyncio
+import re
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import Base
+import app.models  # noqa: F401 - registers all models
+from app.models.user import User
+from app.models.job import JobRecommendation, SavedJob, JobFeedback, Vacancy
+from fastapi import Response
+
+from app.api.jobs import get_job_recommendations, get_saved_jobs
+from app.services.pagination import get_count_cache
+from app.services.job_enrichment import DESCRIPTION_PREVIEW_LENGTH
+
+MAX_STATEMENTS_PER_PAGE = 6  # refresh check + page + count + saved + feedback (+ slack)
+
+LONG_DESCRIPTION = "<p>Python developer</p>" * 500
+FULL_PAYLOAD_COLUMN = re.compile(r"(?<!substr\()vacancies(_\d+)?\.(description|raw_data)\b")
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        self.statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+async def seed(session_factory, recommendation_count: int) -> User:
+    async with session_factory() as db:
+        user = User(username="enrich", email="enrich@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+
+        recommendations = [
+            JobRecommendation(
+                user_id=user.id,
+                hh_vacancy_id=str(i),
+                vacancy=Vacancy(
+                    hh_vacancy_id=str(i),
+                    title=f"Vacancy {i}",
+                    key_skills=["python"],
+                    description=LONG_DESCRIPTION,
+                    raw_data={"id": str(i), "description": LONG_DESCRIPTION}
+                ),
+                relevance_score=float(i),
+                created_at=datetime.utcnow()
+            )
+            for i in range(recommendation_count)
+        ]
+        db.add_all(recommendations)
+        await db.flush()
+
+        # Save every third vacancy (one archived) and leave feedback on every fourth
+        for i, rec in enumerate(recommendations):
+            if i % 3 == 0:
+                db.add(SavedJob(
+                    user_id=user.id,
+                    job_recommendation_id=rec.id,
+                    is_archived=(i == 3),
+                    updated_at=datetime.utcnow()  # SavedJobResponse requires it
+                ))
+            if i % 4 == 0:
+                db.add(JobFeedback(user_id=user.id, job_recommendation_id=rec.id, is_relevant=(i % 8 == 0)))
+
+        await db.commit()
+        await db.refresh(user)
+        return user
+
+async def run_page(recommendation_count: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user = await seed(session_factory, recommendation_count)
+    get_count_cache().invalidate(user.id)  # Every run uses a fresh database with the same user id
+    counter = QueryCounter(engine)
+
+    async with session_factory() as db:
+        counter.count = 0
+        page = await get_job_recommendations(
+            page=0, per_page=100, cursor=None, include_total=True, refresh=False, db=db, current_user=user
+        )
+        recommendation_queries = counter.count
+
+        counter.count = 0
+        saved = await get_saved_jobs(
+            response=Response(), include_archived=True, application_status=None,
+            limit=None, cursor=None, include_total=False, db=db, current_user=user
+        )
+        saved_queries = counter.count
+
+    await engine.dispose()
+    full_payloads = [s for s in counter.statements if FULL_PAYLOAD_COLUMN.search(s)]
+    assert not full_payloads, "List pages load full vacancy payloads"
+    return page, saved, recommendation_queries, saved_queries
+
+async def check_enrichment():
+    print("🔍 Checking enrichment results and query counts...")
+
+    small_page, small_saved, small_rec_queries, small_saved_queries = await run_page(5)
+    page, saved, rec_queries, saved_queries = await run_page(60)
+
+    by_vacancy = {rec.hh_vacancy_id: rec for rec in page.recommendations}
+    assert len(by_vacancy) == 60
+    assert by_vacancy["0"].is_saved and by_vacancy["6"].is_saved
+    assert not by_vacancy["3"].is_saved, "Archived saves are not reported as saved"
+    assert not by_vacancy["1"].is_saved
+    assert by_vacancy["0"].user_feedback is True
+    assert by_vacancy["4"].user_feedback is False
+    assert by_vacancy["2"].user_feedback is None
+    assert len(saved) == 20 and all(s.job_recommendation is not None for s in saved)
+    assert all(len(rec.description) == DESCRIPTION_PREVIEW_LENGTH for rec in page.recommendations)
+    assert all(len(s.job_recommendation.description) == DESCRIPTION_PREVIEW_LENGTH for s in saved)
+
+    print(f"   5 rows: {small_rec_queries} queries for recommendations, {small_saved_queries} for saved jobs")
+    print(f"  60 rows: {rec_queries} queries for recommendations, {saved_queries} for saved jobs")
+    assert rec_queries == small_rec_queries, "Recommendation queries grow with page size (N+1)"
+    assert saved_queries == small_saved_queries, "Saved job queries grow with page size (N+1)"
+    assert rec_queries <= MAX_STATEMENTS_PER_PAGE
+    print("✅ Query count is constant in page size")
+
+def test_job_enrichment():
+    asyncio.run(check_enrichment())
+
+if __name__ == "__main__":
+    test_job_enrichment()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Keyset pagination test for recommendations and saved jobs.
+Walks every page through next_cursor / X-Next-Cursor and checks that each row
+is returned exactly once, in order, even when sort keys tie.
+Uses an in-memory SQLite database (no PostgreSQL needed).
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import Base
+import app.models  # noqa: F401 - registers all models
+from app.models.user import User
+from app.models.job import JobRecommendation, SavedJob, Vacancy, RecommendationState
+from app.api import jobs as jobs_api
+from app.api.jobs import get_job_recommendations, get_saved_jobs
+from app.services.pagination import encode_cursor, get_count_cache
+from app.services.recommendation_invalidation import mark_recommendations_stale
+
+RECOMMENDATION_COUNT = 50
+REFRESHED_COUNT = 3
+
+async def seed(session_factory) -> User:
+    async with session_factory() as db:
+        user = User(username="pager", email="pager@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+
+        # Few distinct scores, so most pages end in the middle of a tie
+        recommendations = [
+            JobRecommendation(
+                user_id=user.id,
+                hh_vacancy_id=str(i),
+                vacancy=Vacancy(hh_vacancy_id=str(i), title=f"Vacancy {i}"),
+                relevance_score=float(i % 4),
+                created_at=datetime.utcnow()
+            )
+            for i in range(RECOMMENDATION_COUNT)
+        ]
+        db.add_all(recommendations)
+        await db.flush()
+
+        saved_at = datetime(2026, 1, 1)
+        for i, rec in enumerate(recommendations):
+            if i % 2 == 0:
+                db.add(SavedJob(
+                    user_id=user.id,
+                    job_recommendation_id=rec.id,
+                    created_at=saved_at + timedelta(hours=i // 6),  # Ties of three
+                    updated_at=datetime.utcnow()
+                ))
+
+        # Recommendations are up to date, so listing never triggers an HH refresh
+        db.add(RecommendationState(user_id=user.id, is_stale=False, last_refreshed_at=datetime.utcnow()))
+        await db.commit()
+        await db.refresh(user)
+        return user
+
+async def check_pagination():
+    print("🔍 Walking recommendation and saved job pages...")
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user = await seed(session_factory)
+    get_count_cache().invalidate(user.id)
+
+    async with session_factory() as db:
+        seen = []
+        cursor = None
+        while True:
+            page = await get_job_recommendations(
+                page=0, per_page=7, cursor=cursor, include_total=True, refresh=False, db=db, current_user=user
+            )
+            seen.extend((rec.relevance_score, rec.id) for rec in page.recommendations)
+            assert page.total == RECOMMENDATION_COUNT
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert len(seen) == RECOMMENDATION_COUNT and len(set(seen)) == RECOMMENDATION_COUNT
+        assert seen == sorted(seen, key=lambda key: (-key[0], -key[1]))
+        print(f"✅ {len(seen)} recommendations over {-(-len(seen) // 7)} pages, no gaps or repeats")
+
+        offset_page = await get_job_recommendations(
+            page=1, per_page=7, cursor=None, include_total=False, refresh=False, db=db, current_user=user
+        )
+        assert [rec.id for rec in offset_page.recommendations] == [key[1] for key in seen[7:14]]
+        assert offset_page.total is None
+
+        saved_ids = []
+        cursor = None
+        while True:
+            response = Response()
+            saved = await get_saved_jobs(
+                response=response, include_archived=False, application_status=None,
+                limit=4, cursor=cursor, include_total=True, db=db, current_user=user
+            )
+            saved_ids.extend(item.id for item in saved)
+            assert response.headers["X-Total-Count"] == str(RECOMMENDATION_COUNT // 2)
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        everything = await get_saved_jobs(
+            response=Response(), include_archived=False, application_status=None,
+            limit=None, cursor=None, include_total=False, db=db, current_user=user
+        )
+        assert saved_ids == [item.id for item in everything]
+        assert len(saved_ids) == RECOMMENDATION_COUNT // 2
+        print(f"✅ {len(saved_ids)} saved jobs over cursor pages match the unpaged list")
+
+        for bad_cursor in (encode_cursor("recommendations", [1.0, 3]), "not a cursor"):
+            try:
+                await get_saved_jobs(
+                    response=Response(), include_archived=False, application_status=None,
+                    limit=4, cursor=bad_cursor, include_total=False, db=db, current_user=user
+                )
+                raise AssertionError(f"Invalid cursor accepted: {bad_cursor}")
+            except HTTPException as e:
+                assert e.status_code == 400
+        print("✅ Foreign or malformed cursors are rejected")
+
+    # A refresh stores a few top-scored vacancies; HH returns them in its own order
+    async def fake_refresh(user, db, search_request):
+        refreshed = [
+            JobRecommendation(
+                user_id=user.id,
+                hh_vacancy_id=f"fresh-{i}",
+                vacancy=Vacancy(hh_vacancy_id=f"fresh-{i}", title=f"Fresh {i}"),
+                relevance_score=3.0,
+                created_at=datetime.utcnow()
+            )
+            for i in range(REFRESHED_COUNT)
+        ]
+        db.add_all(refreshed)
+        await db.commit()
+        # The profile is edited while the refresh runs
+        await mark_recommendations_stale(db, user.id, "onboarding_profile")
+        await db.commit()
+        return refreshed
+
+    get_personalized_recommendations = jobs_api.hh_service.get_personalized_recommendations
+    jobs_api.hh_service.get_personalized_recommendations = fake_refresh
+    try:
+        async with session_factory() as db:
+            refreshed = []
+            page = await get_job_recommendations(
+                page=0, per_page=7, cursor=None, include_total=True, refresh=True, db=db, current_user=user
+            )
+            await db.commit()
+            state = await db.get(RecommendationState, user.id, populate_existing=True)
+            assert state.is_stale and state.stale_reason == "onboarding_profile" and state.last_refreshed_at is not None
+            while True:
+                refreshed.extend((rec.relevance_score, rec.id) for rec in page.recommendations)
+                if page.next_cursor is None:
+                    break
+                page = await get_job_recommendations(
+                    page=0, per_page=7, cursor=page.next_cursor, include_total=True, refresh=False, db=db, current_user=user
+                )
+    finally:
+        jobs_api.hh_service.get_personalized_recommendations = get_personalized_recommendations
+
+    assert len(refreshed) == len(set(refreshed)) == RECOMMENDATION_COUNT + REFRESHED_COUNT
+    assert refreshed == sorted(refreshed, key=lambda key: (-key[0], -key[1]))
+    print(f"✅ Cursor from a refreshed first page walks all {len(refreshed)} recommendations")
+    print("✅ A profile edit made during the refresh keeps the recommendations stale")
+
+    await engine.dispose()
+
+def test_keyset_pagination():
+    asyncio.run(check_pagination())
+
+if __name__ == "__main__":
+    test_keyset_pagination()
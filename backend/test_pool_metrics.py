@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test for the instrumented connection pool.
+Checks that checkouts are counted through pool events and that only checkouts
+which actually blocked on a saturated pool count as waits (or timeouts).
+Uses a temporary SQLite database (no PostgreSQL needed).
+"""
+
+import asyncio
+import os
+import tempfile
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import InstrumentedQueuePool, _register_pool_events, get_pool_metrics
+
+async def check_pool_metrics():
+    print("🔍 Checking pool metrics...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "pool.db")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.5
+    )
+    _register_pool_events(engine)
+
+    # Sequential checkouts always find the idle connection
+    for _ in range(5):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    metrics = get_pool_metrics(engine)
+    assert metrics["checkouts"] == 5 and metrics["checkins"] == 5 and metrics["connects"] == 1, metrics
+    assert metrics["waits"] == 0, metrics
+    print("✅ Uncontended checkouts are not counted as waits")
+
+    # A second checkout while the only connection is held has to wait for it
+    async def hold(seconds: float):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await asyncio.sleep(seconds)
+
+    holder = asyncio.create_task(hold(0.2))
+    await asyncio.sleep(0.05)
+    await hold(0)
+    await holder
+    metrics = get_pool_metrics(engine)
+    assert metrics["waits"] == 1 and metrics["timeouts"] == 0, metrics
+    assert metrics["wait_time_max_ms"] > 50, metrics
+
+    holder = asyncio.create_task(hold(1.0))
+    await asyncio.sleep(0.05)
+    try:
+        await hold(0)
+        raise AssertionError("Expected a pool timeout")
+    except exc.TimeoutError:
+        pass
+    await holder
+    metrics = get_pool_metrics(engine)
+    assert metrics["waits"] == 2 and metrics["timeouts"] == 1, metrics
+    print(f"✅ Blocked checkouts and timeouts are counted: {metrics}")
+
+    await engine.dispose()
+
+def test_pool_metrics():
+    asyncio.run(check_pool_metrics())
+
+if __name__ == "__main__":
+    test_pool_metrics()
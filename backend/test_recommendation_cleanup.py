@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test for the old recommendation cleanup.
+Checks that expired rows are deleted in primary-key ranges of at most
+recommendation_cleanup_batch_size rows, that saved recommendations are kept,
+that feedback is deleted before the rows it references, that the archive copy
+holds every removed row, and that vacancies left without recommendations go
+once the grace period has passed, so a concurrent refresh can still use them.
+Uses a temporary SQLite database with foreign keys enforced (no PostgreSQL needed).
+"""
+
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.database import Base
+import app.models  # noqa: F401 - registers all models
+from app.models.user import User
+from app.models.job import ArchivedJobRecommendation, JobFeedback, JobRecommendation, SavedJob, Vacancy
+from app.tasks import job_recommendations
+
+EXPIRED = 25
+RECENT = 5
+
+def enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+async def count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar()
+
+async def seed(session_factory) -> dict:
+    old = datetime.utcnow() - timedelta(days=settings.recommendation_retention_days + 5)
+    async with session_factory() as db:
+        user = User(username="cleanup", email="cleanup@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+
+        recommendations = []
+        for i in range(EXPIRED + RECENT):
+            vacancy = Vacancy(
+                hh_vacancy_id=str(i), title=f"Vacancy {i}", raw_data={"id": str(i)}, created_at=old if i < EXPIRED else None
+            )
+            db.add(vacancy)
+            await db.flush()
+            recommendation = JobRecommendation(
+                user_id=user.id, hh_vacancy_id=str(i), vacancy_id=vacancy.id, relevance_score=i / 100,
+                created_at=old if i < EXPIRED else None
+            )
+            db.add(recommendation)
+            recommendations.append(recommendation)
+        await db.flush()
+
+        # Unused vacancies a refresh has just inserted or upserted, before adding its recommendations
+        db.add(Vacancy(hh_vacancy_id="fresh", title="Fresh"))
+        db.add(Vacancy(hh_vacancy_id="touched", title="Touched", created_at=old, updated_at=datetime.utcnow()))
+
+        # Refreshed in place after the cutoff, so not expired despite its created_at
+        recommendations[1].updated_at = datetime.utcnow()
+        saved = recommendations[2]
+        db.add(SavedJob(user_id=user.id, job_recommendation_id=saved.id))
+        with_feedback = recommendations[3]
+        db.add(JobFeedback(user_id=user.id, job_recommendation_id=with_feedback.id, is_relevant=False))
+        await db.commit()
+        return {"saved": saved.id, "refreshed": recommendations[1].id, "with_feedback": with_feedback.id}
+
+async def check_cleanup(archive: bool):
+    db_path = os.path.join(tempfile.mkdtemp(), "cleanup.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    event.listen(engine.sync_engine, "connect", enable_foreign_keys)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    ids = await seed(session_factory)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    job_recommendations.async_session = session_factory
+    settings.recommendation_cleanup_batch_size = 10
+    settings.recommendation_cleanup_archive = archive
+
+    result = await job_recommendations._cleanup_old_recommendations_async()
+    removed = EXPIRED - 2
+    assert result["cleaned_up"] == removed and result["batches"] == 3, result
+    assert result["archived"] == (removed if archive else 0), result
+    assert result["vacancies_removed"] == removed, result
+
+    # Every batch deletes feedback before the recommendations in one id range
+    deletes = [
+        statement.split()[2] for statement in statements
+        if statement.startswith("DELETE FROM job_recommendations") or statement.startswith("DELETE FROM job_feedbacks")
+    ]
+    assert deletes == ["job_feedbacks", "job_recommendations"] * 3, deletes
+    ranged = [statement for statement in statements if statement.startswith("DELETE FROM job_recommendations")]
+    assert all("job_recommendations.id >=" in statement and "job_recommendations.id <=" in statement for statement in ranged)
+
+    async with session_factory() as db:
+        kept = set((await db.execute(select(JobRecommendation.id))).scalars())
+        assert ids["saved"] in kept and ids["refreshed"] in kept
+        assert ids["with_feedback"] not in kept and len(kept) == RECENT + 2
+        assert await count(db, JobFeedback) == 0 and await count(db, SavedJob) == 1
+        vacancies = set((await db.execute(select(Vacancy.hh_vacancy_id))).scalars())
+        assert {"fresh", "touched"} <= vacancies and len(vacancies) == RECENT + 4
+
+        archived = list((await db.execute(select(ArchivedJobRecommendation))).scalars())
+        if archive:
+            assert {row.id for row in archived} == set(range(1, EXPIRED + 1)) - {ids["saved"], ids["refreshed"]}
+            row = next(row for row in archived if row.id == ids["with_feedback"])
+            assert row.hh_vacancy_id == "3" and row.title == "Vacancy 3" and row.relevance_score == 0.03
+            await db.refresh(row, ["raw_data"])
+            assert row.raw_data == {"id": "3"}
+        else:
+            assert not archived
+
+    assert (await job_recommendations._cleanup_old_recommendations_async())["cleaned_up"] == 0
+    await engine.dispose()
+
+def test_recommendation_cleanup():
+    session = job_recommendations.async_session
+    batch_size, archive = settings.recommendation_cleanup_batch_size, settings.recommendation_cleanup_archive
+    try:
+        print("🔍 Checking recommendation cleanup...")
+        asyncio.run(check_cleanup(archive=False))
+        print("✅ Expired rows deleted in 3 id ranges of 10, saved and refreshed rows kept, feedback deleted first")
+        print("✅ Unused vacancies written within the grace period are kept")
+        asyncio.run(check_cleanup(archive=True))
+        print("✅ Removed rows are copied to the archive with their vacancy data")
+    finally:
+        job_recommendations.async_session = session
+        settings.recommendation_cleanup_batch_size = batch_size
+        settings.recommendation_cleanup_archive = archive
+
+if __name__ == "__main__":
+    test_recommendation_cleanup()
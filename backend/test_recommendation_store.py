@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test for the bulk recommendation upsert.
+Checks that new rows are inserted, that existing (user_id, hh_vacancy_id) rows
+are updated in place, that update_existing=False leaves them untouched, and
+that batches larger than one chunk are written completely.
+Uses a temporary SQLite database (no PostgreSQL needed).
+"""
+
+import asyncio
+import os
+import tempfile
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+import app.models  # noqa: F401 - registers all models
+from app.models.user import User
+from app.models.job import JobRecommendation, Vacancy
+from app.services.recommendation_store import CHUNK_SIZE, upsert_recommendations
+
+def make_rows(user_id: int, ids, score: float, title: str = "Vacancy"):
+    return [
+        dict(
+            user_id=user_id,
+            hh_vacancy_id=str(i),
+            title=f"{title} {i}",
+            company_name="Company",
+            key_skills=["python"],
+            relevance_score=score,
+            skills_match_score=score,
+            raw_data={"id": str(i)},
+            is_active=True
+        )
+        for i in ids
+    ]
+
+async def count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar()
+
+async def check_upsert():
+    print("🔍 Checking bulk recommendation upsert...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "store.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    async with session_factory() as db:
+        users = [User(username=f"store{i}", email=f"store{i}@example.com", hashed_password="x") for i in range(2)]
+        db.add_all(users)
+        await db.commit()
+        user, other = users
+
+        stored = await upsert_recommendations(db, make_rows(user.id, range(10), 0.5))
+        await db.commit()
+        assert len(stored) == 10 and all(rec.vacancy.title == f"Vacancy {rec.hh_vacancy_id}" for rec in stored)
+        ids = {rec.hh_vacancy_id: rec.id for rec in stored}
+        print("✅ New rows inserted with their shared vacancies")
+
+        # Same vacancies again plus new ones: existing rows keep their id and get the new scores
+        stored = await upsert_recommendations(db, make_rows(user.id, range(5, 15), 0.9, title="Renamed"))
+        await db.commit()
+        assert len(stored) == 10
+        assert all(ids.get(rec.hh_vacancy_id, rec.id) == rec.id for rec in stored)
+        assert all(rec.relevance_score == 0.9 and rec.updated_at is not None for rec in stored if rec.hh_vacancy_id in ids)
+        assert await count(db, JobRecommendation) == 15 and await count(db, Vacancy) == 15
+        vacancy = (await db.execute(select(Vacancy).where(Vacancy.hh_vacancy_id == "5"))).scalar_one()
+        assert vacancy.title == "Renamed 5"
+        print("✅ Existing rows updated in place on uq_user_vacancy")
+
+        # Duplicate keys within a batch collapse to the last row
+        stored = await upsert_recommendations(db, make_rows(user.id, [20], 0.1) + make_rows(user.id, [20], 0.2))
+        assert [rec.relevance_score for rec in stored] == [0.2]
+
+        # DO NOTHING keeps existing rows and returns only the new ones; vacancies are still refreshed
+        stored = await upsert_recommendations(db, make_rows(user.id, range(12, 18), 0.1, title="Again"), update_existing=False)
+        await db.commit()
+        assert sorted(rec.hh_vacancy_id for rec in stored) == ["15", "16", "17"]
+        kept = (await db.execute(
+            select(JobRecommendation.relevance_score).where(JobRecommendation.user_id == user.id)
+            .where(JobRecommendation.hh_vacancy_id == "12")
+        )).scalar_one()
+        assert kept == 0.9
+        vacancy = (await db.execute(select(Vacancy).where(Vacancy.hh_vacancy_id == "12"))).scalar_one()
+        await db.refresh(vacancy)
+        assert vacancy.title == "Again 12"
+        print("✅ update_existing=False inserts only new rows")
+
+        # The same vacancies for another user are new rows sharing the vacancy rows
+        stored = await upsert_recommendations(db, make_rows(other.id, range(10), 0.3))
+        await db.commit()
+        assert len(stored) == 10 and await count(db, Vacancy) == 19
+
+        statements.clear()
+        batch = CHUNK_SIZE * 2 + 17
+        stored = await upsert_recommendations(db, make_rows(other.id, range(1000, 1000 + batch), 0.4))
+        await db.commit()
+        assert len(stored) == batch
+        assert len({rec.id for rec in stored}) == batch
+        inserts = [statement for statement in statements if statement.startswith("INSERT INTO job_recommendations")]
+        assert len(inserts) == 3, len(inserts)
+        total = (await db.execute(
+            select(func.count()).select_from(JobRecommendation).where(JobRecommendation.user_id == other.id)
+        )).scalar()
+        assert total == batch + 10
+        print(f"✅ {batch} rows written in {len(inserts)} chunks of at most {CHUNK_SIZE}")
+
+    await engine.dispose()
+
+def test_recommendation_store():
+    asyncio.run(check_upsert())
+
+if __name__ == "__main__":
+    test_recommendation_store()
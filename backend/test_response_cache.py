@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test for the assistant response cache.
+Checks exact and one-typo lookups, that negations, swapped entities and
+several typos miss, namespacing by language and system prompt, TTL/LRU
+eviction, and that the chat endpoints answer repeated first-turn questions
+without calling the model while follow-ups still reach it.
+Uses the fake OpenAI server from test_chat_streaming (no Azure OpenAI needed).
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.api.assistants import get_system_prompt
+from app.services import response_cache
+from app.services.response_cache import ResponseCache, is_cacheable, normalize_message, same_words
+from test_chat_streaming import TOKENS, create_user, read_events, running_chat_app, upstream
+
+RU_PROMPT = get_system_prompt("russian")
+KK_PROMPT = get_system_prompt("kazakh")
+REPLY = "Начните с краткого описания опыта."
+
+def check_lookups():
+    print("🔍 Checking cache lookups...")
+
+    assert normalize_message("  Как  составить РЕЗЮМЕ?! ") == "как составить резюме"
+
+    cache = ResponseCache(ttl=60, max_entries=3)
+    assert cache.lookup("russian", RU_PROMPT, "Как подготовиться к собеседованию?") is None
+    cache.store("russian", RU_PROMPT, "Как подготовиться к собеседованию?", REPLY)
+
+    assert cache.lookup("russian", RU_PROMPT, "как подготовиться к собеседованию") == REPLY
+    assert cache.exact_hits == 1
+    assert cache.lookup("russian", RU_PROMPT, "Как подготовится к собеседованию?") == REPLY
+    assert cache.typo_hits == 1
+
+    assert cache.lookup("russian", RU_PROMPT, "Как составить резюме?") is None
+    assert cache.lookup("kazakh", KK_PROMPT, "Как подготовиться к собеседованию?") is None
+    assert cache.lookup("russian", RU_PROMPT + " Отвечай кратко.", "Как подготовиться к собеседованию?") is None
+    print("✅ Exact and one-typo hits, other questions, languages and prompt versions miss")
+
+    cache.store("russian", RU_PROMPT, "как составить резюме для программиста", "A")
+    assert cache.lookup("russian", RU_PROMPT, "как составить резюме для бухгалтера") is None
+
+    # Similar spelling, different question: negations, levels and places must not share replies
+    for cached, asked in [
+        ("Как подготовиться к собеседованию?", "Как не подготовиться к собеседованию?"),
+        ("Should I mention my disability in the interview?", "Should I not mention my disability in the interview?"),
+        ("Как найти работу junior разработчиком?", "Как найти работу senior разработчиком?"),
+        ("Вакансии для людей с инвалидностью в Алматы", "Вакансии для людей с инвалидностью в Астане"),
+        ("Как подать документы на работу", "Как продать документы на работу"),
+        ("Как подготовиться к собеседованию программиста?", "Как подготовится к собеседованию програмиста?"),
+        ("Как подготовиться к собеседованию?", "Как подготовиться к собеседованию сегодня?"),
+    ]:
+        probe = ResponseCache(ttl=60)
+        probe.store("russian", RU_PROMPT, cached, REPLY)
+        assert probe.lookup("russian", RU_PROMPT, asked) is None, asked
+    print("✅ Negations, swapped entities, extra words and more than one typo miss")
+
+    words = normalize_message("Как подготовиться к собеседованию программиста").split()
+    assert same_words(words, normalize_message("Как подготовиться к собесдеованию программиста").split())
+    assert not same_words(words, normalize_message("Как подготовится к собесдеованию программиста").split())
+    assert not same_words(["как", "найти", "работу"], ["как", "найти", "раброту"]), "Short words must match exactly"
+
+    cache.store("russian", RU_PROMPT, "Привет", "B")
+    cache.lookup("russian", RU_PROMPT, "Как подготовиться к собеседованию?")  # Most recently used now
+    cache.store("russian", RU_PROMPT, "Что такое сопроводительное письмо?", "C")
+    assert cache.evictions == 1
+    assert cache.lookup("russian", RU_PROMPT, "как составить резюме для программиста") is None
+    assert cache.lookup("russian", RU_PROMPT, "Как подготовиться к собеседованию?") == REPLY
+
+    cache.ttl = 0
+    assert cache.lookup("russian", RU_PROMPT, "Привет") is None
+    stats = cache.stats()
+    assert stats["entries"] < 3 and 0 < stats["hit_rate"] < 1, stats
+    print(f"✅ LRU and TTL eviction work: {stats}")
+
+def check_expired_match():
+    cache = ResponseCache(ttl=60)
+    cache.store("russian", RU_PROMPT, "Как подготовиться к собеседованию?", "A")
+    cache.store("russian", RU_PROMPT, "Как подготовитса к собеседованию?", "B")
+    first = next(iter(cache._entries))
+    stored_at, *rest = cache._entries[first]
+    cache._entries[first] = (stored_at - 120, *rest)
+
+    assert cache.lookup("russian", RU_PROMPT, "Как подготовится к собеседованию?") == "B"
+    assert first not in cache._entries and len(cache._buckets) == 1
+    print("✅ An expired match falls through to the next fresh one")
+
+def check_eligibility():
+    settings.response_cache_enabled = True
+    assert is_cacheable("Как составить резюме?", [], None, None)
+    assert not is_cacheable("Как составить резюме?", ["previous message"], None, None)
+    assert not is_cacheable("Как составить резюме?", [], "summary", None)
+    assert not is_cacheable("Что на фото?", [], None, ["data:image/png;base64,"])
+    assert not is_cacheable("Мое резюме: " + "опыт " * 200, [], None, None)
+    print("✅ Only short first-turn text messages are cacheable")
+
+def check_endpoints():
+    print("🔍 Checking chat endpoints with the cache enabled...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "response_cache.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user = asyncio.run(create_user(engine, session_factory, "cached"))
+    upstream.update(completed=0, cancelled=0)
+    response_cache._response_cache = ResponseCache()
+    answer = "".join(TOKENS).strip()
+
+    with running_chat_app(session_factory, user) as base_url, httpx.Client(timeout=10) as client:
+        first = client.post(f"{base_url}/1/chat", json={"participant": "", "message": "Как составить резюме?"})
+        assert first.json()["replies"] == [answer]
+        assert upstream["completed"] == 1
+
+        started = time.monotonic()
+        second = client.post(f"{base_url}/1/chat", json={"participant": "", "message": "как составить резюме"})
+        elapsed = time.monotonic() - started
+        assert second.json()["replies"] == [answer]
+        assert upstream["completed"] == 1, upstream
+        print(f"✅ Repeated question answered from the cache in {elapsed * 1000:.0f}ms")
+
+        with client.stream("POST", f"{base_url}/1/chat/stream", json={"participant": "", "message": "Как составить резюме!"}) as response:
+            events = read_events(response)
+        assert "".join(data["content"] for name, data in events if name == "delta") == answer
+        assert events[-1][0] == "done"
+        assert upstream["completed"] == 1, upstream
+
+        # A follow-up in the same chat depends on the conversation and reaches the model
+        chat_id = events[0][1]["chatId"]
+        client.post(f"{base_url}/1/chat", json={"participant": chat_id, "message": "Как составить резюме?"})
+        assert upstream["completed"] == 2, upstream
+
+        stats = client.get(f"{base_url}/debug/response-cache-stats").json()
+        assert stats["exact_hits"] == 2 and stats["misses"] == 1, stats
+        print(f"✅ Streaming reuses the cache, follow-ups do not: {stats}")
+
+        debug, settings.debug = settings.debug, False
+        try:
+            assert client.get(f"{base_url}/debug/response-cache-stats").status_code == 404
+        finally:
+            settings.debug = debug
+        print("✅ Cache stats are hidden when DEBUG is off")
+
+    asyncio.run(engine.dispose())
+
+def test_response_cache():
+    enabled = settings.response_cache_enabled
+    try:
+        check_lookups()
+        check_expired_match()
+        check_eligibility()
+        check_endpoints()
+    finally:
+        settings.response_cache_enabled = enabled
+        response_cache._response_cache = None
+
+if __name__ == "__main__":
+    test_response_cache()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test for the HH search result cache.
+Checks that equivalent search parameters share one cache key, that concurrent
+identical searches are sent to HH once, that errors are not cached, and that
+callers cannot corrupt cached responses for each other.
+No network access needed.
+"""
+
+import asyncio
+
+from app.services.search_cache import SearchResultCache, normalize_search_params
+
+def check_normalization():
+    print("🔍 Checking search key normalization...")
+
+    base = {"text": "Python OR Django", "area": "160", "per_page": 20, "page": 0}
+    same = [
+        {"page": 0, "per_page": 20, "area": "160", "text": "Python OR Django"},
+        {"text": "django OR PYTHON OR python", "area": "160", "per_page": 20, "page": 0},
+        {"text": " Python OR  OR Django ", "area": ["160"], "per_page": "20", "page": "0"},
+        {**base, "salary": None},
+    ]
+    for params in same:
+        assert normalize_search_params(params) == normalize_search_params(base), params
+
+    different = [
+        {**base, "text": "Python AND Django"},
+        {**base, "area": ["160", "159"]},
+        {**base, "page": 1},
+        {**base, "experience": "noExperience"},
+    ]
+    for params in different:
+        assert normalize_search_params(params) != normalize_search_params(base), params
+    assert normalize_search_params({**base, "area": ["159", "160"]}) == normalize_search_params({**base, "area": ["160", "159", "160"]})
+    print("✅ Key order, case, repeated OR terms and scalar/list areas do not split the cache")
+
+async def check_coalescing():
+    print("🔍 Checking request coalescing...")
+
+    cache = SearchResultCache(ttl=60, max_entries=10)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"found": 1, "items": [{"id": "1", "name": "Python developer"}]}
+
+    results = await asyncio.gather(*(
+        cache.get_or_fetch({"text": "python", "area": "160"} if i % 2 else {"area": ["160"], "text": "PYTHON"}, fetch)
+        for i in range(10)
+    ))
+    assert len(calls) == 1, calls
+    assert cache.misses == 1 and cache.coalesced == 9, cache.stats()
+    assert all(result == results[0] for result in results)
+    print(f"✅ 10 concurrent identical searches sent 1 request: {cache.stats()}")
+
+    # Callers own their responses: mutating one does not reach the cache or other callers
+    results[0]["items"].clear()
+    results[1]["found"] = 0
+    assert results[2]["items"] and results[2]["found"] == 1
+    cached = await cache.get_or_fetch({"text": "python", "area": "160"}, fetch)
+    assert cached == {"found": 1, "items": [{"id": "1", "name": "Python developer"}]} and cache.hits == 1
+    cached["items"][0]["name"] = "changed"
+    again = await cache.get_or_fetch({"text": "python", "area": "160"}, fetch)
+    assert again["items"][0]["name"] == "Python developer" and len(calls) == 1
+    print("✅ Cached and coalesced responses are private copies")
+
+    async def failing_fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return None
+
+    calls.clear()
+    results = await asyncio.gather(*(cache.get_or_fetch({"text": "java"}, failing_fetch) for _ in range(3)))
+    assert results == [None, None, None] and len(calls) == 1
+    assert await cache.get_or_fetch({"text": "java"}, failing_fetch) is None and len(calls) == 2
+    print("✅ Errors are shared with waiting callers but not cached")
+
+    cache.ttl = 0
+    await cache.get_or_fetch({"text": "python", "area": "160"}, fetch)
+    assert len(calls) == 3
+
+def test_search_cache():
+    check_normalization()
+    asyncio.run(check_coalescing())
+
+if __name__ == "__main__":
+    test_search_cache()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Regression test for the precompiled skill matcher.
+Compares extract_skills and the profile skill weights/scores with the previous
+substring-based implementation (kept below as the reference) on edge cases and
+on randomized vacancy texts and skill profiles.
+"""
+
+import random
+
+from app.utils.skill_matcher import (
+    SKILL_KEYWORDS, SKILL_SYNONYMS, extract_skills, get_profile_matcher, skill_match_weight
+)
+
+RANDOM_CASES = 10000
+
+# Reference: the keyword/synonym logic the matcher replaced, unchanged
+
+def reference_extract_skills(text: str):
+    if not text:
+        return []
+
+    text_lower = text.lower()
+    found_skills = []
+
+    for skill in SKILL_KEYWORDS:
+        skill_lower = skill.lower()
+        if skill_lower in text_lower:
+            found_skills.append(skill)
+        elif any(word in text_lower for word in skill_lower.split() if len(word) > 2):
+            found_skills.append(skill)
+
+    seen = set()
+    unique_skills = []
+    for skill in found_skills:
+        if skill.lower() not in seen:
+            seen.add(skill.lower())
+            unique_skills.append(skill)
+
+    return unique_skills[:15]
+
+def reference_skill_weight(user_skill: str, vacancy_text: str) -> float:
+    if user_skill in vacancy_text:
+        return 1.0
+
+    synonyms = SKILL_SYNONYMS.get(user_skill, [user_skill])
+    max_weight = 0.0
+
+    for synonym in synonyms:
+        if synonym.lower() in vacancy_text:
+            if synonym == user_skill:
+                max_weight = max(max_weight, 1.0)
+            else:
+                max_weight = max(max_weight, 0.8)
+
+    words = user_skill.split()
+    if len(words) > 1:
+        word_matches = 0
+        for word in words:
+            if len(word) > 2 and word in vacancy_text:
+                word_matches += 1
+
+        if word_matches > 0:
+            partial_weight = (word_matches / len(words)) * 0.6
+            max_weight = max(max_weight, partial_weight)
+
+    return max_weight
+
+def reference_score(skills, vacancy_text: str) -> float:
+    if not skills:
+        return 0.0
+    return min(sum(reference_skill_weight(skill, vacancy_text) for skill in skills) / len(skills), 1.0)
+
+# Random inputs built from the matcher's own vocabulary, word fragments and noise
+
+VOCABULARY = sorted(
+    set(SKILL_KEYWORDS)
+    | set(SKILL_SYNONYMS)
+    | {synonym for synonyms in SKILL_SYNONYMS.values() for synonym in synonyms}
+)
+WORDS = sorted({word for phrase in VOCABULARY for word in phrase.split()})
+NOISE = ["опыт", "работы", "от", "лет", "требуется", "we", "are", "hiring", "the", "и", "в", "с", "—", ",", ".", "/", "+", "#", "\n"]
+
+def random_fragment(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.35:
+        return rng.choice(VOCABULARY)
+    if kind < 0.55:
+        return rng.choice(WORDS)
+    if kind < 0.7:
+        word = rng.choice(WORDS)
+        start = rng.randrange(len(word))
+        return word[start:start + rng.randint(1, 6)]  # Pieces of words still match as substrings
+    if kind < 0.8:
+        return "".join(rng.choice("abcxyzабвгдеёжзийкъ+#./ -1") for _ in range(rng.randint(1, 5)))
+    return rng.choice(NOISE)
+
+def random_text(rng: random.Random) -> str:
+    separators = [" ", "", ", ", "\n", "-"]
+    text = "".join(random_fragment(rng) + rng.choice(separators) for _ in range(rng.randint(0, 40)))
+    return text.upper() if rng.random() < 0.1 else text
+
+def random_skill(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.4:
+        return rng.choice(list(SKILL_SYNONYMS))
+    if kind < 0.7:
+        return rng.choice(SKILL_KEYWORDS).lower()
+    if kind < 0.9:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+    return rng.choice(["", "r", "go", "c", "a b", "it it поддержка", "data  science", "  ", "1c"])
+
+EDGE_TEXTS = [
+    "",
+    " ",
+    "R",
+    "go",
+    "Python/Django, PostgreSQL; Docker+Kubernetes",
+    "C++ и C# разработчик, опыт программирования от 3 лет",
+    "Google Cloud, google analytics, GOOGLE",
+    "it поддержка, IT-поддержка, ITподдержка",
+    "управление проектами и координация проектов",
+    "тестирование по и автотестирование, manual testing",
+    "графический дизайнер: photoshop, illustrator",
+    "пиарщик",
+    "аааааааааааааааааааа",
+    "ёжик в тумане",
+]
+EDGE_PROFILES = [
+    (),
+    ("",),
+    ("python",),
+    ("r", "go"),
+    ("графический дизайн", "работа в команде", "английский язык"),
+    ("тестирование по", "тестирование"),
+    ("data science", "machine learning", "big data"),
+    ("it поддержка",),
+    ("несуществующий навык", "another made up skill"),
+    ("python", "python"),
+]
+
+def check_edge_cases():
+    print("🔍 Checking edge cases against the previous implementation...")
+
+    for text in EDGE_TEXTS:
+        assert extract_skills(text) == reference_extract_skills(text), text
+        lowered = text.lower()
+        for skills in EDGE_PROFILES:
+            matcher = get_profile_matcher(skills)
+            expected = [reference_skill_weight(skill, lowered) for skill in skills]
+            assert matcher.weights(lowered) == expected, (text, skills)
+            assert matcher.score(lowered) == reference_score(skills, lowered), (text, skills)
+            for skill in skills:
+                assert skill_match_weight(skill, lowered) == reference_skill_weight(skill, lowered)
+
+    print(f"✅ {len(EDGE_TEXTS)} texts x {len(EDGE_PROFILES)} profiles match")
+
+def check_random_cases():
+    print("🔍 Checking randomized texts and profiles...")
+
+    rng = random.Random(20260118)
+    for case in range(RANDOM_CASES):
+        text = random_text(rng)
+        assert extract_skills(text) == reference_extract_skills(text), (case, text)
+
+        lowered = text.lower()
+        skills = tuple(random_skill(rng) for _ in range(rng.randint(0, 8)))
+        matcher = get_profile_matcher(skills)
+        assert matcher.weights(lowered) == [reference_skill_weight(skill, lowered) for skill in skills], (case, text, skills)
+        assert matcher.score(lowered) == reference_score(skills, lowered), (case, text, skills)
+
+    print(f"✅ {RANDOM_CASES} random cases match extraction, weights and scores exactly")
+
+def test_skill_matcher():
+    check_edge_cases()
+    check_random_cases()
+
+if __name__ == "__main__":
+    test_skill_matcher()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test for the authentication caches.
+Checks that cached user snapshots never hold the password hash and restore as
+detached users, that get_current_user stops querying the users table once a
+user is cached, that completing onboarding invalidates the cached user, and
+that verified token claims are kept exactly until the token's exp.
+Uses a temporary SQLite database (no PostgreSQL or Redis needed).
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from fastapi import HTTPException
+from jose import jwt
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.database import Base
+import app.models  # noqa: F401 - registers all models
+from app.models.user import User
+from app.models.onboarding import OnboardingProfile
+from app.api import onboarding
+from app.auth import user_cache
+from app.auth.jwt import create_access_token, get_current_user, verify_token
+from app.auth.user_cache import TokenClaimsCache, UserCache, _snapshot
+from app.schemas.onboarding import OnboardingCompleteRequest
+
+async def check_snapshot(session_factory):
+    print("🔍 Checking user snapshots...")
+
+    async with session_factory() as db:
+        user = (await db.execute(select(User).where(User.username == "cached"))).scalar_one()
+
+    snapshot = _snapshot(user)
+    assert "hashed_password" not in snapshot and snapshot["username"] == "cached"
+
+    cache = UserCache(ttl=60)
+    await cache.set(user)
+    assert all("hashed_password" not in entry for _, entry in cache._entries.values())
+
+    restored = await cache.get("cached")
+    assert restored is not user and inspect(restored).detached
+    assert {column: getattr(restored, column) for column in snapshot} == snapshot
+    assert "hashed_password" not in inspect(restored).dict
+    assert await cache.get("unknown") is None and cache.stats()["hits"] == 1
+
+    # A restored user attaches to a session like a loaded one; the hash is loaded on demand
+    async with session_factory() as db:
+        attached = await db.merge(restored, load=False)
+        await db.refresh(attached, ["hashed_password"])
+        assert attached.hashed_password == "secret-hash"
+    print("✅ Snapshots exclude the password hash and restore as detached users")
+
+    cache.ttl = 0
+    await cache.set(user)
+    assert await cache.get("cached") is None
+
+async def check_current_user(engine, session_factory):
+    print("🔍 Checking get_current_user with the cache...")
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    token = await create_access_token({"sub": "cached"})
+
+    async with session_factory() as db:
+        user = await get_current_user(token=token, db=db)
+        assert user.is_first_login is True
+        assert any("FROM users" in statement for statement in statements)
+
+        statements.clear()
+        for _ in range(3):
+            user = await get_current_user(token=token, db=db)
+        assert not any("FROM users" in statement for statement in statements), statements
+        print("✅ Repeated requests are served without querying users")
+
+        await onboarding.complete_onboarding(OnboardingCompleteRequest(), db=db, current_user=user)
+
+    async with session_factory() as db:
+        statements.clear()
+        user = await get_current_user(token=token, db=db)
+        assert user.is_first_login is False, "Completing onboarding must invalidate the cached user"
+        assert any("FROM users" in statement for statement in statements)
+    print("✅ Completing onboarding invalidates the cached user")
+
+async def check_token_claims():
+    print("🔍 Checking verified token claims...")
+
+    credentials_exception = HTTPException(status_code=401)
+    token = await create_access_token({"sub": "cached"}, expires_delta=timedelta(minutes=5))
+    exp = jwt.get_unverified_claims(token)["exp"]
+
+    token_data = await verify_token(token, credentials_exception)
+    assert token_data.username == "cached"
+    token_cache = user_cache.get_token_cache()
+    assert token_cache._entries[(token, "access")][0] == exp
+    assert token_cache.get(token, "access") == "cached"
+    assert token_cache.get(token, "refresh") is None
+
+    claims = TokenClaimsCache(max_entries=2)
+    claims.set("expired", "access", "cached", time.time() - 1)
+    claims.set("valid", "access", "cached", time.time() + 60)
+    assert claims.get("expired", "access") is None and claims.get("valid", "access") == "cached"
+    assert ("expired", "access") not in claims._entries
+
+    claims.set("short", "access", "cached", time.time() + 0.2)
+    await asyncio.sleep(0.3)
+    assert claims.get("short", "access") is None
+    print("✅ Claims are cached until the token's exp and not past it")
+
+async def check_user_cache():
+    db_path = os.path.join(tempfile.mkdtemp(), "user_cache.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as db:
+        user = User(username="cached", email="cached@example.com", hashed_password="secret-hash")
+        db.add(user)
+        await db.flush()
+        db.add(OnboardingProfile(user_id=user.id))
+        await db.commit()
+
+    await check_snapshot(session_factory)
+    await check_current_user(engine, session_factory)
+    await check_token_claims()
+    await engine.dispose()
+
+async def skip_enqueue(user_id: int) -> None:
+    pass
+
+def test_user_cache():
+    secret_key, enqueue = settings.secret_key, onboarding.enqueue_recommendation_refresh
+    settings.secret_key = settings.secret_key or "test-secret"
+    onboarding.enqueue_recommendation_refresh = skip_enqueue
+    user_cache._user_cache = UserCache(ttl=60)
+    user_cache._token_cache = None
+    try:
+        asyncio.run(check_user_cache())
+    finally:
+        settings.secret_key = secret_key
+        onboarding.enqueue_recommendation_refresh = enqueue
+        user_cache._user_cache = None
+        user_cache._token_cache = None
+
+if __name__ == "__main__":
+    test_user_cache()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test and benchmark for the concurrent vacancy detail fetcher.
+Runs against a local fake HH server (no network access needed).
+"""
+
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+
+from app.services.hh_client import create_hh_client
+from app.services.hh_rate_limiter import TokenBucket
+from app.services.vacancy_cache import VacancyCache
+from app.services.vacancy_fetcher import VacancyDetailFetcher
+
+FAKE_LATENCY = 0.05  # Simulated HH round-trip in seconds
+FAILING_ID = "13"
+
+def create_fake_hh_app() -> FastAPI:
+    """Fake HH API that answers /vacancies/{id} after a fixed delay and supports ETag revalidation"""
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.get("/vacancies/{vacancy_id}")
+    async def vacancy(vacancy_id: str, request: Request):
+        app.state.requests += 1
+        await asyncio.sleep(FAKE_LATENCY)
+        if vacancy_id == FAILING_ID:
+            raise HTTPException(status_code=503, detail="Service unavailable")
+
+        etag = f'"v-{vacancy_id}"'
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return JSONResponse(
+            {"id": vacancy_id, "name": f"Vacancy {vacancy_id}", "description": "<p>Полное описание</p>"},
+            headers={"ETag": etag}
+        )
+
+    return app
+
+def make_snippets(count: int) -> list:
+    return [{"id": str(i), "name": f"Vacancy {i}", "snippet": {"requirement": "snippet"}} for i in range(count)]
+
+async def sequential_fetch(client: httpx.AsyncClient, vacancies: list) -> list:
+    """The previous implementation: one request at a time with a fixed sleep"""
+    detailed = []
+    for vacancy in vacancies:
+        response = await client.get(f"/vacancies/{vacancy['id']}")
+        detailed.append(response.json() if response.status_code == 200 else vacancy)
+        await asyncio.sleep(0.1)
+    return detailed
+
+async def check_fallback_and_order():
+    print("🔍 Checking order preservation and per-item fallback...")
+    async with create_hh_client(transport=httpx.ASGITransport(app=create_fake_hh_app())) as client:
+        fetcher = VacancyDetailFetcher(
+            client=client, limiter=TokenBucket(rate=100, capacity=100), concurrency=5, cache=VacancyCache()
+        )
+        vacancies = make_snippets(20)
+        detailed = await fetcher.fetch_details(vacancies)
+
+    assert [v["id"] for v in detailed] == [v["id"] for v in vacancies]
+    assert "snippet" in detailed[int(FAILING_ID)], "Failed fetch should fall back to the search snippet"
+    assert all("description" in v for v in detailed if v["id"] != FAILING_ID)
+    print("✅ Order preserved, failed vacancy fell back to snippet")
+
+async def check_cache():
+    print("🔍 Checking cache hits and ETag revalidation...")
+    app = create_fake_hh_app()
+    cache = VacancyCache(max_entries=3, ttl=60)
+    async with create_hh_client(transport=httpx.ASGITransport(app=app)) as client:
+        fetcher = VacancyDetailFetcher(client=client, limiter=TokenBucket(rate=100, capacity=100), cache=cache)
+
+        await fetcher.fetch_details(make_snippets(3))
+        await fetcher.fetch_details(make_snippets(3))
+        assert app.state.requests == 3, "Second pass should be served from cache"
+        assert cache.hits == 3 and cache.misses == 3
+
+        # Expire everything: the next pass revalidates and HH answers 304
+        cache.ttl = 0
+        detailed = await fetcher.fetch_details(make_snippets(3))
+        assert cache.revalidations == 3
+        assert all("description" in v for v in detailed)
+
+        # A fourth vacancy pushes the least recently used entry out
+        await fetcher.fetch_one("3")
+        assert cache.evictions == 1
+
+    print(f"✅ Cache stats: {cache.stats()}")
+
+async def check_rate_limit():
+    print("🔍 Checking token bucket throttling...")
+    limiter = TokenBucket(rate=20, capacity=5)
+    start = time.perf_counter()
+    for _ in range(15):
+        await limiter.acquire()
+    elapsed = time.perf_counter() - start
+
+    # 5 burst tokens are free, the remaining 10 arrive at 20/s
+    assert elapsed >= 0.45, f"Limiter let requests through too fast: {elapsed:.3f}s"
+    print(f"✅ 15 requests at 20 rps (burst 5) took {elapsed:.2f}s")
+
+async def benchmark():
+    print("⏱️  Benchmark: sequential vs concurrent detail fetching")
+    print(f"{'N':>4} {'sequential':>12} {'concurrent':>12}")
+    async with create_hh_client(transport=httpx.ASGITransport(app=create_fake_hh_app())) as client:
+        for count in (1, 5, 10, 20):
+            vacancies = make_snippets(count)
+            fetcher = VacancyDetailFetcher(
+                client=client, limiter=TokenBucket(rate=50, capacity=20), concurrency=10, cache=VacancyCache()
+            )
+
+            start = time.perf_counter()
+            await sequential_fetch(client, vacancies)
+            sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            await fetcher.fetch_details(vacancies)
+            concurrent = time.perf_counter() - start
+
+            print(f"{count:>4} {sequential:>11.2f}s {concurrent:>11.2f}s")
+            if count == 10:
+                assert concurrent < sequential / 5, "Concurrent fetch should be far faster for N=10"
+
+def test_vacancy_fetcher():
+    asyncio.run(check_fallback_and_order())
+    asyncio.run(check_cache())
+    asyncio.run(check_rate_limit())
+    asyncio.run(benchmark())
+
+if __name__ == "__main__":
+    test_vacancy_fetcher()